@@ -3,7 +3,11 @@ from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from .models import Appointment, AppointmentResult
+from apps.common.cache_tags import invalidate_tags
+
+from .availability import rebuild_slot_index
+from .models import Appointment, AppointmentResult, SlotAvailability
+from .statistics import user_appointments_tag
 
 
 class AppointmentResultInline(admin.StackedInline):
@@ -28,7 +32,7 @@ class AppointmentAdmin(admin.ModelAdmin):
     ]
     list_filter = [
         "status",
-        "desired_date",
+        "starts_at",
         "service__category",
         "created_at",
         "updated_at",
@@ -41,9 +45,9 @@ class AppointmentAdmin(admin.ModelAdmin):
         "user__username",
         "user__email",
     ]
-    readonly_fields = ["created_at", "updated_at", "user_info"]
+    readonly_fields = ["starts_at", "ends_at", "created_at", "updated_at", "user_info"]
     list_editable = ["status"]  # Теперь status есть в list_display
-    date_hierarchy = "desired_date"
+    date_hierarchy = "starts_at"
     inlines = [AppointmentResultInline]
 
     fieldsets = (
@@ -57,6 +61,8 @@ class AppointmentAdmin(admin.ModelAdmin):
                     "status",
                     "desired_date",
                     "desired_time",
+                    "starts_at",
+                    "ends_at",
                 )
             },
         ),
@@ -139,26 +145,34 @@ class AppointmentAdmin(admin.ModelAdmin):
         "mark_as_no_show",
     ]
 
+    def _update_status(self, queryset, status):
+        """Массовая смена статуса; update() обходит сигналы, поэтому индекс слотов и теги обновляются вручную"""
+        rows = set(queryset.values_list("desired_date", "user_id"))
+        updated = queryset.update(status=status)
+        rebuild_slot_index({date for date, _user_id in rows})
+        invalidate_tags(*(user_appointments_tag(user_id) for _date, user_id in rows if user_id))
+        return updated
+
     def confirm_appointments(self, request, queryset):
-        updated = queryset.filter(status="pending").update(status="confirmed")
+        updated = self._update_status(queryset.filter(status="pending"), "confirmed")
         self.message_user(request, _("Подтверждено {} записей").format(updated), messages.SUCCESS)
 
     confirm_appointments.short_description = _("Подтвердить выбранные записи")
 
     def complete_appointments(self, request, queryset):
-        updated = queryset.filter(status="confirmed").update(status="completed")
+        updated = self._update_status(queryset.filter(status="confirmed"), "completed")
         self.message_user(request, _("Завершено {} записей").format(updated), messages.SUCCESS)
 
     complete_appointments.short_description = _("Завершить выбранные записи")
 
     def cancel_appointments(self, request, queryset):
-        updated = queryset.exclude(status="cancelled").update(status="cancelled")
+        updated = self._update_status(queryset.exclude(status="cancelled"), "cancelled")
         self.message_user(request, _("Отменено {} записей").format(updated), messages.SUCCESS)
 
     cancel_appointments.short_description = _("Отменить выбранные записи")
 
     def mark_as_no_show(self, request, queryset):
-        updated = queryset.filter(status="confirmed").update(status="no_show")
+        updated = self._update_status(queryset.filter(status="confirmed"), "no_show")
         self.message_user(
             request,
             _("Отмечено как неявка {} записей").format(updated),
@@ -166,3 +180,18 @@ class AppointmentAdmin(admin.ModelAdmin):
         )
 
     mark_as_no_show.short_description = _("Отметить как неявка")
+
+
+@admin.register(SlotAvailability)
+class SlotAvailabilityAdmin(admin.ModelAdmin):
+    list_display = ["date", "booked_count", "updated_at"]
+    date_hierarchy = "date"
+    readonly_fields = ["date", "booked_mask", "updated_at"]
+
+    def booked_count(self, obj):
+        return bin(obj.booked_mask).count("1")
+
+    booked_count.short_description = _("Занято слотов")
+
+    def has_add_permission(self, request):
+        return False
@@ -5,3 +5,6 @@ class AppointmentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.appointments"
     verbose_name = "Записи на прием"
+
+    def ready(self):
+        from . import signals  # noqa: F401
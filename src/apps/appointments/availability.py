@@ -0,0 +1,258 @@
+"""
+Индекс занятости слотов.
+
+Для каждой даты хранится одна запись SlotAvailability с 24-битной маской:
+бит i установлен, если слот Appointment.TIME_SLOTS[i] занят активной записью.
+Маска поддерживается сигналами модели Appointment, поэтому API свободного
+времени отвечает одним запросом по первичному ключу без сканирования записей.
+"""
+import datetime
+import random
+import time as time_module
+from collections import defaultdict
+from functools import lru_cache
+
+from django.db import IntegrityError, OperationalError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.common.cache_compute import get_cache_setting
+from apps.common.cache_tags import invalidate_tags
+from apps.common.single_flight import get_or_compute_coalesced
+
+from .models import Appointment, SlotAvailability
+
+SLOT_TIMES = [slot for slot, _label in Appointment.TIME_SLOTS]
+SLOT_BITS = {slot: 1 << index for index, slot in enumerate(SLOT_TIMES)}
+FULL_MASK = (1 << len(SLOT_TIMES)) - 1
+
+# Тег всего индекса: меняется только при полной перестройке, изменения дат меняют теги дат
+SLOT_INDEX_TAG = "slot-index"
+DEFAULT_AVAILABILITY_CACHE_TIMEOUT = 30
+
+# Попытки бронирования при конкурентной блокировке базы
+RESERVATION_ATTEMPTS = 5
+RESERVATION_BACKOFF = 0.02
+
+
+class SlotUnavailableError(Exception):
+    """Слот не удалось забронировать"""
+
+    def __init__(self, message=None):
+        self.message = message or _("Выбранное время уже занято. Пожалуйста, выберите другое время.")
+        super().__init__(self.message)
+
+
+def slot_date_tag(date):
+    """Тег масок на дату"""
+    return f"{SLOT_INDEX_TAG}:{date.isoformat()}"
+
+
+def slot_tags(start, end=None):
+    """Теги записи кэша, построенной по индексу за период: тег индекса и теги всех дат периода"""
+    end = start if end is None else end
+    tags = [SLOT_INDEX_TAG]
+    date = start
+    while date <= end:
+        tags.append(slot_date_tag(date))
+        date += datetime.timedelta(days=1)
+    return tags
+
+
+def slot_bit(time):
+    """Бит слота в маске (0 для неизвестного времени)"""
+    return SLOT_BITS.get(time, 0)
+
+
+@lru_cache(maxsize=1024)
+def free_slots(booked_mask):
+    """Список свободных слотов для маски занятости"""
+    return tuple(slot for slot in SLOT_TIMES if not booked_mask & SLOT_BITS[slot])
+
+
+def get_booked_mask(date):
+    """Маска занятых слотов на дату (один запрос по уникальному индексу)"""
+    mask = SlotAvailability.objects.filter(date=date).values_list("booked_mask", flat=True).first()
+    return mask or 0
+
+
+def occupy_slot(date, time):
+    """Атомарно помечает слот занятым"""
+    bit = slot_bit(time)
+    if not bit:
+        return
+    invalidate_tags(slot_date_tag(date))
+    if SlotAvailability.objects.filter(date=date).update(booked_mask=F("booked_mask").bitor(bit)):
+        return
+    try:
+        with transaction.atomic():
+            SlotAvailability.objects.create(date=date, booked_mask=bit)
+    except IntegrityError:
+        # Запись на дату успели создать параллельно
+        SlotAvailability.objects.filter(date=date).update(booked_mask=F("booked_mask").bitor(bit))
+
+
+def release_slot(date, time):
+    """Атомарно освобождает слот"""
+    bit = slot_bit(time)
+    if not bit:
+        return
+    invalidate_tags(slot_date_tag(date))
+    SlotAvailability.objects.filter(date=date).update(booked_mask=F("booked_mask").bitand(FULL_MASK ^ bit))
+
+
+def compute_masks(dates=None):
+    """Фактические маски по активным записям: {дата: маска}"""
+    queryset = Appointment.objects.filter(status__in=Appointment.ACTIVE_STATUSES)
+    if dates is not None:
+        queryset = queryset.filter(desired_date__in=dates)
+
+    masks = defaultdict(int)
+    for date, time in queryset.values_list("desired_date", "desired_time").iterator():
+        masks[date] |= slot_bit(time)
+    return dict(masks)
+
+
+@transaction.atomic
+def rebuild_slot_index(dates=None):
+    """
+    Пересчитывает маски по реальным записям.
+    Без аргументов перестраивает весь индекс, иначе только указанные даты.
+    Возвращает количество записанных дат.
+    """
+    if dates is not None:
+        dates = set(dates)
+        if not dates:
+            return 0
+
+    masks = compute_masks(dates)
+    invalidate_tags(*(map(slot_date_tag, dates) if dates is not None else [SLOT_INDEX_TAG]))
+
+    stale = SlotAvailability.objects.all()
+    if dates is not None:
+        stale = stale.filter(date__in=dates)
+    stale.exclude(date__in=list(masks)).delete()
+
+    existing = {row.date: row for row in SlotAvailability.objects.filter(date__in=list(masks))}
+    to_create = []
+    to_update = []
+    for date, mask in masks.items():
+        row = existing.get(date)
+        if row is None:
+            to_create.append(SlotAvailability(date=date, booked_mask=mask))
+        elif row.booked_mask != mask:
+            row.booked_mask = mask
+            to_update.append(row)
+
+    SlotAvailability.objects.bulk_create(to_create, batch_size=500)
+    SlotAvailability.objects.bulk_update(to_update, ["booked_mask"], batch_size=500)
+    return len(masks)
+
+
+def check_slot_index(dates=None):
+    """
+    Сверяет индекс с реальными записями.
+    Возвращает список расхождений (дата, маска в индексе, фактическая маска).
+    """
+    actual = compute_masks(dates)
+    indexed = SlotAvailability.objects.all()
+    if dates is not None:
+        indexed = indexed.filter(date__in=dates)
+    indexed = dict(indexed.values_list("date", "booked_mask"))
+
+    mismatches = []
+    for date in sorted(set(actual) | set(indexed)):
+        if actual.get(date, 0) != indexed.get(date, 0):
+            mismatches.append((date, indexed.get(date, 0), actual.get(date, 0)))
+    return mismatches
+
+
+def get_masks(start, end):
+    """Маски занятости за период одним запросом: {дата: маска} только для дат с записями"""
+    return dict(SlotAvailability.objects.filter(date__range=(start, end)).values_list("date", "booked_mask").order_by("date"))
+
+
+def get_cached_masks(start, end):
+    """
+    Маски за период из кэша. Все воркеры, промахнувшиеся одновременно, ждут одного пересчета;
+    бронирование и отмена меняют тег своей даты, поэтому занятый слот не показывается свободным,
+    а периоды без этой даты остаются в кэше.
+    """
+    return get_or_compute_coalesced(
+        f"appointments:masks:{start.isoformat()}:{end.isoformat()}",
+        lambda: get_masks(start, end),
+        get_cache_setting("AVAILABILITY_CACHE_TIMEOUT", DEFAULT_AVAILABILITY_CACHE_TIMEOUT),
+        tags=slot_tags(start, end),
+    )
+
+
+def get_shared_booked_mask(date):
+    """Маска на дату; одновременные запросы одной даты выполняют один запрос к индексу"""
+    return get_or_compute_coalesced(
+        f"appointments:booked-mask:{date.isoformat()}", lambda: get_booked_mask(date), tags=slot_tags(date)
+    )
+
+
+def find_next_free_slot(start, end, chunk_days=14):
+    """
+    Ближайший свободный слот в периоде: (дата, время) или None.
+    Индекс читается окнами по chunk_days дней и только до первой неполной даты.
+    """
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + datetime.timedelta(days=chunk_days - 1), end)
+        masks = get_masks(window_start, window_end)
+
+        date = window_start
+        while date <= window_end:
+            slots = free_slots(masks.get(date, 0))
+            if slots:
+                return date, slots[0]
+            date += datetime.timedelta(days=1)
+
+        window_start = window_end + datetime.timedelta(days=1)
+    return None
+
+
+def lock_booking_day(date):
+    """
+    Блокирует строку индекса на дату до конца транзакции.
+    Запрос начинается с записи: на PostgreSQL это блокировка строки, на SQLite - блокировка базы
+    на запись, поэтому параллельные бронирования одной даты выполняются строго по очереди.
+    """
+    if SlotAvailability.objects.filter(date=date).update(updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            SlotAvailability.objects.create(date=date)
+    except IntegrityError:
+        # Строку на дату успели создать параллельно - блокируем ее
+        SlotAvailability.objects.filter(date=date).update(updated_at=timezone.now())
+
+
+def reserve_slot(appointment):
+    """
+    Бронирует слот и сохраняет запись в одной транзакции.
+    При занятом слоте выбрасывает SlotUnavailableError, при блокировках повторяет попытку ограниченное число раз.
+    """
+    for attempt in range(1, RESERVATION_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                lock_booking_day(appointment.desired_date)
+                taken = Appointment.objects.filter(
+                    desired_date=appointment.desired_date,
+                    desired_time=appointment.desired_time,
+                    status__in=Appointment.ACTIVE_STATUSES,
+                ).exists()
+                if taken:
+                    raise SlotUnavailableError()
+                appointment.save()
+            return appointment
+        except IntegrityError:
+            # Уникальный индекс базы - последний рубеж защиты от двойной записи
+            raise SlotUnavailableError()
+        except OperationalError:
+            if attempt == RESERVATION_ATTEMPTS:
+                raise SlotUnavailableError(_("Не удалось забронировать время, попробуйте еще раз."))
+            time_module.sleep(RESERVATION_BACKOFF * attempt * (1 + random.random()))
@@ -4,6 +4,8 @@ from django import forms
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .availability import reserve_slot
+from .holds import HELD_MESSAGE, is_held_by_other, release_hold
 from .models import Appointment
 
 
@@ -81,6 +83,8 @@ class AppointmentForm(forms.ModelForm):
                 status__in=["pending", "confirmed"],
             ).exists():
                 raise forms.ValidationError(_("Выбранное время уже занято. Пожалуйста, выберите другое время."))
+            if self.user and is_held_by_other(desired_date, desired_time, self.user.pk):
+                raise forms.ValidationError(HELD_MESSAGE)
 
         return cleaned_data
 
@@ -100,7 +104,11 @@ class AppointmentForm(forms.ModelForm):
             appointment.patient_phone = self.user.phone
 
         if commit:
-            appointment.save()
+            # Проверка и вставка выполняются атомарно, см. reserve_slot
+            reserve_slot(appointment)
+            if self.user:
+                # Удержание превратилось в запись
+                release_hold(self.user.pk, appointment.desired_date, appointment.desired_time)
 
         return appointment
 
@@ -0,0 +1,129 @@
+"""
+Временные удержания слотов.
+
+Пока пациент заполняет форму записи, выбранный слот удерживается в общем кэше
+(Redis в production), поэтому удержание видно всем воркерам gunicorn.
+Захват слота выполняется через cache.add, который атомарен в Redis и locmem;
+замена просроченного или продление собственного удержания - тоже через cache.add
+(право заменить конкретное удержание получает один претендент).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+
+from .availability import SLOT_BITS, SlotUnavailableError, get_booked_mask
+
+DEFAULT_HOLD_MINUTES = 10
+
+HELD_MESSAGE = _("Выбранное время временно удерживается другим пациентом. Пожалуйста, выберите другое время.")
+
+
+def get_hold_seconds():
+    """Длительность удержания в секундах"""
+    appointment_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("APPOINTMENT_SETTINGS", {})
+    return appointment_settings.get("SLOT_HOLD_MINUTES", DEFAULT_HOLD_MINUTES) * 60
+
+
+def _slot_key(date, time_slot):
+    return f"slot-hold:{date.isoformat()}:{time_slot}"
+
+
+def _user_key(user_id):
+    return f"slot-hold-user:{user_id}"
+
+
+def _is_expired(hold, now):
+    return hold is None or hold["expires_at"] <= now
+
+
+def get_holds(date):
+    """
+    Действующие удержания на дату: {время: удержание}.
+    Все слоты дня читаются одним get_many; просроченные записи, которые бэкенд кэша
+    еще не вытеснил, попутно удаляются.
+    """
+    keys = {_slot_key(date, time_slot): time_slot for time_slot in SLOT_BITS}
+    now = time.time()
+    holds = {}
+    expired = []
+    for key, hold in cache.get_many(list(keys)).items():
+        if _is_expired(hold, now):
+            expired.append(key)
+        else:
+            holds[keys[key]] = hold
+    if expired:
+        cache.delete_many(expired)
+    return holds
+
+
+def get_held_slots(date, exclude_user_id=None):
+    """Слоты, удерживаемые на дату другими пользователями"""
+    return {time_slot for time_slot, hold in get_holds(date).items() if hold["user_id"] != exclude_user_id}
+
+
+def is_held_by_other(date, time_slot, user_id):
+    """Удерживается ли слот другим пользователем"""
+    hold = cache.get(_slot_key(date, time_slot))
+    return not _is_expired(hold, time.time()) and hold["user_id"] != user_id
+
+
+def hold_slot(user_id, date, time_slot):
+    """
+    Удерживает слот за пользователем и возвращает время окончания удержания.
+    У пользователя одновременно действует одно удержание: предыдущее снимается.
+    """
+    if time_slot not in SLOT_BITS or get_booked_mask(date) & SLOT_BITS[time_slot]:
+        raise SlotUnavailableError()
+
+    seconds = get_hold_seconds()
+    key = _slot_key(date, time_slot)
+    hold = {"user_id": user_id, "expires_at": time.time() + seconds}
+
+    if not cache.add(key, hold, seconds):
+        current = cache.get(key)
+        if not _is_expired(current, time.time()) and current["user_id"] != user_id:
+            raise SlotUnavailableError(HELD_MESSAGE)
+        # Продление собственного удержания или замена просроченного
+        if not _replace_hold(key, current, hold, seconds):
+            current = cache.get(key)
+            if _is_expired(current, time.time()) or current["user_id"] != user_id:
+                raise SlotUnavailableError(HELD_MESSAGE)
+            # Удержание продлил параллельный запрос того же пользователя
+            hold = current
+
+    previous_key = cache.get(_user_key(user_id))
+    if previous_key and previous_key != key:
+        _release_key(previous_key, user_id)
+    cache.set(_user_key(user_id), key, seconds)
+    return hold["expires_at"]
+
+
+def _replace_hold(key, current, hold, seconds):
+    """
+    Заменяет прочитанное удержание current на hold. Из одновременных претендентов,
+    прочитавших одно и то же удержание, заменяет только получивший ключ замены.
+    """
+    if current is None:
+        # Удержание вытеснено после неудачного add
+        return cache.add(key, hold, seconds)
+    if not cache.add(f"{key}:replace:{current['expires_at']!r}", hold["user_id"], seconds):
+        return False
+    cache.set(key, hold, seconds)
+    return True
+
+
+def _release_key(key, user_id):
+    hold = cache.get(key)
+    if hold is not None and hold["user_id"] == user_id:
+        cache.delete(key)
+
+
+def release_hold(user_id, date=None, time_slot=None):
+    """Снимает удержание пользователя (конкретного слота или текущее)"""
+    key = _slot_key(date, time_slot) if date and time_slot else cache.get(_user_key(user_id))
+    if key:
+        _release_key(key, user_id)
+        if cache.get(_user_key(user_id)) == key:
+            cache.delete(_user_key(user_id))
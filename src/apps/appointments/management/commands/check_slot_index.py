@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.appointments.availability import check_slot_index, rebuild_slot_index
+
+
+class Command(BaseCommand):
+    help = "Сверяет индекс занятости слотов с реальными записями на прием"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Перестроить расходящиеся даты")
+
+    def handle(self, *args, **options):
+        mismatches = check_slot_index()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Индекс слотов согласован с записями"))
+            return
+
+        for date, indexed, actual in mismatches:
+            self.stdout.write(self.style.WARNING(f"{date}: в индексе {indexed:024b}, фактически {actual:024b}"))
+
+        if options["fix"]:
+            rebuild_slot_index(date for date, _indexed, _actual in mismatches)
+            self.stdout.write(self.style.SUCCESS(f"Исправлено дат: {len(mismatches)}"))
+            return
+
+        raise CommandError(f"Найдено расхождений: {len(mismatches)}")
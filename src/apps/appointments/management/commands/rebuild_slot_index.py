@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.appointments.availability import rebuild_slot_index
+
+
+class Command(BaseCommand):
+    help = "Перестраивает индекс занятости слотов по реальным записям на прием"
+
+    def handle(self, *args, **options):
+        count = rebuild_slot_index()
+        self.stdout.write(self.style.SUCCESS(f"Индекс слотов перестроен, дат с записями: {count}"))
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.2 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+def build_slot_index(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    SlotAvailability = apps.get_model("appointments", "SlotAvailability")
+
+    slots = [slot for slot, _label in Appointment._meta.get_field("desired_time").choices]
+    bits = {slot: 1 << index for index, slot in enumerate(slots)}
+
+    masks = {}
+    rows = Appointment.objects.filter(status__in=["pending", "confirmed"]).values_list("desired_date", "desired_time")
+    for date, time in rows.iterator():
+        masks[date] = masks.get(date, 0) | bits.get(time, 0)
+
+    SlotAvailability.objects.bulk_create(
+        [SlotAvailability(date=date, booked_mask=mask) for date, mask in masks.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("appointments", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotAvailability",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(unique=True, verbose_name="Дата")),
+                ("booked_mask", models.PositiveIntegerField(default=0, verbose_name="Маска занятых слотов")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+            ],
+            options={
+                "verbose_name": "Занятость слотов",
+                "verbose_name_plural": "Занятость слотов",
+                "ordering": ["date"],
+            },
+        ),
+        migrations.RunPython(build_slot_index, migrations.RunPython.noop),
+    ]
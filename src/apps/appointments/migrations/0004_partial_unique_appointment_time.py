@@ -0,0 +1,54 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+ACTIVE_APPOINTMENT_TIME = models.UniqueConstraint(
+    fields=("desired_date", "desired_time"),
+    condition=models.Q(status__in=["pending", "confirmed"]),
+    name="unique_active_appointment_time",
+)
+
+
+def create_active_index(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    if schema_editor.connection.vendor == "postgresql":
+        # CONCURRENTLY не блокирует запись в таблицу на время построения индекса
+        schema_editor.execute(
+            'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "unique_active_appointment_time" '
+            'ON "%s" ("desired_date", "desired_time") '
+            "WHERE \"status\" IN ('pending', 'confirmed')" % Appointment._meta.db_table
+        )
+    else:
+        schema_editor.add_constraint(Appointment, ACTIVE_APPOINTMENT_TIME)
+
+
+def drop_active_index(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS "unique_active_appointment_time"')
+    else:
+        schema_editor.remove_constraint(Appointment, ACTIVE_APPOINTMENT_TIME)
+
+
+class Migration(migrations.Migration):
+    # Построение индекса с CONCURRENTLY невозможно внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("appointments", "0003_slotavailability"),
+    ]
+
+    operations = [
+        # Сначала новый частичный индекс, затем удаление старого ограничения:
+        # уникальность активных записей гарантирована на каждом шаге
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_active_index, drop_active_index)],
+            state_operations=[
+                migrations.AddConstraint(model_name="appointment", constraint=ACTIVE_APPOINTMENT_TIME),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name="appointment",
+            name="unique_appointment_time",
+        ),
+    ]
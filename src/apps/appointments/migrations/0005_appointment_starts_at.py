@@ -0,0 +1,77 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:08
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+SLOT_DURATION = datetime.timedelta(minutes=30)
+
+STARTS_AT_INDEX = models.Index(fields=["starts_at"], name="appointment_starts_at_idx")
+
+
+def backfill_starts_at(apps, schema_editor):
+    """Заполняет starts_at/ends_at пакетами по первичному ключу: каждая пачка - отдельная короткая транзакция"""
+    Appointment = apps.get_model("appointments", "Appointment")
+    last_pk = 0
+    while True:
+        batch = list(
+            Appointment.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .only("pk", "desired_date", "desired_time")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for appointment in batch:
+            start_time = datetime.time.fromisoformat(appointment.desired_time)
+            appointment.starts_at = timezone.make_aware(datetime.datetime.combine(appointment.desired_date, start_time))
+            appointment.ends_at = appointment.starts_at + SLOT_DURATION
+        Appointment.objects.bulk_update(batch, ["starts_at", "ends_at"])
+        last_pk = batch[-1].pk
+
+
+def create_starts_at_index(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS "appointment_starts_at_idx" ON "%s" ("starts_at")'
+            % Appointment._meta.db_table
+        )
+    else:
+        schema_editor.add_index(Appointment, STARTS_AT_INDEX)
+
+
+def drop_starts_at_index(apps, schema_editor):
+    Appointment = apps.get_model("appointments", "Appointment")
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute('DROP INDEX CONCURRENTLY IF EXISTS "appointment_starts_at_idx"')
+    else:
+        schema_editor.remove_index(Appointment, STARTS_AT_INDEX)
+
+
+class Migration(migrations.Migration):
+    # Пакетное заполнение и CONCURRENTLY-индекс выполняются вне общей транзакции
+    atomic = False
+
+    dependencies = [
+        ("appointments", "0004_partial_unique_appointment_time"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="ends_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="Окончание приема"),
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="starts_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="Начало приема"),
+        ),
+        migrations.RunPython(backfill_starts_at, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(create_starts_at_index, drop_starts_at_index)],
+            state_operations=[migrations.AddIndex(model_name="appointment", index=STARTS_AT_INDEX)],
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.common.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY на PostgreSQL, что невозможно внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("appointments", "0005_appointment_starts_at"),
+        ("services", "0003_populate_slugs"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(fields=["user", "status"], name="appointment_user_status_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(fields=["desired_date", "status"], name="appointment_date_status_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(fields=["status", "starts_at"], name="appointment_status_starts_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(fields=["created_at"], name="appointment_created_at_idx"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.common.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY на PostgreSQL, что невозможно внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("appointments", "0006_hot_query_indexes"),
+        ("services", "0009_searchquerystat"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(fields=["user", "-desired_date", "desired_time", "id"], name="appointment_user_date_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="appointment",
+            index=models.Index(fields=["user", "starts_at", "id"], name="appointment_user_starts_idx"),
+        ),
+    ]
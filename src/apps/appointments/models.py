@@ -7,6 +7,24 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
+class AppointmentQuerySet(models.QuerySet):
+    def active(self):
+        """Записи, занимающие слот"""
+        return self.filter(status__in=Appointment.ACTIVE_STATUSES)
+
+    def starting_between(self, start, end):
+        """Записи с началом приема в полуинтервале [start, end) - для напоминаний и отчетов"""
+        return self.filter(starts_at__gte=start, starts_at__lt=end)
+
+    def upcoming(self, now=None):
+        """Активные записи, прием по которым еще не начался"""
+        return self.active().filter(starts_at__gte=now or timezone.now())
+
+    def past(self, now=None):
+        """Записи, время приема по которым уже наступило"""
+        return self.filter(starts_at__lt=now or timezone.now())
+
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ("pending", _("Ожидание подтверждения")),
@@ -16,6 +34,11 @@ class Appointment(models.Model):
         ("no_show", _("Не явился")),
     ]
 
+    # Статусы, при которых слот считается занятым
+    ACTIVE_STATUSES = ["pending", "confirmed"]
+
+    SLOT_DURATION = datetime.timedelta(minutes=30)
+
     TIME_SLOTS = [
         ("08:00", "08:00 - 08:30"),
         ("08:30", "08:30 - 09:00"),
@@ -57,6 +80,9 @@ class Appointment(models.Model):
     )
     desired_date = models.DateField(verbose_name=_("Желаемая дата"))
     desired_time = models.CharField(max_length=5, choices=TIME_SLOTS, verbose_name=_("Желаемое время"))
+    # Заполняются в save() из desired_date/desired_time для выборок по диапазону дат
+    starts_at = models.DateTimeField(null=True, editable=False, verbose_name=_("Начало приема"))
+    ends_at = models.DateTimeField(null=True, editable=False, verbose_name=_("Окончание приема"))
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -77,28 +103,77 @@ class Appointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Дата создания"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Дата обновления"))
 
+    objects = AppointmentQuerySet.as_manager()
+
     class Meta:
         verbose_name = _("Запись на прием")
         verbose_name_plural = _("Записи на прием")
         ordering = ["-desired_date", "desired_time"]
-        constraints = [models.UniqueConstraint(fields=["desired_date", "desired_time"], name="unique_appointment_time")]
+        constraints = [
+            # Уникальность только среди активных записей: отмененные не блокируют слот и не раздувают индекс
+            models.UniqueConstraint(
+                fields=["desired_date", "desired_time"],
+                condition=models.Q(status__in=["pending", "confirmed"]),
+                name="unique_active_appointment_time",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["starts_at"], name="appointment_starts_at_idx"),
+            # Записи пользователя по статусу (список записей, статистика личного кабинета)
+            models.Index(fields=["user", "status"], name="appointment_user_status_idx"),
+            # Записи на дату (сегодняшние записи в админке, индекс слотов)
+            models.Index(fields=["desired_date", "status"], name="appointment_date_status_idx"),
+            # Счетчики по статусу в панели управления
+            models.Index(fields=["status", "starts_at"], name="appointment_status_starts_idx"),
+            # Последние записи и статистика за 30 дней
+            models.Index(fields=["created_at"], name="appointment_created_at_idx"),
+            # Постраничный вывод записей пользователя по ключу (все/прошедшие и предстоящие)
+            models.Index(fields=["user", "-desired_date", "desired_time", "id"], name="appointment_user_date_idx"),
+            models.Index(fields=["user", "starts_at", "id"], name="appointment_user_starts_idx"),
+        ]
 
     def __str__(self):
         return f"{self.patient_name} - {self.service.name} - {self.desired_date} {self.desired_time}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем загруженный слот, чтобы сигналы могли обновить индекс без лишнего запроса
+        instance._loaded_slot = instance.get_slot_state()
+        return instance
+
+    def get_slot_state(self):
+        """Текущее состояние слота: (дата, время, занимает ли слот) или None для отложенных полей"""
+        values = self.__dict__
+        if not all(name in values for name in ("desired_date", "desired_time", "status")):
+            return None
+        return values["desired_date"], values["desired_time"], values["status"] in self.ACTIVE_STATUSES
+
+    def save(self, *args, **kwargs):
+        self.starts_at, self.ends_at = self.get_slot_bounds()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"desired_date", "desired_time"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "starts_at", "ends_at"}
+        super().save(*args, **kwargs)
+
+    def get_slot_bounds(self):
+        """Начало и окончание приема по выбранным дате и слоту"""
+        start_time = SLOT_START_TIMES.get(self.desired_time)
+        if self.desired_date is None or start_time is None:
+            return None, None
+        starts_at = timezone.make_aware(datetime.datetime.combine(self.desired_date, start_time))
+        return starts_at, starts_at + self.SLOT_DURATION
+
     @property
     def is_past_due(self):
         """Проверяет, прошла ли дата приема"""
-        appointment_datetime = datetime.datetime.combine(
-            self.desired_date,
-            datetime.datetime.strptime(self.desired_time, "%H:%M").time(),
-        )
-        return timezone.now() > timezone.make_aware(appointment_datetime)
+        starts_at = self.starts_at or self.get_slot_bounds()[0]
+        return timezone.now() > starts_at
 
     @property
     def can_be_cancelled(self):
         """Можно ли отменить запись"""
-        return self.status in ["pending", "confirmed"] and not self.is_past_due
+        return self.status in self.ACTIVE_STATUSES and not self.is_past_due
 
     @property
     def formatted_time(self):
@@ -117,6 +192,10 @@ class Appointment(models.Model):
         return colors.get(self.status, "secondary")
 
 
+# Время начала каждого слота, разобранное один раз при загрузке модуля
+SLOT_START_TIMES = {slot: datetime.time.fromisoformat(slot) for slot, _label in Appointment.TIME_SLOTS}
+
+
 class AppointmentResult(models.Model):
     appointment = models.OneToOneField(
         Appointment,
@@ -142,3 +221,19 @@ class AppointmentResult(models.Model):
 
     def __str__(self):
         return f"Результат приема {self.appointment}"
+
+
+class SlotAvailability(models.Model):
+    """Битовая маска занятых слотов на дату: бит i соответствует Appointment.TIME_SLOTS[i]"""
+
+    date = models.DateField(unique=True, verbose_name=_("Дата"))
+    booked_mask = models.PositiveIntegerField(default=0, verbose_name=_("Маска занятых слотов"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Дата обновления"))
+
+    class Meta:
+        verbose_name = _("Занятость слотов")
+        verbose_name_plural = _("Занятость слотов")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date}: {self.booked_mask:024b}"
@@ -0,0 +1,48 @@
+"""
+Сигналы приложения appointments: поддержка индекса занятости слотов и инвалидация тегов кэша.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.common.cache_tags import invalidate_tags
+
+from .availability import occupy_slot, rebuild_slot_index, release_slot
+from .models import Appointment
+from .statistics import user_appointments_tag
+
+
+@receiver(post_save, sender=Appointment, dispatch_uid="appointments_slot_index_save")
+def update_slot_index_on_save(sender, instance, created, raw=False, **kwargs):
+    """Обновляет маску при создании записи, смене слота или статуса"""
+    if raw:
+        return
+
+    new_state = instance.get_slot_state()
+    old_state = None if created else getattr(instance, "_loaded_slot", None)
+
+    if not created and old_state is None:
+        # Исходное состояние неизвестно (объект собран вручную) - пересчитываем дату целиком
+        rebuild_slot_index([instance.desired_date])
+    elif old_state != new_state:
+        if old_state and old_state[2]:
+            release_slot(old_state[0], old_state[1])
+        if new_state and new_state[2]:
+            occupy_slot(new_state[0], new_state[1])
+
+    instance._loaded_slot = new_state
+
+
+@receiver(post_delete, sender=Appointment, dispatch_uid="appointments_slot_index_delete")
+def update_slot_index_on_delete(sender, instance, **kwargs):
+    """Освобождает слот удаленной записи"""
+    state = getattr(instance, "_loaded_slot", None) or instance.get_slot_state()
+    if state and state[2]:
+        release_slot(state[0], state[1])
+
+
+@receiver(post_save, sender=Appointment, dispatch_uid="appointments_cache_save")
+@receiver(post_delete, sender=Appointment, dispatch_uid="appointments_cache_delete")
+def invalidate_user_appointments(sender, instance, raw=False, **kwargs):
+    """Изменение записи делает устаревшими записи с тегом user:<id>:appointments"""
+    if not raw and instance.user_id:
+        invalidate_tags(user_appointments_tag(instance.user_id))
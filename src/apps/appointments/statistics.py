@@ -0,0 +1,50 @@
+"""
+Статистика записей пользователя для списка записей и личного кабинета.
+
+Статистика считается одним условным агрегатом и кэшируется с тегом
+user:<id>:appointments: сигналы Appointment меняют версию тега, и следующий запрос
+пересчитывает ее. Короткое время жизни ограничивает расхождение счетчиков
+"предстоящих" и "прошедших", которые меняются с течением времени без изменения записей.
+
+Тега user:<id> нет: ни статистика, ни другие записи кэша не содержат полей пользователя,
+а личный кабинет и профиль не кэшируются. Удаление пользователя удаляет его записи
+каскадом, и сигналы Appointment меняют тег статистики.
+"""
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from apps.common.cache_compute import get_cache_setting, get_or_compute
+
+from .models import Appointment
+
+DEFAULT_STATISTICS_CACHE_TIMEOUT = 60
+
+
+def user_appointments_tag(user_id):
+    return f"user:{user_id}:appointments"
+
+
+def get_statistics_cache_timeout():
+    """Время жизни закэшированной статистики в секундах"""
+    return get_cache_setting("STATISTICS_CACHE_TIMEOUT", DEFAULT_STATISTICS_CACHE_TIMEOUT)
+
+
+def compute_appointment_statistics(user_id):
+    """Всего, предстоящих, прошедших и завершенных записей пользователя"""
+    now = timezone.now()
+    return Appointment.objects.filter(user_id=user_id).aggregate(
+        total=Count("id"),
+        upcoming=Count("id", filter=Q(status__in=Appointment.ACTIVE_STATUSES, starts_at__gte=now)),
+        past=Count("id", filter=Q(starts_at__lt=now)),
+        completed=Count("id", filter=Q(status="completed")),
+    )
+
+
+def get_appointment_statistics(user):
+    """Статистика записей пользователя из кэша"""
+    return get_or_compute(
+        f"appointments:statistics:{user.pk}",
+        lambda: compute_appointment_statistics(user.pk),
+        get_statistics_cache_timeout(),
+        tags=[user_appointments_tag(user.pk)],
+    )
@@ -0,0 +1,206 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.appointments.availability import (
+    FULL_MASK,
+    check_slot_index,
+    free_slots,
+    get_booked_mask,
+    rebuild_slot_index,
+    slot_bit,
+)
+from apps.appointments.models import Appointment, SlotAvailability
+from apps.services.models import Service, ServiceCategory
+
+User = get_user_model()
+
+
+class SlotTestBase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        self.service = Service.objects.create(
+            category=self.category, name="УЗИ", description="Ультразвуковое исследование", price=2000.00
+        )
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def create_appointment(self, time="10:00", **kwargs):
+        data = {
+            "user": self.user,
+            "service": self.service,
+            "desired_date": self.date,
+            "desired_time": time,
+            "patient_name": "John Doe",
+            "patient_phone": "+1234567890",
+            "patient_email": "john@example.com",
+        }
+        data.update(kwargs)
+        return Appointment.objects.create(**data)
+
+
+class SlotIndexTest(SlotTestBase):
+    def test_free_slots_from_mask(self):
+        """Test converting a mask into the list of free slots"""
+        self.assertEqual(len(free_slots(0)), 24)
+        self.assertEqual(free_slots(FULL_MASK), ())
+        self.assertNotIn("08:00", free_slots(slot_bit("08:00")))
+
+    def test_create_sets_bit(self):
+        """Test that booking a slot sets its bit"""
+        self.create_appointment("10:00")
+        self.create_appointment("19:30")
+        self.assertEqual(get_booked_mask(self.date), slot_bit("10:00") | slot_bit("19:30"))
+
+    def test_inactive_status_does_not_occupy(self):
+        """Test that cancelled appointments do not occupy slots"""
+        self.create_appointment("10:00", status="cancelled")
+        self.assertEqual(get_booked_mask(self.date), 0)
+
+    def test_cancel_releases_bit(self):
+        """Test that cancelling an appointment releases its slot"""
+        appointment = self.create_appointment("10:00")
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        appointment.status = "cancelled"
+        appointment.save()
+        self.assertEqual(get_booked_mask(self.date), 0)
+
+    def test_move_updates_both_slots(self):
+        """Test that moving an appointment frees the old slot and takes the new one"""
+        appointment = self.create_appointment("10:00")
+        appointment.desired_time = "11:00"
+        appointment.save()
+        self.assertEqual(get_booked_mask(self.date), slot_bit("11:00"))
+
+    def test_delete_releases_bit(self):
+        """Test that deleting an appointment releases its slot"""
+        appointment = self.create_appointment("10:00")
+        Appointment.objects.get(pk=appointment.pk).delete()
+        self.assertEqual(get_booked_mask(self.date), 0)
+
+    def test_check_and_rebuild(self):
+        """Test that the consistency checker finds drift and rebuild fixes it"""
+        self.create_appointment("10:00")
+        Appointment.objects.update(status="cancelled")  # update() bypasses signals
+        self.assertEqual(check_slot_index(), [(self.date, slot_bit("10:00"), 0)])
+
+        rebuild_slot_index()
+        self.assertEqual(check_slot_index(), [])
+        self.assertFalse(SlotAvailability.objects.exists())
+
+    def test_check_command(self):
+        """Test check_slot_index command output and --fix"""
+        self.create_appointment("10:00")
+        SlotAvailability.objects.update(booked_mask=0)
+
+        with self.assertRaises(CommandError):
+            call_command("check_slot_index", stdout=StringIO())
+
+        call_command("check_slot_index", "--fix", stdout=StringIO())
+        self.assertEqual(get_booked_mask(self.date), slot_bit("10:00"))
+
+    def test_available_slots_view(self):
+        """Test that the API answers from the index"""
+        self.create_appointment("10:00")
+        self.client.login(username="testuser", password="testpass123")
+
+        response = self.client.get(
+            reverse("appointments:available_slots", args=[self.service.slug]), {"date": self.date.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        slots = response.json()["available_slots"]
+        self.assertEqual(len(slots), 23)
+        self.assertNotIn("10:00", slots)
+
+    def test_available_slots_follow_bookings(self):
+        """Test that the shared result of concurrent reads is dropped by a booking"""
+        self.client.login(username="testuser", password="testpass123")
+        url = reverse("appointments:available_slots", args=[self.service.slug])
+        self.assertIn("11:00", self.client.get(url, {"date": self.date.isoformat()}).json()["available_slots"])
+        self.create_appointment("11:00")
+        self.assertNotIn("11:00", self.client.get(url, {"date": self.date.isoformat()}).json()["available_slots"])
+
+
+class AvailabilityCalendarTest(SlotTestBase):
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="testuser", password="testpass123")
+
+    def test_calendar_range(self):
+        """Test free slots and fullness for each day of the range"""
+        self.create_appointment("10:00")
+        end = self.date + datetime.timedelta(days=2)
+
+        response = self.client.get(
+            reverse("appointments:availability_calendar", args=[self.service.slug]),
+            {"start": self.date.isoformat(), "end": end.isoformat()},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        days = response.json()["days"]
+        self.assertEqual(len(days), 3)
+        self.assertEqual(days[0]["fullness"], round(1 / 24, 3))
+        self.assertNotIn("10:00", days[0]["available_slots"])
+        self.assertEqual(days[1]["fullness"], 0)
+
+    def test_calendar_is_cached_until_booking(self):
+        """Test that the cached calendar skips the slot index and a booking refreshes it"""
+        url = reverse("appointments:availability_calendar", args=[self.service.slug])
+        params = {"start": self.date.isoformat(), "end": self.date.isoformat()}
+        self.client.get(url, params)
+        # сессия, пользователь и сохранение сессии (3 запроса); индекс слотов не читается
+        with self.assertNumQueries(5):
+            self.client.get(url, params)
+
+        self.create_appointment("10:00")
+        self.assertNotIn("10:00", self.client.get(url, params).json()["days"][0]["available_slots"])
+
+    def test_booking_keeps_other_ranges_cached(self):
+        """Test that a booking only refreshes cached ranges containing its date"""
+        url = reverse("appointments:availability_calendar", args=[self.service.slug])
+        later = self.date + datetime.timedelta(days=1)
+        params = {"start": later.isoformat(), "end": (later + datetime.timedelta(days=6)).isoformat()}
+        self.client.get(url, params)
+
+        self.create_appointment("10:00")
+        with self.assertNumQueries(5):
+            self.client.get(url, params)
+
+        self.create_appointment("10:00", desired_date=later)
+        self.assertNotIn("10:00", self.client.get(url, params).json()["days"][0]["available_slots"])
+
+    def test_calendar_invalid_range(self):
+        """Test validation of the requested range"""
+        url = reverse("appointments:availability_calendar", args=[self.service.slug])
+        end = self.date - datetime.timedelta(days=1)
+
+        self.assertEqual(self.client.get(url, {"start": "bad"}).status_code, 400)
+        self.assertEqual(
+            self.client.get(url, {"start": self.date.isoformat(), "end": end.isoformat()}).status_code,
+            400,
+        )
+        self.assertEqual(
+            self.client.get(url, {"start": self.date.isoformat(), "end": "2999-01-01"}).status_code,
+            400,
+        )
+
+    def test_next_available_slot_skips_full_days(self):
+        """Test that the lookup skips fully booked days"""
+        SlotAvailability.objects.create(date=self.date, booked_mask=FULL_MASK)
+        SlotAvailability.objects.create(date=self.date + datetime.timedelta(days=1), booked_mask=slot_bit("08:00"))
+
+        response = self.client.get(
+            reverse("appointments:next_available_slot", args=[self.service.slug]), {"after": self.date.isoformat()}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"date": (self.date + datetime.timedelta(days=1)).isoformat(), "time": "08:30"},
+        )
@@ -58,3 +58,81 @@ class AppointmentsBasicTests(TestCase):
         """Тест форматированного времени"""
         appointment = Appointment.objects.create(**self.appointment_data)
         self.assertEqual(appointment.formatted_time, "10:00 - 10:30")
+
+    def test_appointment_list_query_count_is_constant(self):
+        """Тест постоянного числа запросов на странице списка записей"""
+        self.client.login(username="testuser", password="testpass123")
+        url = reverse("appointments:list")
+
+        def create_appointments(count, start_day):
+            for day in range(start_day, start_day + count):
+                Appointment.objects.create(
+                    **{**self.appointment_data, "desired_date": timezone.now().date() + datetime.timedelta(days=day)}
+                )
+
+        create_appointments(2, 1)
+        self.client.get(url)  # прогрев сессии и кэша статистики
+        # сессия, пользователь, страница записей и сохранение сессии (3 запроса); статистика из кэша
+        with self.assertNumQueries(6) as few:
+            response = self.client.get(url)
+        self.assertEqual(response.context["total_appointments"], 2)
+
+        create_appointments(25, 10)
+        # Новые записи сбрасывают кэш статистики пользователя
+        with self.assertNumQueries(len(few.captured_queries) + 1):
+            response = self.client.get(url)
+        self.assertEqual(response.context["total_appointments"], 27)
+        with self.assertNumQueries(len(few.captured_queries)):
+            response = self.client.get(url)
+        self.assertEqual(len(response.context["appointments"]), 10)
+
+    def test_appointment_list_keyset_pages(self):
+        """Тест постраничного вывода записей по курсору"""
+        self.client.login(username="testuser", password="testpass123")
+        url = reverse("appointments:list")
+        slots = [slot for slot, _label in Appointment.TIME_SLOTS]
+        for index in range(25):
+            Appointment.objects.create(
+                **{
+                    **self.appointment_data,
+                    "desired_date": timezone.now().date() + datetime.timedelta(days=index // 3 + 1),
+                    "desired_time": slots[index % 3],
+                }
+            )
+        expected = list(Appointment.objects.filter(user=self.user).order_by("-desired_date", "desired_time", "id"))
+
+        self.client.get(url)  # прогрев сессии и кэша статистики
+        with self.assertNumQueries(6) as first:
+            response = self.client.get(url)
+        pages = [list(response.context["appointments"])]
+        while response.context["page_obj"].has_next():
+            # Дальние страницы стоят столько же запросов, сколько первая
+            with self.assertNumQueries(len(first.captured_queries)):
+                response = self.client.get(url, {"cursor": response.context["page_obj"].next_cursor})
+            pages.append(list(response.context["appointments"]))
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([appointment for page in pages for appointment in page], expected)
+        self.assertEqual(response.context["page_obj"].total, 25)
+
+        response = self.client.get(url, {"cursor": response.context["page_obj"].previous_cursor})
+        self.assertEqual(list(response.context["appointments"]), pages[1])
+        self.assertTrue(response.context["page_obj"].has_previous())
+        self.assertTrue(response.context["page_obj"].has_next())
+
+    def test_appointment_list_upcoming_keyset_order(self):
+        """Тест порядка предстоящих записей по времени начала"""
+        self.client.login(username="testuser", password="testpass123")
+        for days in (3, 1, 2):
+            Appointment.objects.create(
+                **{**self.appointment_data, "desired_date": timezone.now().date() + datetime.timedelta(days=days)}
+            )
+        response = self.client.get(reverse("appointments:list"), {"period": "upcoming"})
+        dates = [appointment.desired_date for appointment in response.context["appointments"]]
+        self.assertEqual(dates, sorted(dates))
+
+    def test_appointment_list_invalid_cursor(self):
+        """Тест поврежденного курсора"""
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.get(reverse("appointments:list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
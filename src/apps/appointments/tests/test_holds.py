@@ -0,0 +1,144 @@
+import datetime
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.appointments.availability import SlotUnavailableError
+from apps.appointments.holds import _replace_hold, get_held_slots, hold_slot, is_held_by_other, release_hold
+from apps.appointments.models import Appointment
+from apps.services.models import Service, ServiceCategory
+
+User = get_user_model()
+
+
+class SlotHoldTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        self.other = User.objects.create_user(username="other", email="other@example.com", password="testpass123")
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        self.service = Service.objects.create(
+            category=self.category, name="УЗИ", description="Ультразвуковое исследование", price=2000.00
+        )
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_hold_blocks_other_users(self):
+        """Test that a held slot is unavailable for other users only"""
+        hold_slot(self.user.pk, self.date, "10:00")
+
+        self.assertEqual(get_held_slots(self.date, exclude_user_id=self.other.pk), {"10:00"})
+        self.assertEqual(get_held_slots(self.date, exclude_user_id=self.user.pk), set())
+        with self.assertRaises(SlotUnavailableError):
+            hold_slot(self.other.pk, self.date, "10:00")
+
+    def test_new_hold_replaces_previous(self):
+        """Test that a user holds at most one slot"""
+        hold_slot(self.user.pk, self.date, "10:00")
+        hold_slot(self.user.pk, self.date, "11:00")
+
+        self.assertEqual(get_held_slots(self.date), {"11:00"})
+
+    def test_expired_hold_is_ignored(self):
+        """Test that expired holds do not block the slot"""
+        cache.set(f"slot-hold:{self.date.isoformat()}:10:00", {"user_id": self.user.pk, "expires_at": time.time() - 1})
+
+        self.assertEqual(get_held_slots(self.date), set())
+        self.assertFalse(is_held_by_other(self.date, "10:00", self.other.pk))
+        hold_slot(self.other.pk, self.date, "10:00")
+
+    def test_expired_hold_is_replaced_once(self):
+        """Test that of two users who read the same expired hold only one takes the slot"""
+        key = f"slot-hold:{self.date.isoformat()}:10:00"
+        expired = {"user_id": self.user.pk, "expires_at": time.time() - 1}
+        cache.set(key, expired)
+
+        first = {"user_id": self.other.pk, "expires_at": time.time() + 600}
+        second = {"user_id": self.user.pk, "expires_at": time.time() + 600}
+        self.assertTrue(_replace_hold(key, expired, first, 600))
+        self.assertFalse(_replace_hold(key, expired, second, 600))
+        self.assertEqual(cache.get(key), first)
+
+    def test_own_hold_is_extended(self):
+        """Test that holding the same slot again extends the hold"""
+        first = hold_slot(self.user.pk, self.date, "10:00")
+        self.assertGreaterEqual(hold_slot(self.user.pk, self.date, "10:00"), first)
+        self.assertEqual(get_held_slots(self.date), {"10:00"})
+
+    def test_release_hold(self):
+        """Test releasing the current hold"""
+        hold_slot(self.user.pk, self.date, "10:00")
+        release_hold(self.user.pk)
+        self.assertEqual(get_held_slots(self.date), set())
+
+    def test_available_slots_view_hides_held_slots(self):
+        """Test that the availability API hides slots held by other users"""
+        hold_slot(self.other.pk, self.date, "10:00")
+        self.client.login(username="testuser", password="testpass123")
+
+        response = self.client.get(
+            reverse("appointments:available_slots", args=[self.service.slug]), {"date": self.date.isoformat()}
+        )
+
+        self.assertNotIn("10:00", response.json()["available_slots"])
+
+    def test_hold_view(self):
+        """Test the hold API"""
+        self.client.login(username="testuser", password="testpass123")
+        url = reverse("appointments:hold_slot", args=[self.service.slug])
+
+        response = self.client.post(url, {"date": self.date.isoformat(), "time": "10:00"})
+        self.assertEqual(response.status_code, 201)
+
+        other_client = self.client_class()
+        other_client.login(username="other", password="testpass123")
+        response = other_client.post(url, {"date": self.date.isoformat(), "time": "10:00"})
+        self.assertEqual(response.status_code, 409)
+
+        self.assertEqual(other_client.post(url, {"date": self.date.isoformat()}).status_code, 400)
+        self.assertEqual(other_client.post(url, {"date": self.date.isoformat(), "time": "10:05"}).status_code, 400)
+
+    def test_form_submission_converts_hold(self):
+        """Test that booking a held slot creates the appointment and releases the hold"""
+        hold_slot(self.user.pk, self.date, "10:00")
+        self.client.login(username="testuser", password="testpass123")
+
+        response = self.client.post(
+            reverse("appointments:create", args=[self.service.slug]),
+            {
+                "desired_date": self.date.isoformat(),
+                "desired_time": "10:00",
+                "patient_name": "John Doe",
+                "patient_phone": "+1234567890",
+                "patient_email": "john@example.com",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertEqual(get_held_slots(self.date), set())
+
+    def test_form_rejects_slot_held_by_other(self):
+        """Test that a slot held by another user cannot be booked"""
+        hold_slot(self.other.pk, self.date, "10:00")
+        self.client.login(username="testuser", password="testpass123")
+
+        response = self.client.post(
+            reverse("appointments:create", args=[self.service.slug]),
+            {
+                "desired_date": self.date.isoformat(),
+                "desired_time": "10:00",
+                "patient_name": "John Doe",
+                "patient_phone": "+1234567890",
+                "patient_email": "john@example.com",
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Appointment.objects.exists())
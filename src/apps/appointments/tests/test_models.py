@@ -159,6 +159,33 @@ class AppointmentModelTest(TestCase):
             appointment.status = status
             self.assertEqual(appointment.get_status_color(), expected_color)
 
+    def test_appointment_starts_at(self):
+        """Test that starts_at/ends_at follow desired_date and desired_time"""
+        appointment = Appointment.objects.create(**self.appointment_data)
+        expected = timezone.make_aware(datetime.datetime.combine(self.tomorrow, datetime.time(10, 0)))
+        self.assertEqual(appointment.starts_at, expected)
+        self.assertEqual(appointment.ends_at, expected + datetime.timedelta(minutes=30))
+
+        appointment.desired_time = "11:30"
+        appointment.save(update_fields=["desired_time"])
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.starts_at, expected + datetime.timedelta(hours=1, minutes=30))
+
+    def test_appointment_queryset_ranges(self):
+        """Test upcoming/past/starting_between range lookups"""
+        upcoming = Appointment.objects.create(**self.appointment_data)
+        past = Appointment.objects.create(
+            **{**self.appointment_data, "desired_date": timezone.now().date() - datetime.timedelta(days=1)}
+        )
+        Appointment.objects.create(**{**self.appointment_data, "desired_time": "11:00", "status": "cancelled"})
+
+        self.assertEqual(list(Appointment.objects.upcoming()), [upcoming])
+        self.assertEqual(list(Appointment.objects.past()), [past])
+        self.assertEqual(
+            list(Appointment.objects.starting_between(upcoming.starts_at, upcoming.ends_at)),
+            [upcoming],
+        )
+
     def test_appointment_unique_constraint(self):
         """Test that unique constraint works for date and time"""
         # Create first appointment
@@ -176,6 +203,16 @@ class AppointmentModelTest(TestCase):
                 patient_email="jane@example.com",
             )
 
+    def test_cancelled_appointment_does_not_block_slot(self):
+        """Test that the unique constraint only covers active appointments"""
+        Appointment.objects.create(**self.appointment_data, status="cancelled")
+        Appointment.objects.create(**self.appointment_data, status="no_show")
+
+        appointment = Appointment.objects.create(**self.appointment_data)
+
+        self.assertEqual(appointment.status, "pending")
+        self.assertEqual(Appointment.objects.filter(desired_date=self.tomorrow, desired_time="10:00").count(), 3)
+
     def test_appointment_can_have_same_time_different_dates(self):
         """Test that same time is allowed on different dates"""
         # Create appointment for tomorrow
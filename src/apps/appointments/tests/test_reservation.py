@@ -0,0 +1,154 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.appointments.availability import SlotUnavailableError, get_booked_mask, reserve_slot, slot_bit
+from apps.appointments.models import Appointment
+from apps.services.models import Service, ServiceCategory
+
+User = get_user_model()
+
+
+def booking_data(date, time="10:00"):
+    return {
+        "desired_date": date.isoformat(),
+        "desired_time": time,
+        "patient_name": "John Doe",
+        "patient_phone": "+1234567890",
+        "patient_email": "john@example.com",
+        "patient_age": 30,
+    }
+
+
+class ReserveSlotTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", email="test@example.com", password="testpass123")
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        self.service = Service.objects.create(
+            category=self.category, name="УЗИ", description="Ультразвуковое исследование", price=2000.00
+        )
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def make_appointment(self, time="10:00"):
+        return Appointment(
+            user=self.user,
+            service=self.service,
+            desired_date=self.date,
+            desired_time=time,
+            patient_name="John Doe",
+            patient_phone="+1234567890",
+            patient_email="john@example.com",
+        )
+
+    def test_reserve_free_slot(self):
+        """Test that a free slot is reserved and indexed"""
+        appointment = reserve_slot(self.make_appointment())
+        self.assertIsNotNone(appointment.pk)
+        self.assertEqual(get_booked_mask(self.date), slot_bit("10:00"))
+
+    def test_reserve_taken_slot(self):
+        """Test that a taken slot raises SlotUnavailableError"""
+        reserve_slot(self.make_appointment())
+        with self.assertRaises(SlotUnavailableError):
+            reserve_slot(self.make_appointment())
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_create_view_reports_taken_slot(self):
+        """Test that the create view shows a form error instead of failing"""
+        reserve_slot(self.make_appointment())
+        self.client.login(username="testuser", password="testpass123")
+
+        response = self.client.post(reverse("appointments:create", args=[self.service.slug]), booking_data(self.date, "10:00"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["form"].errors)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+
+def allow_concurrent_reads(sender, connection, **kwargs):
+    # The in-memory test database is shared between threads through SQLite shared cache, where
+    # a reader hits "database table is locked" while another connection writes the table, and
+    # the busy timeout does not apply. read_uncommitted lets readers skip these table locks, so
+    # session and user lookups of the requests do not fail. Readers may then see uncommitted
+    # rows. Writers are unaffected: the shared cache allows one write transaction at a time,
+    # so lock_booking_day still serializes bookings.
+    if connection.vendor == "sqlite":
+        connection.cursor().execute("PRAGMA read_uncommitted = 1")
+
+
+@override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+class ConcurrentReservationTest(TransactionTestCase):
+    threads = 30
+
+    def setUp(self):
+        category = ServiceCategory.objects.create(name="Диагностика")
+        self.service = Service.objects.create(
+            category=category, name="УЗИ", description="Ультразвуковое исследование", price=2000.00
+        )
+        self.users = [
+            User.objects.create_user(username=f"user{i}", email=f"user{i}@example.com", password="testpass123")
+            for i in range(self.threads)
+        ]
+        self.date = timezone.now().date() + datetime.timedelta(days=1)
+
+    def test_concurrent_booking_of_same_slot(self):
+        """Test that concurrent bookings of one slot give exactly one success and no server errors"""
+        url = reverse("appointments:create", args=[self.service.slug])
+        data = booking_data(self.date)
+        barrier = threading.Barrier(self.threads)
+        # Every request passes form validation before any of them books, so all of them race in reserve_slot
+        reservation_barrier = threading.Barrier(self.threads, timeout=30)
+        results = []
+        errors = []
+        reservations = []
+
+        def record_reservation(appointment):
+            reservation_barrier.wait()
+            try:
+                reserve_slot(appointment)
+            except SlotUnavailableError:
+                # The slot is taken, or the write lock was not obtained within the retries
+                reservations.append("refused")
+                raise
+            reservations.append("reserved")
+
+        clients = []
+        for user in self.users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+
+        def book(client):
+            try:
+                barrier.wait()
+                results.append(client.post(url, data).status_code)
+            except Exception as error:  # noqa: BLE001
+                errors.append(error)
+            finally:
+                connection.close()
+
+        connection_created.connect(allow_concurrent_reads)
+        try:
+            with mock.patch("apps.appointments.forms.reserve_slot", record_reservation):
+                workers = [threading.Thread(target=book, args=(client,)) for client in clients]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+        finally:
+            connection_created.disconnect(allow_concurrent_reads)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results.count(302), 1)
+        self.assertEqual(results.count(200), self.threads - 1)
+        self.assertEqual(reservations.count("reserved"), 1)
+        self.assertEqual(reservations.count("refused"), self.threads - 1)
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertEqual(get_booked_mask(self.date), slot_bit("10:00"))
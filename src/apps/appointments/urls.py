@@ -18,4 +18,19 @@ urlpatterns = [
         views.AvailableTimeSlotsView.as_view(),
         name="available_slots",
     ),
+    path(
+        "api/availability/<slug:service_slug>/",
+        views.AvailabilityCalendarView.as_view(),
+        name="availability_calendar",
+    ),
+    path(
+        "api/next-slot/<slug:service_slug>/",
+        views.NextAvailableSlotView.as_view(),
+        name="next_available_slot",
+    ),
+    path(
+        "api/hold/<slug:service_slug>/",
+        views.SlotHoldView.as_view(),
+        name="hold_slot",
+    ),
 ]
@@ -3,18 +3,52 @@ Appointments views module.
 """
 import datetime
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import CreateView, DetailView, ListView, View
 
-from apps.services.models import Service
-
+from apps.common.pagination import KeysetPaginationMixin
+from apps.common.single_flight import get_or_compute_coalesced
+from apps.services.catalog import get_service_or_404
+
+from .availability import (
+    FULL_MASK,
+    SLOT_TIMES,
+    SlotUnavailableError,
+    find_next_free_slot,
+    free_slots,
+    get_cached_masks,
+    get_shared_booked_mask,
+    slot_tags,
+)
 from .forms import AppointmentCancelForm, AppointmentForm
+from .holds import get_held_slots, hold_slot, release_hold
 from .models import Appointment
+from .statistics import get_appointment_statistics
+
+
+def get_booking_window():
+    """Get the first and the last bookable dates."""
+    appointment_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("APPOINTMENT_SETTINGS", {})
+    today = timezone.now().date()
+    return (
+        today + datetime.timedelta(days=appointment_settings.get("MIN_DAYS_AHEAD", 1)),
+        today + datetime.timedelta(days=appointment_settings.get("MAX_DAYS_AHEAD", 90)),
+    )
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD query parameter, returns None for invalid input."""
+    try:
+        return datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None
 
 
 class AppointmentCreateView(LoginRequiredMixin, CreateView):
@@ -29,7 +63,7 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
         initial = super().get_initial()
         service_slug = self.kwargs.get("service_slug")
         if service_slug:
-            service = get_object_or_404(Service, slug=service_slug, is_active=True)
+            service = get_service_or_404(service_slug)
             initial["service"] = service
         return initial
 
@@ -39,13 +73,17 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
         kwargs["user"] = self.request.user
         service_slug = self.kwargs.get("service_slug")
         if service_slug:
-            service = get_object_or_404(Service, slug=service_slug, is_active=True)
+            service = get_service_or_404(service_slug)
             kwargs["service"] = service
         return kwargs
 
     def form_valid(self, form):
         """Handle valid form submission."""
-        response = super().form_valid(form)
+        try:
+            response = super().form_valid(form)
+        except SlotUnavailableError as error:
+            form.add_error("desired_time", error.message)
+            return self.form_invalid(form)
         messages.success(
             self.request,
             _("Запись успешно создана! Мы свяжемся с вами для подтверждения."),
@@ -57,7 +95,7 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
         context = super().get_context_data(**kwargs)
         service_slug = self.kwargs.get("service_slug")
         if service_slug:
-            service = get_object_or_404(Service, slug=service_slug, is_active=True)
+            service = get_service_or_404(service_slug)
             context["service"] = service
             context["page_title"] = f"Запись на {service.name}"
         return context
@@ -67,7 +105,7 @@ class AppointmentCreateView(LoginRequiredMixin, CreateView):
         return reverse_lazy("appointments:list")  # Правильно - с namespace
 
 
-class AppointmentListView(LoginRequiredMixin, ListView):
+class AppointmentListView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """View for listing user appointments."""
 
     model = Appointment
@@ -75,9 +113,38 @@ class AppointmentListView(LoginRequiredMixin, ListView):
     context_object_name = "appointments"
     paginate_by = 10
 
+    PERIODS = ("upcoming", "past")
+
+    def get_period(self):
+        """Get the selected period filter."""
+        period = self.request.GET.get("period")
+        return period if period in self.PERIODS else None
+
     def get_queryset(self):
         """Get queryset for appointments."""
-        return Appointment.objects.filter(user=self.request.user).select_related("service")
+        queryset = Appointment.objects.filter(user=self.request.user).select_related("service", "service__category")
+        period = self.get_period()
+        if period == "upcoming":
+            queryset = queryset.upcoming()
+        elif period == "past":
+            queryset = queryset.past()
+        return queryset
+
+    def get_keyset_ordering(self):
+        """Get a unique ordering key covered by the user's appointment indexes."""
+        if self.get_period() == "upcoming":
+            return ["starts_at", "id"]
+        return ["-desired_date", "desired_time", "id"]
+
+    def get_statistics(self):
+        """Get cached appointment statistics of the user."""
+        if not hasattr(self, "_statistics"):
+            self._statistics = get_appointment_statistics(self.request.user)
+        return self._statistics
+
+    def get_total(self, queryset):
+        """Get the total from statistics instead of a separate COUNT."""
+        return self.get_statistics()[self.get_period() or "total"]
 
     def get_context_data(self, **kwargs):
         """Get context data for template."""
@@ -85,14 +152,11 @@ class AppointmentListView(LoginRequiredMixin, ListView):
         context["page_title"] = _("Мои записи на прием")
 
         # Statistics
-        appointments = self.get_queryset()
-        context["total_appointments"] = appointments.count()
-        context["upcoming_appointments"] = appointments.filter(
-            status__in=["pending", "confirmed"],
-        ).count()
-        context["completed_appointments"] = appointments.filter(
-            status="completed",
-        ).count()
+        statistics = self.get_statistics()
+        context["total_appointments"] = statistics["total"]
+        context["upcoming_appointments"] = statistics["upcoming"]
+        context["completed_appointments"] = statistics["completed"]
+        context["period"] = self.get_period()
 
         return context
 
@@ -156,16 +220,103 @@ class AvailableTimeSlotsView(LoginRequiredMixin, View):
         except ValueError:
             return JsonResponse({"error": "Invalid date format"}, status=400)
 
-        # Get booked time slots
-        booked_slots = Appointment.objects.filter(
-            desired_date=selected_date,
-            status__in=["pending", "confirmed"],
-        ).values_list("desired_time", flat=True)
+        # Booked slots come from the per-day bitmap index, concurrent requests for a date share one read
+        booked_mask = get_shared_booked_mask(selected_date)
+        held_slots = get_held_slots(selected_date, exclude_user_id=request.user.pk)
+        available_slots = [slot for slot in free_slots(booked_mask) if slot not in held_slots]
 
-        # All possible slots
-        all_slots = [slot[0] for slot in Appointment.TIME_SLOTS]
+        return JsonResponse({"date": date, "available_slots": available_slots})
 
-        # Available slots
-        available_slots = [slot for slot in all_slots if slot not in booked_slots]
 
-        return JsonResponse({"date": date, "available_slots": available_slots})
+class AvailabilityCalendarView(LoginRequiredMixin, View):
+    """API view for free slots over a date range."""
+
+    def get(self, request, service_slug):
+        """Handle GET request for a calendar of available slots."""
+        first_date, last_date = get_booking_window()
+        start = parse_date(request.GET.get("start")) if "start" in request.GET else first_date
+        end = parse_date(request.GET.get("end")) if "end" in request.GET else last_date
+        if not start or not end:
+            return JsonResponse({"error": "Invalid date format"}, status=400)
+        if start > end:
+            return JsonResponse({"error": "Start date must not be after end date"}, status=400)
+        if (end - start).days > (last_date - first_date).days:
+            return JsonResponse({"error": "Date range is too long"}, status=400)
+
+        # One cached query over the slot index for the whole range
+        masks = get_cached_masks(start, end)
+
+        days = []
+        date = start
+        while date <= end:
+            booked_mask = masks.get(date, 0)
+            days.append(
+                {
+                    "date": date.isoformat(),
+                    "available_slots": list(free_slots(booked_mask)),
+                    "fullness": round(bin(booked_mask & FULL_MASK).count("1") / len(SLOT_TIMES), 3),
+                }
+            )
+            date += datetime.timedelta(days=1)
+
+        return JsonResponse({"start": start.isoformat(), "end": end.isoformat(), "days": days})
+
+
+class NextAvailableSlotView(LoginRequiredMixin, View):
+    """API view for the nearest free slot."""
+
+    def get(self, request, service_slug):
+        """Handle GET request for the next available slot."""
+        first_date, last_date = get_booking_window()
+        start = parse_date(request.GET.get("after")) if "after" in request.GET else first_date
+        if not start:
+            return JsonResponse({"error": "Invalid date format"}, status=400)
+
+        start = max(start, first_date)
+        slot = get_or_compute_coalesced(
+            f"appointments:next-slot:{start.isoformat()}:{last_date.isoformat()}",
+            lambda: find_next_free_slot(start, last_date),
+            tags=slot_tags(start, last_date),
+        )
+        if slot is None:
+            return JsonResponse({"error": "No available slots"}, status=404)
+
+        date, time = slot
+        return JsonResponse({"date": date.isoformat(), "time": time})
+
+
+class SlotHoldView(LoginRequiredMixin, View):
+    """API view for temporary slot holds while the booking form is filled in."""
+
+    def post(self, request, service_slug):
+        """Hold a slot for the current user."""
+        selected_date = parse_date(request.POST.get("date"))
+        if not selected_date:
+            return JsonResponse({"error": "Invalid date format"}, status=400)
+
+        first_date, last_date = get_booking_window()
+        if not first_date <= selected_date <= last_date:
+            return JsonResponse({"error": "Date is out of the booking window"}, status=400)
+
+        time_slot = request.POST.get("time")
+        if time_slot not in SLOT_TIMES:
+            return JsonResponse({"error": "Invalid time slot"}, status=400)
+
+        try:
+            expires_at = hold_slot(request.user.pk, selected_date, time_slot)
+        except SlotUnavailableError as error:
+            return JsonResponse({"error": str(error.message)}, status=409)
+
+        return JsonResponse(
+            {
+                "date": selected_date.isoformat(),
+                "time": time_slot,
+                "expires_at": datetime.datetime.fromtimestamp(expires_at, tz=datetime.timezone.utc).isoformat(),
+            },
+            status=201,
+        )
+
+    def delete(self, request, service_slug):
+        """Release the current user's hold."""
+        release_hold(request.user.pk)
+        return HttpResponse(status=204)
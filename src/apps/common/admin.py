@@ -1,3 +1,5 @@
+import datetime
+
 from django.contrib import admin
 from django.urls import reverse
 from django.utils import timezone
@@ -16,19 +18,31 @@ def custom_admin_index(request):
     from django.contrib.admin import AdminSite
 
     from apps.appointments.models import Appointment
+    from apps.common.admin_views import DEFAULT_ADMIN_STATS_TIMEOUT
+    from apps.common.cache_compute import get_cache_setting, get_or_compute
     from apps.services.models import Service, ServiceCategory
     from apps.users.models import User
 
-    # Статистика для главной страницы админки
-    stats = {
-        "total_users": User.objects.count(),
-        "total_services": Service.objects.count(),
-        "total_categories": ServiceCategory.objects.count(),
-        "total_appointments": Appointment.objects.count(),
-        "pending_appointments": Appointment.objects.filter(status="pending").count(),
-        "today_appointments": Appointment.objects.filter(desired_date=timezone.now().date()).count(),
-        "new_users_today": User.objects.filter(date_joined__date=timezone.now().date()).count(),
-    }
+    def compute_stats():
+        today_start = timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time.min))
+        tomorrow_start = today_start + datetime.timedelta(days=1)
+        return {
+            "total_users": User.objects.count(),
+            "total_services": Service.objects.count(),
+            "total_categories": ServiceCategory.objects.count(),
+            "total_appointments": Appointment.objects.count(),
+            "pending_appointments": Appointment.objects.filter(status="pending").count(),
+            "today_appointments": Appointment.objects.filter(desired_date=timezone.now().date()).count(),
+            # Диапазон вместо date_joined__date: сравнение с границами суток использует индекс по date_joined
+            "new_users_today": User.objects.filter(date_joined__gte=today_start, date_joined__lt=tomorrow_start).count(),
+        }
+
+    # Статистика для главной страницы админки; дата в ключе - счетчики "за сегодня" не переходят на новые сутки
+    stats = get_or_compute(
+        f"admin:index-stats:{timezone.localdate().isoformat()}",
+        compute_stats,
+        get_cache_setting("ADMIN_STATS_TIMEOUT", DEFAULT_ADMIN_STATS_TIMEOUT),
+    )
 
     # Быстрые ссылки
     quick_links = [
@@ -0,0 +1,323 @@
+"""
+Двухуровневый кэш: ограниченный LRU в памяти воркера перед общим кэшем (Redis).
+
+Чтение сначала идет в локальный LRU (L1) и только при промахе - в общий кэш (L2),
+поэтому повторные обращения к версиям тегов, снимку каталога и фрагментам не стоят
+сетевого запроса. Запись и удаление выполняются в L2, а ключи рассылаются через
+Redis pub/sub: каждый воркер на каждом узле удаляет их из своего L1. Локальное время
+жизни (LOCAL_TIMEOUT) ограничивает устаревание, если сообщение потеряно; после
+переподключения подписки L1 очищается целиком.
+
+Настройка:
+
+    CACHES = {
+        "default": {
+            "BACKEND": "apps.common.cache_backends.TwoTierCache",
+            "LOCATION": "default",
+            "OPTIONS": {"SHARED_CACHE": "shared", "MAX_ENTRIES": 1000, "LOCAL_TIMEOUT": 30},
+        },
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://..."},
+    }
+
+Если общий кэш не Redis (например, locmem в разработке и тестах), инвалидация
+рассылается только внутри процесса.
+"""
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_TIMEOUT = 30
+DEFAULT_CHANNEL = "cache-invalidation"
+RECONNECT_DELAY = 1
+
+# Сообщение "очистить L1 целиком"
+CLEAR_ALL = "*"
+
+# Состояние L1 общее для всех потоков процесса (экземпляры backend создаются на поток)
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class LocalLRU:
+    """Ограниченный LRU с локальным временем жизни записей и статистикой"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Растет при каждой инвалидации; значение из L2, прочитанное до инвалидации, в L1 не попадает
+        self.generation = 0
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, key):
+        """(True, значение) или (False, None)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return False, None
+            self.entries.move_to_end(key)
+            self.stats["local_hits"] += 1
+        return True, pickle.loads(data)
+
+    def set(self, key, value, generation):
+        """Сохраняет значение, если с момента generation не было инвалидаций"""
+        if self.max_entries <= 0 or self.timeout <= 0:
+            return
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.entries[key] = (time.monotonic() + self.timeout, data)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def drop(self, keys):
+        with self.lock:
+            self.generation += 1
+            self.stats["invalidations"] += 1
+            if keys == CLEAR_ALL:
+                self.entries.clear()
+                return
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats, entries=len(self.entries), max_entries=self.max_entries)
+        lookups = stats["local_hits"] + stats["shared_hits"] + stats["misses"]
+        stats["local_hit_rate"] = stats["local_hits"] / lookups if lookups else 0.0
+        stats["hit_rate"] = (stats["local_hits"] + stats["shared_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+class LocalInvalidationChannel:
+    """Рассылка инвалидации внутри процесса: L1 общий для всех потоков, достаточно его очистить"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def publish(self, keys):
+        self.store.drop(keys)
+
+
+class RedisInvalidationChannel:
+    """
+    Рассылка инвалидации через Redis pub/sub. Подписчик - фоновый поток, который
+    запускается при первом обращении в каждом процессе (после fork gunicorn потоки не наследуются).
+    """
+
+    def __init__(self, store, client, channel):
+        self.store = store
+        self.client = client
+        self.channel = channel
+        # Отправитель сообщений; собственные сообщения процесс уже применил
+        self.sender = uuid.uuid4().hex
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def publish(self, keys):
+        self.store.drop(keys)
+        message = json.dumps({"sender": self.sender, "keys": keys})
+        try:
+            self.client.publish(self.channel, message)
+        except Exception:
+            # Другие воркеры получат значение не позже LOCAL_TIMEOUT
+            logger.warning("Не удалось разослать инвалидацию кэша", exc_info=True)
+
+    def ensure_listening(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                # Воркеры, созданные fork, унаследовали отправителя и не должны игнорировать сообщения друг друга
+                self.sender = uuid.uuid4().hex
+                self.pid = os.getpid()
+                thread = threading.Thread(target=self.listen, name="cache-invalidation", daemon=True)
+                thread.start()
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Пока подписки не было, сообщения могли потеряться
+                self.store.drop(CLEAR_ALL)
+                for message in pubsub.listen():
+                    self.handle(message["data"])
+            except Exception:
+                logger.warning("Подписка на инвалидацию кэша прервана", exc_info=True)
+                time.sleep(RECONNECT_DELAY)
+
+    def handle(self, data):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("sender") != self.sender:
+            keys = message.get("keys")
+            self.store.drop(keys if keys == CLEAR_ALL else list(keys or ()))
+
+
+def get_redis_client(alias):
+    """
+    Клиент Redis для pub/sub по LOCATION общего кэша. Клиент собственный: пул соединений
+    RedisCache доступен только через закрытый API Django (RedisCache._cache.get_client).
+    """
+    import redis
+
+    location = settings.CACHES[alias]["LOCATION"]
+    servers = location.split(",") if isinstance(location, str) else location
+    # Первый сервер основной: в него RedisCache пишет, там и публикуется инвалидация
+    return redis.Redis.from_url(servers[0])
+
+
+class TwoTierCache(BaseCache):
+    """Кэш Django: локальный LRU (L1) перед общим кэшем SHARED_CACHE (L2)"""
+
+    _missing = object()
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.name = location or "default"
+        self.shared_alias = options.get("SHARED_CACHE", "shared")
+        self.local_timeout = float(options.get("LOCAL_TIMEOUT", DEFAULT_LOCAL_TIMEOUT))
+        self.channel_name = options.get("CHANNEL", DEFAULT_CHANNEL)
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    @property
+    def store(self):
+        return self._get_state()[0]
+
+    @property
+    def channel(self):
+        return self._get_state()[1]
+
+    def _get_state(self):
+        state = _stores.get(self.name)
+        if state is None:
+            with _stores_lock:
+                state = _stores.get(self.name)
+                if state is None:
+                    store = LocalLRU(self._max_entries, self.local_timeout)
+                    if isinstance(self.shared, RedisCache):
+                        client = get_redis_client(self.shared_alias)
+                        channel = RedisInvalidationChannel(store, client, self.channel_name)
+                    else:
+                        channel = LocalInvalidationChannel(store)
+                    state = _stores[self.name] = (store, channel)
+        if isinstance(state[1], RedisInvalidationChannel):
+            state[1].ensure_listening()
+        return state
+
+    def local_key(self, key, version=None):
+        """Полный ключ L2: по нему L1 хранит значения и рассылается инвалидация"""
+        return self.shared.make_and_validate_key(key, version=version)
+
+    def get(self, key, default=None, version=None):
+        store = self.store
+        local_key = self.local_key(key, version)
+        found, value = store.get(local_key)
+        if found:
+            return value
+        generation = store.generation
+        value = self.shared.get(key, self._missing, version=version)
+        if value is self._missing:
+            store.count("misses")
+            return default
+        store.count("shared_hits")
+        store.set(local_key, value, generation)
+        return value
+
+    def get_many(self, keys, version=None):
+        store = self.store
+        result, remote = {}, {}
+        for key in keys:
+            local_key = self.local_key(key, version)
+            found, value = store.get(local_key)
+            if found:
+                result[key] = value
+            else:
+                remote[key] = local_key
+        if remote:
+            generation = store.generation
+            fetched = self.shared.get_many(list(remote), version=version)
+            store.count("shared_hits", len(fetched))
+            store.count("misses", len(remote) - len(fetched))
+            for key, value in fetched.items():
+                store.set(remote[key], value, generation)
+            result.update(fetched)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self.channel.publish([self.local_key(key, version)])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        self.channel.publish([self.local_key(key, version) for key in data])
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self.channel.publish([self.local_key(key, version)])
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        self.channel.publish([self.local_key(key, version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self.channel.publish([self.local_key(key, version) for key in keys])
+
+    def has_key(self, key, version=None):
+        return self.get(key, self._missing, version=version) is not self._missing
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self.channel.publish([self.local_key(key, version)])
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self.channel.publish(CLEAR_ALL)
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def get_stats(self):
+        """Попадания в L1 и L2, промахи, инвалидации и вытеснения L1 этого процесса"""
+        return self.store.get_stats()
@@ -0,0 +1,115 @@
+"""
+Кэширование дорогих агрегатов с защитой от лавины пересчетов (cache stampede).
+
+Когда запись истекает, все воркеры, промахнувшиеся одновременно, начинают считать
+одно и то же. get_or_compute этого не допускает:
+
+- вероятностное раннее истечение (XFetch): незадолго до срока запись с вероятностью,
+  растущей с приближением срока и временем вычисления, считается устаревшей - обычно
+  ее обновляет один запрос заранее, и истечения под нагрузкой не происходит;
+- короткая распределенная блокировка через cache.add: пересчитывает только получивший
+  ее воркер, остальные отдают прежнее значение, которое хранится дольше логического срока;
+- если значения нет совсем, воркеры без блокировки ждут результата не дольше
+  RECOMPUTE_MAX_WAIT (около секунды), а затем считают сами.
+
+Теги работают как в cache_tags: после инвалидации тега прежнее значение не отдается.
+"""
+import math
+import random
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_tags import MISSING, fetch_tagged, store_tagged
+
+DEFAULT_RECOMPUTE_LOCK_TIMEOUT = 10
+# Дольше ждать чужого вычисления нельзя: воркер занят, пока ждет
+DEFAULT_RECOMPUTE_MAX_WAIT = 1
+DEFAULT_BETA = 1.0
+
+# Устаревшее значение хранится еще STALE_FACTOR логических сроков
+STALE_FACTOR = 2
+WAIT_INTERVAL = 0.05
+
+
+def get_cache_setting(name, default):
+    """Параметр из MEDICAL_CENTER_SETTINGS["CACHE_SETTINGS"]"""
+    cache_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("CACHE_SETTINGS", {})
+    return cache_settings.get(name, default)
+
+
+def _lock_key(key):
+    return f"{key}:recompute-lock"
+
+
+def is_expired(entry, beta=DEFAULT_BETA, now=None):
+    """
+    Истекла ли запись с учетом раннего истечения: срок сдвигается на случайную величину,
+    пропорциональную времени вычисления delta (beta > 1 - обновлять раньше).
+    """
+    now = time.time() if now is None else now
+    return now - entry["delta"] * beta * math.log(1.0 - random.random()) >= entry["expires_at"]
+
+
+def _acquire(lock_key, lock_timeout):
+    """Токен блокировки или None, если ее держит другой воркер"""
+    token = uuid.uuid4().hex
+    return token if cache.add(lock_key, token, lock_timeout) else None
+
+
+def _release(lock_key, token):
+    # Вычисление могло пережить lock_timeout, и блокировку уже взял другой воркер - ее не трогаем.
+    # Между get и delete остается узкое окно: в кэше Django нет атомарного "удалить, если равно".
+    if token and cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _recompute(key, compute, timeout, versions, lock_key=None, token=None):
+    started = time.monotonic()
+    try:
+        value = compute()
+        entry = {"value": value, "delta": time.monotonic() - started, "expires_at": time.time() + timeout}
+        store_tagged(key, entry, versions, timeout * (1 + STALE_FACTOR))
+    finally:
+        _release(lock_key, token)
+    return value
+
+
+def get_or_compute(key, compute, timeout, tags=(), beta=DEFAULT_BETA, lock_timeout=None):
+    """
+    Значение из кэша или результат compute(), который вычисляет один воркер.
+    timeout - логический срок жизни значения в секундах.
+    """
+    if lock_timeout is None:
+        lock_timeout = get_cache_setting("RECOMPUTE_LOCK_TIMEOUT", DEFAULT_RECOMPUTE_LOCK_TIMEOUT)
+    lock_key = _lock_key(key)
+
+    entry, versions = fetch_tagged(key, tags)
+    if entry is not MISSING:
+        if not is_expired(entry, beta):
+            return entry["value"]
+        token = _acquire(lock_key, lock_timeout)
+        if token is None:
+            # Значение уже пересчитывает другой воркер
+            return entry["value"]
+        return _recompute(key, compute, timeout, versions, lock_key, token)
+
+    token = _acquire(lock_key, lock_timeout)
+    if token is not None:
+        return _recompute(key, compute, timeout, versions, lock_key, token)
+
+    max_wait = min(lock_timeout, get_cache_setting("RECOMPUTE_MAX_WAIT", DEFAULT_RECOMPUTE_MAX_WAIT))
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry, versions = fetch_tagged(key, tags)
+        if entry is not MISSING:
+            return entry["value"]
+        token = _acquire(lock_key, lock_timeout)
+        if token is not None:
+            # Блокировка освобождена, а действительного значения нет (теги сменились во время вычисления)
+            return _recompute(key, compute, timeout, versions, lock_key, token)
+    # Владелец блокировки считает слишком долго (или упал) - вычисляем сами, не занимая воркер дальше
+    return _recompute(key, compute, timeout, versions)
@@ -0,0 +1,100 @@
+"""
+Инвалидация кэша по тегам.
+
+Запись кэша помечается тегами ("catalog", "category:3", "user:7:appointments").
+У каждого тега в общем кэше хранится версия - случайная строка. Вместе со значением
+запоминаются версии его тегов на момент вычисления; запись действительна, пока версии
+совпадают. Инвалидация тега - это смена его версии: удалять ключи записей не нужно,
+устаревшие записи просто перестают читаться и вытесняются по сроку жизни.
+
+Значение и версии всех его тегов читаются одним get_many. Версии меняются сигналами
+моделей и повторно после фиксации транзакции, чтобы запись, вычисленная параллельно
+по незафиксированным данным, не осталась действительной.
+
+Версии хранятся TAG_VERSION_TIMEOUT секунд (дольше любой записи с тегами): истекшая
+версия создается заново, и записи со старой версией просто перестают читаться.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+TAG_KEY_PREFIX = "cache-tag:"
+DEFAULT_TAG_VERSION_TIMEOUT = 24 * 60 * 60
+
+# Признак отсутствия действительной записи (None - допустимое значение)
+MISSING = object()
+
+
+def tag_key(tag):
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def get_tag_version_timeout():
+    """Время жизни версии тега в секундах"""
+    cache_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("CACHE_SETTINGS", {})
+    return cache_settings.get("TAG_VERSION_TIMEOUT", DEFAULT_TAG_VERSION_TIMEOUT)
+
+
+def _ensure_versions(tags, found):
+    """Версии тегов из результата get_many; недостающие создаются"""
+    missing = [tag_key(tag) for tag in tags if tag_key(tag) not in found]
+    if missing:
+        # Версия вытеснена или еще не создана - новая случайная версия делает старые записи недействительными
+        timeout = get_tag_version_timeout()
+        for key in missing:
+            cache.add(key, _new_version(), timeout)
+        found = {**found, **cache.get_many(missing)}
+    return {tag: found[tag_key(tag)] for tag in tags}
+
+
+def get_tag_versions(tags):
+    """Текущие версии тегов одним обращением к кэшу"""
+    tags = list(dict.fromkeys(tags))
+    return _ensure_versions(tags, cache.get_many([tag_key(tag) for tag in tags]))
+
+
+def fetch_tagged(key, tags):
+    """
+    Значение по ключу и текущие версии тегов одним get_many.
+    Возвращает (значение или MISSING, версии); версии нужны для store_tagged.
+    """
+    tags = list(dict.fromkeys(tags))
+    found = cache.get_many([key, *(tag_key(tag) for tag in tags)])
+    versions = _ensure_versions(tags, found)
+    entry = found.get(key)
+    if entry is None or entry["versions"] != versions:
+        return MISSING, versions
+    return entry["value"], versions
+
+
+def store_tagged(key, value, versions, timeout=None):
+    """Сохраняет значение с версиями тегов, полученными до его вычисления"""
+    cache.set(key, {"value": value, "versions": versions}, timeout)
+
+
+def get_or_set_tagged(key, tags, compute, timeout=None):
+    """Значение из кэша или результат compute(), сохраненный с тегами"""
+    value, versions = fetch_tagged(key, tags)
+    if value is MISSING:
+        value = compute()
+        store_tagged(key, value, versions, timeout)
+    return value
+
+
+def _bump(tags):
+    cache.set_many({tag_key(tag): _new_version() for tag in tags}, get_tag_version_timeout())
+
+
+def invalidate_tags(*tags):
+    """Делает недействительными все записи с этими тегами"""
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return
+    _bump(tags)
+    transaction.on_commit(lambda: _bump(tags))
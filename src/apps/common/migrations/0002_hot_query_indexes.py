@@ -0,0 +1,21 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+from apps.common.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY на PostgreSQL, что невозможно внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("common", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="contactsubmission",
+            index=models.Index(fields=["status", "created_at"], name="contact_status_created_idx"),
+        ),
+    ]
@@ -5,6 +5,88 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 
+class FieldTrackerMixin:
+    """
+    Отслеживание изменений полей модели.
+
+    Значения полей запоминаются при загрузке объекта из БД, поэтому проверка
+    изменений не требует повторного SELECT, а save() существующего объекта
+    записывает только измененные столбцы (и поля auto_now).
+    Изменения изменяемых значений на месте (например, JSONField) не отслеживаются.
+    Копия объекта (pk = None или другой pk) и объект, чья строка удалена, сохраняются
+    обычным образом.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._get_field_values()
+        instance._loaded_pk = instance.pk
+        return instance
+
+    def _tracked_fields(self):
+        return [field for field in self._meta.concrete_fields if not field.primary_key]
+
+    def _get_field_values(self):
+        # Отложенные поля отсутствуют в __dict__ и не отслеживаются
+        return {
+            field.attname: self.__dict__[field.attname] for field in self._tracked_fields() if field.attname in self.__dict__
+        }
+
+    def _get_loaded_values(self):
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None and not self._state.adding and self.pk is not None:
+            # Объект не загружался из БД (например, сохранен через bulk_create): исходные значения читаются один раз
+            attnames = [field.attname for field in self._tracked_fields()]
+            loaded = type(self)._base_manager.filter(pk=self.pk).values(*attnames).first()
+            self._loaded_values = loaded
+        return loaded
+
+    def get_dirty_fields(self):
+        """Имена полей, значения которых отличаются от загруженных из БД"""
+        loaded = self._get_loaded_values()
+        if loaded is None:
+            return [field.name for field in self._tracked_fields()]
+        current = self._get_field_values()
+        return [
+            field.name
+            for field in self._tracked_fields()
+            if field.attname in current and (field.attname not in loaded or loaded[field.attname] != current[field.attname])
+        ]
+
+    def has_changed(self, field_name):
+        """Изменилось ли поле с момента загрузки"""
+        return field_name in self.get_dirty_fields()
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, "_loaded_values", None)
+        self._save_only_fields = None
+        if (
+            loaded is not None
+            and not self._state.adding
+            and self.pk is not None
+            and self.pk == getattr(self, "_loaded_pk", None)
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+            and not args
+        ):
+            auto_now = [field.name for field in self._tracked_fields() if getattr(field, "auto_now", False)]
+            self._save_only_fields = set(self.get_dirty_fields() + auto_now)
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._save_only_fields = None
+        self._loaded_values = self._get_field_values()
+        self._loaded_pk = self.pk
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # UPDATE только измененных столбцов; если строки уже нет, Django вставит ее целиком, как обычно
+        only = getattr(self, "_save_only_fields", None)
+        if only is not None:
+            values = [value for value in values if value[0].name in only]
+        return super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+
+
 class ContactSubmission(models.Model):
     """Contact submission model."""
 
@@ -53,6 +135,10 @@ class ContactSubmission(models.Model):
         verbose_name = _("Форма обратной связи")
         verbose_name_plural = _("Формы обратной связи")
         ordering = ["-created_at"]
+        indexes = [
+            # Новые обращения в панели управления, отсортированные по дате
+            models.Index(fields=["status", "created_at"], name="contact_status_created_idx"),
+        ]
 
     def __str__(self):
         """String representation of ContactSubmission."""
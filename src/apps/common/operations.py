@@ -0,0 +1,32 @@
+"""
+Операции миграций, общие для приложений проекта.
+"""
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    AddIndex, который на PostgreSQL строит индекс CONCURRENTLY и не блокирует запись в таблицу.
+    На остальных базах работает как обычный AddIndex. Миграция должна быть объявлена с atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.add_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.remove_index(model, self.index, concurrently=True)
+        else:
+            schema_editor.remove_index(model, self.index)
+
+    def describe(self):
+        return f"Concurrently create index {self.index.name} on {self.model_name}"
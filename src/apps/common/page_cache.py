@@ -0,0 +1,91 @@
+"""
+Кэш целых страниц для анонимных посетителей.
+
+Публичные страницы (главная, о компании, контакты, каталог услуг) одинаковы для всех
+анонимных посетителей, поэтому готовый HTML хранится в общем кэше (Redis в production,
+locmem в разработке) с ключом из пути и строки запроса. Страница помечается тегами
+view (по умолчанию catalog): сигналы Service и ServiceCategory меняют версию тега,
+и все закэшированные страницы перестают читаться.
+
+Не кэшируются запросы авторизованных пользователей, запросы с ожидающими сообщениями
+(например, после отправки формы) и ответы, устанавливающие cookie. Вместо CSRF-токена
+в закэшированный HTML попадает заглушка, которая при каждой выдаче заменяется токеном
+текущего посетителя, поэтому формы на закэшированных страницах работают.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.response import TemplateResponse
+
+from apps.common.cache_tags import MISSING, fetch_tagged, store_tagged
+from apps.services.catalog import CATALOG_TAG
+
+DEFAULT_PAGE_CACHE_TIMEOUT = 300
+
+CSRF_PLACEHOLDER = "__page_cache_csrf_token__"
+
+
+def get_page_cache_timeout():
+    """Время жизни закэшированной страницы в секундах"""
+    cache_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("CACHE_SETTINGS", {})
+    return cache_settings.get("PAGE_CACHE_TIMEOUT", DEFAULT_PAGE_CACHE_TIMEOUT)
+
+
+def page_cache_key(request):
+    """Ключ страницы: путь и параметры запроса в постоянном порядке"""
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.md5(f"{request.path}?{query}".encode(), usedforsecurity=False).hexdigest()
+    return f"page:{digest}"
+
+
+def is_page_cacheable(request):
+    """Запрос анонимного посетителя на чтение без ожидающих сообщений"""
+    return request.method in ("GET", "HEAD") and not request.user.is_authenticated and not len(get_messages(request))
+
+
+def insert_csrf_token(request, content):
+    """
+    HTML страницы с CSRF-токеном текущего посетителя вместо заглушки. Токен (и cookie csrftoken)
+    создается только для страниц с формой, иначе ответ оставался бы некэшируемым для nginx и CDN.
+    """
+    placeholder = CSRF_PLACEHOLDER.encode()
+    if placeholder not in content:
+        return content
+    return content.replace(placeholder, get_token(request).encode())
+
+
+class PublicPageCacheMixin:
+    """Кэширует страницу TemplateResponse для анонимных посетителей"""
+
+    page_cache_tags = (CATALOG_TAG,)
+
+    def get_page_cache_tags(self):
+        """Теги, изменение которых делает страницу устаревшей"""
+        return list(self.page_cache_tags)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not is_page_cacheable(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        key = page_cache_key(request)
+        page, versions = fetch_tagged(key, self.get_page_cache_tags())
+        if page is not MISSING:
+            return HttpResponse(insert_csrf_token(request, page["content"]), content_type=page["content_type"])
+
+        response = super().dispatch(request, *args, **kwargs)
+        if isinstance(response, TemplateResponse) and response.status_code == 200:
+            # Контекст view перекрывает контекстный процессор csrf
+            response.context_data = {**(response.context_data or {}), "csrf_token": CSRF_PLACEHOLDER}
+            response.add_post_render_callback(lambda rendered: self.store_page(request, key, versions, rendered))
+        return response
+
+    def store_page(self, request, key, versions, response):
+        # Ответ с собственными cookie относится к конкретному посетителю
+        if not response.cookies:
+            page = {"content": response.content, "content_type": response["Content-Type"]}
+            store_tagged(key, page, versions, get_page_cache_timeout())
+        response.content = insert_csrf_token(request, response.content)
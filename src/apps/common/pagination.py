@@ -0,0 +1,155 @@
+"""
+Постраничный вывод по ключу (keyset pagination) для ListView.
+
+Вместо OFFSET следующая страница выбирается условием "строки после последней строки
+текущей страницы" по упорядочивающему ключу, например (-desired_date, desired_time, id).
+При индексе по этому ключу любая страница стоит столько же, сколько первая,
+а общий COUNT не нужен. Позиция передается непрозрачным подписанным курсором.
+
+Ключ должен состоять из полей модели без NULL и заканчиваться уникальным полем (обычно id).
+"""
+import json
+
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+
+CURSOR_SALT = "apps.common.pagination.cursor"
+
+
+def encode_cursor(direction, values):
+    """Подписанный курсор из направления ("next" или "prev") и значений ключа"""
+    payload = json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+    return signing.dumps([direction, payload], salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(cursor):
+    """Направление и значения ключа из курсора; Http404 для поврежденного курсора"""
+    try:
+        direction, values = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise Http404(_("Некорректный курсор страницы")) from None
+    if direction not in ("next", "prev"):
+        raise Http404(_("Некорректный курсор страницы"))
+    return direction, values
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+
+
+def keyset_filter(ordering, values):
+    """
+    Условие "строка идет после ключа values" для порядка ordering:
+    (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z), с учетом направления полей.
+    Дополнительное условие на первое поле ограничивает диапазон сканирования индекса.
+    """
+    condition = None
+    for position, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        term = Q(**{f"{name}__{lookup}": values[position]})
+        for previous, value in zip(ordering[:position], values):
+            term &= Q(**{previous.lstrip("-"): value})
+        condition = term if condition is None else condition | term
+
+    first = ordering[0]
+    bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+    return bound & condition
+
+
+def estimate_count(queryset):
+    """
+    Примерное число строк выборки. На PostgreSQL берется оценка планировщика
+    из EXPLAIN без выполнения запроса, на остальных СУБД - точный COUNT.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]["Plan Rows"]
+
+
+class KeysetPage:
+    """Страница выборки с курсорами соседних страниц"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, total=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginationMixin:
+    """
+    Заменяет Paginator в ListView постраничным выводом по ключу.
+    В контексте page_obj - KeysetPage, paginator - None.
+    approximate_total=True добавляет на страницу оценку общего числа строк.
+    """
+
+    keyset_ordering = ("id",)
+    cursor_param = "cursor"
+    approximate_total = False
+
+    def get_keyset_ordering(self):
+        return list(self.keyset_ordering)
+
+    def get_total(self, queryset):
+        """Общее число строк для страницы или None"""
+        return estimate_count(queryset) if self.approximate_total else None
+
+    def get_key(self, obj, ordering):
+        return [getattr(obj, field.lstrip("-")) for field in ordering]
+
+    def paginate_queryset(self, queryset, page_size):
+        ordering = self.get_keyset_ordering()
+        cursor = self.request.GET.get(self.cursor_param)
+        direction, values = decode_cursor(cursor) if cursor else ("next", None)
+
+        page_ordering = ordering if direction == "next" else reverse_ordering(ordering)
+        rows = queryset.order_by(*page_ordering)
+        if values is not None:
+            if len(values) != len(ordering):
+                raise Http404(_("Некорректный курсор страницы"))
+            rows = rows.filter(keyset_filter(page_ordering, values))
+        # Одна лишняя строка показывает, есть ли страница дальше
+        rows = list(rows[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if direction == "next":
+            has_next, has_previous = has_more, values is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+
+        page = KeysetPage(
+            rows,
+            next_cursor=encode_cursor("next", self.get_key(rows[-1], ordering)) if has_next and rows else None,
+            previous_cursor=encode_cursor("prev", self.get_key(rows[0], ordering)) if has_previous and rows else None,
+            total=self.get_total(queryset),
+        )
+        return None, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,97 @@
+"""
+Объединение одинаковых одновременных чтений (single-flight).
+
+Когда много посетителей одновременно запрашивают одно и то же (свободные слоты
+на популярную дату в начале записи), внутри процесса выполняется одно вычисление,
+а остальные запросы ждут его и получают тот же результат. Между процессами результат
+разделяется через кэш коротким временем жизни (get_or_compute с его блокировкой).
+Объединение внутри процесса работает при воркерах с потоками (gunicorn gthread).
+
+Результат общий для всех объединенных запросов, поэтому изменять его нельзя.
+"""
+import threading
+
+from .cache_compute import get_cache_setting, get_or_compute
+
+DEFAULT_COALESCE_TIMEOUT = 2
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Группа вычислений по ключу: одновременные вызовы с одним ключом выполняются один раз"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    def _count(self, coalesced):
+        with self.lock:
+            self.stats["calls"] += 1
+            if coalesced:
+                self.stats["coalesced"] += 1
+
+    def do(self, key, fn):
+        """Результат fn() для потоков; если вычисление с этим ключом уже идет, ждет его"""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+        self._count(coalesced=not leader)
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+        return call.result
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats, in_flight=len(self.calls))
+        stats["coalesced_rate"] = stats["coalesced"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+_group = SingleFlight()
+
+
+def get_coalesce_timeout():
+    """Время жизни результата, разделяемого между процессами, в секундах"""
+    return get_cache_setting("COALESCE_TIMEOUT", DEFAULT_COALESCE_TIMEOUT)
+
+
+def coalesce(key, compute):
+    """Результат compute() с одним вычислением на ключ внутри процесса"""
+    return _group.do(key, compute)
+
+
+def get_or_compute_coalesced(key, compute, timeout=None, tags=()):
+    """
+    Результат compute() с объединением одновременных запросов: внутри процесса - одно
+    вычисление на ключ, между процессами - кэш на timeout секунд (по умолчанию COALESCE_TIMEOUT).
+    """
+    timeout = get_coalesce_timeout() if timeout is None else timeout
+    return coalesce(key, lambda: get_or_compute(key, compute, timeout, tags=tags))
+
+
+def get_coalesce_stats():
+    """Сколько запросов процесса объединено с уже выполнявшимися"""
+    return _group.get_stats()
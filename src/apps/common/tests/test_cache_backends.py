@@ -0,0 +1,126 @@
+import json
+import time
+from unittest import mock
+
+import fakeredis
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from apps.common.cache_backends import LocalLRU, RedisInvalidationChannel, get_redis_client
+
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "two-tier-shared"},
+    "two_tier": {
+        "BACKEND": "apps.common.cache_backends.TwoTierCache",
+        "LOCATION": "two-tier",
+        "OPTIONS": {"SHARED_CACHE": "shared", "MAX_ENTRIES": 3, "LOCAL_TIMEOUT": 30},
+    },
+}
+
+
+@override_settings(CACHES=CACHES)
+class TwoTierCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.cache = caches["two_tier"]
+        self.shared = caches["shared"]
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def counters(self):
+        stats = self.cache.get_stats()
+        return stats["local_hits"], stats["shared_hits"], stats["misses"]
+
+    def test_repeated_reads_skip_shared_cache(self):
+        before = self.counters()
+        self.cache.set("version", "a")
+        self.assertEqual(self.cache.get_many(["version", "missing"]), {"version": "a"})
+        with mock.patch.object(self.shared, "get", wraps=self.shared.get) as get, mock.patch.object(
+            self.shared, "get_many", wraps=self.shared.get_many
+        ) as get_many:
+            self.assertEqual(self.cache.get("version"), "a")
+            self.assertEqual(self.cache.get_many(["version"]), {"version": "a"})
+        get.assert_not_called()
+        get_many.assert_not_called()
+
+        self.assertEqual([after - start for after, start in zip(self.counters(), before)], [2, 1, 1])
+
+    def test_writes_invalidate_local_entries(self):
+        self.cache.set("key", 1)
+        self.cache.get("key")
+        self.cache.set("key", 2)
+        self.assertEqual(self.cache.get("key"), 2)
+        self.assertEqual(self.cache.incr("key"), 3)
+        self.assertEqual(self.cache.get("key"), 3)
+        self.cache.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+        self.assertFalse(self.cache.add("key", 4) and self.cache.add("key", 5))
+        self.assertEqual(self.cache.get("key"), 4)
+
+    def test_other_node_writes_are_dropped_on_message(self):
+        self.cache.set("key", "old")
+        self.cache.get("key")
+        self.shared.set("key", "new")  # запись с другого узла
+        self.assertEqual(self.cache.get("key"), "old")
+
+        channel = RedisInvalidationChannel(self.cache.store, client=None, channel="test")
+        channel.handle(json.dumps({"sender": "other", "keys": [self.cache.local_key("key")]}))
+        self.assertEqual(self.cache.get("key"), "new")
+
+    def test_local_entries_are_bounded(self):
+        evictions = self.cache.get_stats()["evictions"]
+        for key in "abcd":
+            self.cache.set(key, key)
+            self.cache.get(key)
+        stats = self.cache.get_stats()
+        self.assertEqual((stats["entries"], stats["evictions"] - evictions), (3, 1))
+
+    def test_value_read_before_invalidation_is_not_kept(self):
+        store = LocalLRU(max_entries=10, timeout=30)
+        generation = store.generation
+        store.drop(["key"])
+        store.set("key", "stale", generation)
+        self.assertEqual(store.get("key"), (False, None))
+
+    def test_local_entries_expire(self):
+        store = LocalLRU(max_entries=10, timeout=30)
+        store.set("key", [1], store.generation)
+        with mock.patch("apps.common.cache_backends.time.monotonic", return_value=time.monotonic() + 31):
+            self.assertEqual(store.get("key"), (False, None))
+
+
+class RedisInvalidationChannelTest(SimpleTestCase):
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "shared": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://primary:6379/2,redis://replica:6379/2",
+            },
+        }
+    )
+    def test_client_connects_to_primary_server(self):
+        connection = get_redis_client("shared").connection_pool.connection_kwargs
+        self.assertEqual((connection["host"], connection["db"]), ("primary", 2))
+
+    def test_workers_drop_entries_published_by_others(self):
+        server = fakeredis.FakeServer()
+        workers = []
+        for _worker in range(2):
+            store = LocalLRU(max_entries=10, timeout=30)
+            channel = RedisInvalidationChannel(store, fakeredis.FakeRedis(server=server), "invalidation")
+            channel.ensure_listening()
+            workers.append((store, channel))
+        (first, publisher), (second, _subscriber) = workers
+
+        deadline = time.monotonic() + 5
+        while second.stats["invalidations"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)  # подписка установлена и L1 очищен
+        for store in (first, second):
+            store.set("key", "old", store.generation)
+
+        publisher.publish(["key"])
+        while second.get("key")[0] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(second.get("key"), (False, None))
+        self.assertEqual(first.get("key"), (False, None))
@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.common.cache_compute import get_or_compute, is_expired
+from apps.common.cache_tags import invalidate_tags
+
+
+class GetOrComputeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_concurrent_misses_compute_once(self):
+        """Test that 50 workers missing at the same moment trigger a single recomputation"""
+        calls = []
+        barrier = threading.Barrier(50)
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"total": 42}
+
+        def worker():
+            barrier.wait()
+            results.append(get_or_compute("stats", compute, 60))
+
+        threads = [threading.Thread(target=worker) for _worker in range(50)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"total": 42}] * 50)
+
+    def test_stale_value_is_served_while_one_worker_refreshes(self):
+        get_or_compute("stats", lambda: 1, 60)
+        later = time.time() + 61
+        with mock.patch("apps.common.cache_compute.time.time", return_value=later):
+            # Другой воркер уже держит блокировку пересчета
+            cache.add("stats:recompute-lock", True, 10)
+            self.assertEqual(get_or_compute("stats", lambda: 2, 60), 1)
+            cache.delete("stats:recompute-lock")
+            self.assertEqual(get_or_compute("stats", lambda: 2, 60), 2)
+        self.assertIsNone(cache.get("stats:recompute-lock"))
+
+    def test_early_expiration_grows_with_compute_time(self):
+        entry = {"value": 1, "delta": 0.5, "expires_at": 100.0}
+        with mock.patch("apps.common.cache_compute.random.random", return_value=0.999):
+            # -ln(0.001) * 0.5 ≈ 3.45 секунды до срока
+            self.assertTrue(is_expired(entry, now=97))
+            self.assertFalse(is_expired(entry, now=96))
+        self.assertTrue(is_expired(entry, now=100))
+
+    def test_invalidated_tag_is_not_served_stale(self):
+        get_or_compute("stats", lambda: 1, 60, tags=["a"])
+        invalidate_tags("a")
+        self.assertEqual(get_or_compute("stats", lambda: 2, 60, tags=["a"]), 2)
+
+    def test_overrunning_computation_keeps_lock_of_another_worker(self):
+        def slow():
+            # Блокировка истекла во время вычисления, и ее взял другой воркер
+            cache.set("stats:recompute-lock", "other-worker", 10)
+            return 1
+
+        get_or_compute("stats", slow, 60)
+        self.assertEqual(cache.get("stats:recompute-lock"), "other-worker")
+
+    def test_waiters_compute_locally_after_max_wait(self):
+        cache.add("stats:recompute-lock", "stuck-worker", 10)
+        started = time.monotonic()
+        with self.settings(MEDICAL_CENTER_SETTINGS={"CACHE_SETTINGS": {"RECOMPUTE_MAX_WAIT": 0.2}}):
+            self.assertEqual(get_or_compute("stats", lambda: 1, 60), 1)
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_failed_computation_releases_lock(self):
+        def fail():
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            get_or_compute("stats", fail, 60)
+        self.assertEqual(get_or_compute("stats", lambda: 1, 60), 1)
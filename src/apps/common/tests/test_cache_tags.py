@@ -0,0 +1,126 @@
+import datetime
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.appointments.admin import AppointmentAdmin
+from apps.appointments.models import Appointment
+from apps.appointments.statistics import user_appointments_tag
+from apps.common.cache_tags import (
+    MISSING,
+    fetch_tagged,
+    get_or_set_tagged,
+    get_tag_versions,
+    invalidate_tags,
+    store_tagged,
+    tag_key,
+)
+from apps.services.catalog import CATALOG_TAG, category_tag
+from apps.services.models import Service, ServiceCategory
+
+
+class CacheTagsTest(TestCase):
+    def test_entry_and_tags_are_read_with_one_get_many(self):
+        tags = ["catalog", "category:1", "user:1:appointments"]
+        _value, versions = fetch_tagged("entry", tags)
+        store_tagged("entry", [1, 2], versions)
+
+        with mock.patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            value, _versions = fetch_tagged("entry", tags)
+        self.assertEqual(value, [1, 2])
+        get_many.assert_called_once_with(["entry", *(tag_key(tag) for tag in tags)])
+
+    def test_invalidation_is_per_tag(self):
+        compute = mock.Mock(return_value="value")
+        get_or_set_tagged("first", ["a", "b"], compute)
+        get_or_set_tagged("second", ["b"], compute)
+        get_or_set_tagged("third", ["c"], compute)
+
+        invalidate_tags("a")
+        self.assertIs(fetch_tagged("first", ["a", "b"])[0], MISSING)
+        self.assertEqual(fetch_tagged("second", ["b"])[0], "value")
+        self.assertEqual(fetch_tagged("third", ["c"])[0], "value")
+
+    def test_falsy_values_are_cached(self):
+        compute = mock.Mock(return_value=None)
+        get_or_set_tagged("entry", ["a"], compute)
+        get_or_set_tagged("entry", ["a"], compute)
+        self.assertEqual(compute.call_count, 1)
+
+    def test_evicted_tag_version_invalidates_entries(self):
+        get_or_set_tagged("entry", ["a"], lambda: "value")
+        cache.delete(tag_key("a"))
+        self.assertIs(fetch_tagged("entry", ["a"])[0], MISSING)
+
+    def test_tag_versions_expire(self):
+        with mock.patch.object(cache, "add", wraps=cache.add) as add, mock.patch.object(
+            cache, "set_many", wraps=cache.set_many
+        ) as set_many:
+            get_tag_versions(["a"])
+            invalidate_tags("a")
+        self.assertEqual(add.call_args.args[2], 24 * 60 * 60)
+        self.assertEqual(set_many.call_args.args[1], 24 * 60 * 60)
+
+    def test_entry_computed_before_invalidation_is_stale(self):
+        """Test that a value computed from data changed meanwhile is never served"""
+        _value, versions = fetch_tagged("entry", ["a"])
+        invalidate_tags("a")
+        store_tagged("entry", "stale", versions)
+        self.assertIs(fetch_tagged("entry", ["a"])[0], MISSING)
+
+
+class CacheTagSignalsTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="patient", email="patient@example.com", password="testpass123"
+        )
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        self.service = Service.objects.create(category=self.category, name="УЗИ", price=2000)
+
+    def assertBumps(self, tags, action):
+        before = get_tag_versions(tags)
+        action()
+        after = get_tag_versions(tags)
+        for tag in tags:
+            self.assertNotEqual(before[tag], after[tag], tag)
+
+    def create_appointment(self):
+        return Appointment.objects.create(
+            user=self.user,
+            service=self.service,
+            desired_date=timezone.now().date() + datetime.timedelta(days=1),
+            desired_time="10:00",
+            patient_name="Иван",
+            patient_phone="+79990000000",
+            patient_email="patient@example.com",
+            patient_age=30,
+        )
+
+    def test_service_and_category_signals(self):
+        self.assertBumps([CATALOG_TAG, category_tag(self.category.pk)], lambda: self.service.save())
+        self.assertBumps([CATALOG_TAG, category_tag(self.category.pk)], lambda: self.category.save())
+
+    def test_moved_service_bumps_both_categories(self):
+        other = ServiceCategory.objects.create(name="Анализы")
+        service = Service.objects.get(pk=self.service.pk)
+        service.category = other
+        self.assertBumps([category_tag(self.category.pk), category_tag(other.pk)], service.save)
+
+    def test_appointment_signals(self):
+        tag = user_appointments_tag(self.user.pk)
+        self.assertBumps([tag], self.create_appointment)
+        appointment = Appointment.objects.get()
+        self.assertBumps([tag], lambda: AppointmentAdmin._update_status(None, Appointment.objects.all(), "confirmed"))
+        self.assertBumps([tag], appointment.delete)
+
+    def test_dashboard_statistics_follow_appointments(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("users:profile")).context["total_appointments"], 0)
+        self.create_appointment()
+        response = self.client.get(reverse("users:profile"))
+        self.assertEqual(response.context["total_appointments"], 1)
+        self.assertEqual(response.context["upcoming_appointments"], 1)
@@ -0,0 +1,94 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from apps.common.page_cache import CSRF_PLACEHOLDER, page_cache_key
+from apps.services.models import Service, ServiceCategory
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class PublicPageCacheTest(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        self.service = Service.objects.create(category=self.category, name="УЗИ брюшной полости", price=2500)
+
+    def test_anonymous_page_is_cached(self):
+        """Test that a repeated anonymous request skips the view, templates and SQL"""
+        for url in [reverse("common:home"), reverse("services:list"), reverse("services:detail", args=[self.service.slug])]:
+            first = self.client.get(url)
+            self.assertIsNotNone(first.context)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertIsNone(second.context)
+            self.assertEqual(second.content, first.content)
+
+    def test_catalog_changes_invalidate_pages(self):
+        url = reverse("services:list")
+        self.client.get(url)
+        Service.objects.create(category=self.category, name="МРТ головного мозга", price=5000)
+        self.assertContains(self.client.get(url), "МРТ головного мозга")
+
+    def test_service_page_follows_its_category(self):
+        """Test that a service page is dropped by changes in its category only"""
+        url = reverse("services:detail", args=[self.service.slug])
+        self.client.get(url)
+        other = ServiceCategory.objects.create(name="Анализы")
+        Service.objects.create(category=other, name="Общий анализ крови", price=500)
+        self.assertIsNone(self.client.get(url).context)
+
+        Service.objects.create(category=self.category, name="МРТ головного мозга", price=5000)
+        self.assertContains(self.client.get(url), "МРТ головного мозга")
+
+    def test_authenticated_user_is_not_cached(self):
+        user = get_user_model().objects.create_user(username="patient", password="testpass123")
+        self.client.force_login(user)
+        self.client.get(reverse("common:about"))
+        self.assertIsNotNone(self.client.get(reverse("common:about")).context)
+
+    def test_csrf_token_is_per_visitor(self):
+        """Test that a cached form carries the token of the current visitor and can be submitted"""
+        url = reverse("common:contacts")
+        self.assertNotContains(Client().get(url), CSRF_PLACEHOLDER)
+
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(url)
+        self.assertIsNone(response.context)
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        token = CSRF_INPUT_RE.search(response.content.decode()).group(1)
+
+        data = {
+            "name": "Иван",
+            "email": "ivan@example.com",
+            "subject": "Вопрос",
+            "message": "Сообщение",
+            "csrfmiddlewaretoken": token,
+        }
+        self.assertEqual(client.post(url, data).status_code, 302)
+
+    def test_pages_without_forms_set_no_csrf_cookie(self):
+        """Test that neither the first nor a cached response of a page without a form sets cookies"""
+        url = reverse("common:about")
+        for _request in range(2):
+            response = Client().get(url)
+            self.assertNotContains(response, "csrfmiddlewaretoken")
+            self.assertNotIn("csrftoken", response.cookies)
+
+    def test_pending_messages_bypass_cache(self):
+        url = reverse("common:contacts")
+        self.client.get(url)
+        data = {"name": "Иван", "email": "ivan@example.com", "subject": "Вопрос", "message": "Сообщение"}
+        response = self.client.post(url, data, follow=True)
+        self.assertContains(response, "Ваше сообщение успешно отправлено")
+        # Страница с сообщением не попала в кэш
+        self.assertNotContains(Client().get(url), "Ваше сообщение успешно отправлено")
+
+    def test_key_ignores_parameter_order(self):
+        factory = RequestFactory()
+        self.assertEqual(
+            page_cache_key(factory.get("/services/?category=1&price=0-1000")),
+            page_cache_key(factory.get("/services/?price=0-1000&category=1")),
+        )
+        self.assertNotEqual(page_cache_key(factory.get("/services/?page=2")), page_cache_key(factory.get("/services/")))
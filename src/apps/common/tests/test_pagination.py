@@ -0,0 +1,34 @@
+import datetime
+
+import pytest
+from django.db.models import Q
+from django.http import Http404
+
+from apps.common.pagination import decode_cursor, encode_cursor, keyset_filter, reverse_ordering
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = encode_cursor("next", [datetime.date(2026, 10, 18), "10:00", 42])
+        assert decode_cursor(cursor) == ("next", ["2026-10-18", "10:00", 42])
+
+    def test_tampered_cursor(self):
+        cursor = encode_cursor("next", [42])
+        with pytest.raises(Http404):
+            decode_cursor(cursor[:-2] + "xx")
+        with pytest.raises(Http404):
+            decode_cursor("garbage")
+
+
+class TestKeysetFilter:
+    def test_mixed_directions(self):
+        condition = keyset_filter(["-desired_date", "desired_time", "id"], ["2026-10-18", "10:00", 42])
+        expected = Q(desired_date__lte="2026-10-18") & (
+            Q(desired_date__lt="2026-10-18")
+            | (Q(desired_time__gt="10:00") & Q(desired_date="2026-10-18"))
+            | (Q(id__gt=42) & Q(desired_date="2026-10-18") & Q(desired_time="10:00"))
+        )
+        assert condition == expected
+
+    def test_reverse_ordering(self):
+        assert reverse_ordering(["-desired_date", "desired_time", "id"]) == ["desired_date", "-desired_time", "-id"]
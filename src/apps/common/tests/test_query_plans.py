@@ -0,0 +1,122 @@
+"""
+Query plan checks for the hot queries.
+
+Every hot query runs through EXPLAIN on a synthetic dataset and must be served by an index.
+On PostgreSQL sequential scans are disabled for the transaction, so a "Seq Scan" left in the plan
+means no usable index exists. On SQLite every table access must be a SEARCH, not a SCAN.
+"""
+import datetime
+import re
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from apps.appointments.models import Appointment
+from apps.common.models import ContactSubmission
+from apps.common.pagination import keyset_filter
+from apps.services.models import Service, ServiceCategory
+from apps.users.models import User
+
+ROWS = 3000
+
+SQLITE_FULL_SCAN = re.compile(r"\bSCAN (?!CONSTANT ROW)")
+
+
+def now():
+    return timezone.now()
+
+
+def today_start():
+    return timezone.make_aware(datetime.datetime.combine(timezone.localdate(), datetime.time.min))
+
+
+HOT_QUERIES = {
+    "appointments_by_user_and_status": lambda: Appointment.objects.filter(user_id=1, status__in=Appointment.ACTIVE_STATUSES),
+    "appointments_by_date_and_status": lambda: Appointment.objects.filter(
+        desired_date=timezone.localdate(), status="completed"
+    ),
+    "appointments_by_status": lambda: Appointment.objects.filter(status="pending"),
+    "appointments_upcoming": lambda: Appointment.objects.upcoming(),
+    "appointments_user_keyset_page": lambda: Appointment.objects.filter(
+        keyset_filter(["-desired_date", "desired_time", "id"], [timezone.localdate(), "10:00", 100]), user_id=1
+    ).order_by("-desired_date", "desired_time", "id")[:11],
+    "appointments_user_upcoming_keyset_page": lambda: Appointment.objects.upcoming()
+    .filter(keyset_filter(["starts_at", "id"], [now(), 100]), user_id=1)
+    .order_by("starts_at", "id")[:11],
+    "appointments_created_recently": lambda: Appointment.objects.filter(
+        created_at__gte=now() - datetime.timedelta(days=30)
+    ).order_by("-created_at"),
+    "users_joined_today": lambda: User.objects.filter(
+        date_joined__gte=today_start(), date_joined__lt=today_start() + datetime.timedelta(days=1)
+    ),
+    "new_contact_submissions": lambda: ContactSubmission.objects.filter(status="new"),
+}
+
+
+@pytest.fixture
+def large_dataset(db):
+    """Synthetic dataset spread over a year so that range predicates are selective."""
+    started = now() - datetime.timedelta(days=365)
+    statuses = [choice for choice, _label in Appointment.STATUS_CHOICES]
+    slots = [slot for slot, _label in Appointment.TIME_SLOTS]
+
+    users = User.objects.bulk_create(
+        User(
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            date_joined=started + datetime.timedelta(minutes=175 * i),
+        )
+        for i in range(ROWS)
+    )
+    category = ServiceCategory.objects.create(name="Диагностика")
+    service = Service.objects.create(category=category, name="УЗИ", description="УЗИ", price=1000)
+
+    appointments = []
+    for i in range(ROWS):
+        appointment = Appointment(
+            user=users[i % len(users)],
+            service=service,
+            desired_date=timezone.localdate() - datetime.timedelta(days=200) + datetime.timedelta(days=i // len(slots)),
+            desired_time=slots[i % len(slots)],
+            status=statuses[i % len(statuses)],
+            patient_name="John Doe",
+            patient_phone="+1234567890",
+            patient_email="john@example.com",
+        )
+        appointment.starts_at, appointment.ends_at = appointment.get_slot_bounds()
+        appointments.append(appointment)
+    Appointment.objects.bulk_create(appointments)
+    Appointment.objects.update(created_at=started)
+
+    ContactSubmission.objects.bulk_create(
+        ContactSubmission(
+            name="John Doe",
+            email="john@example.com",
+            subject="Вопрос",
+            message="Сообщение",
+            status=["new", "in_progress", "completed", "spam"][i % 4],
+        )
+        for i in range(ROWS)
+    )
+
+
+def explain(queryset):
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+    return queryset.explain()
+
+
+def full_scans(plan):
+    if connection.vendor == "postgresql":
+        return [line for line in plan.splitlines() if "Seq Scan" in line]
+    return [line for line in plan.splitlines() if SQLITE_FULL_SCAN.search(line)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", sorted(HOT_QUERIES))
+def test_hot_query_uses_index(large_dataset, name):
+    """Test that a hot query is answered by an index scan."""
+    plan = explain(HOT_QUERIES[name]())
+    assert not full_scans(plan), f"{name} falls back to a sequential scan:\n{plan}"
@@ -0,0 +1,60 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from apps.common.single_flight import SingleFlight
+
+
+class SingleFlightTest(SimpleTestCase):
+    def run_concurrently(self, group, count, fn):
+        results, errors = [], []
+
+        def worker():
+            try:
+                results.append(group.do("date:2030-01-01", fn))
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=worker) for _worker in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def test_identical_concurrent_calls_share_one_computation(self):
+        group = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            # Ждем, пока все остальные запросы присоединятся к вычислению
+            deadline = time.monotonic() + 5
+            while group.get_stats()["calls"] < 20 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            return [1, 2, 3]
+
+        results, errors = self.run_concurrently(group, 20, compute)
+        self.assertEqual(errors, [])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[1, 2, 3]] * 20)
+        self.assertEqual(group.get_stats()["coalesced"], 19)
+        self.assertEqual(group.get_stats()["in_flight"], 0)
+
+        # Следующий запрос после завершения вычисляет заново
+        group.do("date:2030-01-01", compute)
+        self.assertEqual(len(calls), 2)
+
+    def test_error_is_shared(self):
+        group = SingleFlight()
+
+        def fail():
+            while group.get_stats()["calls"] < 5:
+                time.sleep(0.005)
+            raise ValueError("index unavailable")
+
+        results, errors = self.run_concurrently(group, 5, fail)
+        self.assertEqual(results, [])
+        self.assertEqual(len(errors), 5)
+        self.assertTrue(all(isinstance(error, ValueError) for error in errors))
@@ -7,9 +7,10 @@ from django.urls import reverse_lazy
 from django.views.generic import FormView, TemplateView
 
 from .forms import ContactForm
+from .page_cache import PublicPageCacheMixin
 
 
-class HomeView(TemplateView):
+class HomeView(PublicPageCacheMixin, TemplateView):
     """Home page view."""
 
     template_name = "common/index.html"
@@ -21,7 +22,7 @@ class HomeView(TemplateView):
         return context
 
 
-class AboutView(TemplateView):
+class AboutView(PublicPageCacheMixin, TemplateView):
     """About page view."""
 
     template_name = "common/about.html"
@@ -33,7 +34,7 @@ class AboutView(TemplateView):
         return context
 
 
-class ContactsView(FormView):
+class ContactsView(PublicPageCacheMixin, FormView):
     """Contacts page view."""
 
     template_name = "common/contacts.html"
@@ -2,7 +2,9 @@ from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from .models import Service, ServiceCategory
+from .catalog import invalidate_catalog
+from .models import SearchQueryStat, SearchSynonym, Service, ServiceCategory
+from .search_cache import flush_search_stats
 
 
 @admin.register(ServiceCategory)
@@ -46,7 +48,7 @@ class ServiceAdmin(admin.ModelAdmin):
     ]
     list_filter = ["category", "is_active", "created_at", "updated_at"]
     list_editable = ["price", "is_active"]
-    search_fields = ["name", "description", "category__name"]
+    search_fields = ["name", "description", "category__name", "external_code"]
     prepopulated_fields = {"slug": ("name",)}
     readonly_fields = ["created_at", "updated_at", "image_preview_large"]
     date_hierarchy = "created_at"
@@ -54,7 +56,7 @@ class ServiceAdmin(admin.ModelAdmin):
     fieldsets = (
         (
             _("Основная информация"),
-            {"fields": ("name", "slug", "category", "description", "price")},
+            {"fields": ("name", "slug", "external_code", "category", "description", "price")},
         ),
         (_("Изображение"), {"fields": ("image", "image_preview_large")}),
         (_("Статус"), {"fields": ("is_active",)}),
@@ -88,13 +90,48 @@ class ServiceAdmin(admin.ModelAdmin):
     actions = ["activate_services", "deactivate_services"]
 
     def activate_services(self, request, queryset):
+        category_ids = set(queryset.values_list("category_id", flat=True))
         updated = queryset.update(is_active=True)
+        invalidate_catalog(category_ids=category_ids)  # update() не отправляет сигналы
         self.message_user(request, _("Активировано {} услуг").format(updated), messages.SUCCESS)
 
     activate_services.short_description = _("Активировать выбранные услуги")
 
     def deactivate_services(self, request, queryset):
+        category_ids = set(queryset.values_list("category_id", flat=True))
         updated = queryset.update(is_active=False)
+        invalidate_catalog(category_ids=category_ids)  # update() не отправляет сигналы
         self.message_user(request, _("Деактивировано {} услуг").format(updated), messages.SUCCESS)
 
     deactivate_services.short_description = _("Деактивировать выбранные услуги")
+
+
+@admin.register(SearchSynonym)
+class SearchSynonymAdmin(admin.ModelAdmin):
+    list_display = ["term", "synonyms", "is_active", "updated_at"]
+    list_filter = ["is_active"]
+    list_editable = ["is_active"]
+    search_fields = ["term", "synonyms"]
+    readonly_fields = ["created_at", "updated_at"]
+
+
+@admin.register(SearchQueryStat)
+class SearchQueryStatAdmin(admin.ModelAdmin):
+    list_display = ["query", "search_count", "cache_hit_rate_display", "zero_results", "last_searched_at"]
+    search_fields = ["query"]
+    date_hierarchy = "last_searched_at"
+    readonly_fields = ["query", "search_count", "cache_hits", "zero_results", "last_searched_at"]
+
+    def cache_hit_rate_display(self, obj):
+        return f"{obj.cache_hit_rate:.0%}"
+
+    cache_hit_rate_display.short_description = _("Доля ответов из кэша")
+
+    def has_add_permission(self, request):
+        # Статистика собирается поиском, вручную не создается
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        # Счетчики закрытых интервалов еще могут ждать переноса в кэше
+        flush_search_stats()
+        return super().changelist_view(request, extra_context)
@@ -5,3 +5,11 @@ class ServicesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.services"
     verbose_name = "Услуги"
+
+    def ready(self):
+        from django.db.models.signals import post_migrate, pre_migrate
+
+        from . import signals
+
+        pre_migrate.connect(signals.drop_sqlite_search_index, sender=self, dispatch_uid="services_drop_search_index")
+        post_migrate.connect(signals.install_sqlite_search_index, sender=self, dispatch_uid="services_search_index")
@@ -0,0 +1,98 @@
+"""
+Автодополнение в поиске услуг.
+
+Индекс - отсортированный массив ключей, префикс ищется бинарным поиском (bisect).
+Ключи строятся для названий услуг и категорий в исходном виде и в транслитерации,
+от начала названия и от начала каждого следующего слова: "мрт головного мозга",
+"головного мозга", "мозга". Для названий с терминами из словаря синонимов индексируются
+и варианты с заменой ("МРТ головного мозга" для "Магнитно-резонансная томография
+головного мозга"). Совпадения с начала названия показываются раньше совпадений с середины.
+
+Индекс строится лениво в снимке каталога и перестраивается вместе с ним,
+поэтому подсказки не выполняют запросов к БД.
+"""
+from bisect import bisect_left
+
+from django.conf import settings
+from django.urls import reverse
+
+from .normalization import normalize_for_search, query_variants
+from .trigrams import split_words
+
+DEFAULT_AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+
+def get_autocomplete_limit():
+    """Число подсказок по умолчанию"""
+    search_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("SEARCH_SETTINGS", {})
+    return search_settings.get("AUTOCOMPLETE_LIMIT", DEFAULT_AUTOCOMPLETE_LIMIT)
+
+
+def normalize_prefix(text):
+    return " ".join(split_words(text))
+
+
+class PrefixIndex:
+    """
+    Поиск подсказок по префиксу.
+    Принимает пары (тексты, подсказка); подсказки с одинаковым ключом выдаются в порядке передачи.
+    """
+
+    def __init__(self, entries):
+        self.suggestions = []
+        starts = set()
+        inner = set()
+        for rank, (texts, suggestion) in enumerate(entries):
+            self.suggestions.append(suggestion)
+            for text in texts:
+                for form in {normalize_prefix(text), normalize_for_search(text)}:
+                    words = form.split()
+                    for position in range(len(words)):
+                        (inner if position else starts).add((" ".join(words[position:]), rank))
+        self.starts = sorted(starts)
+        self.inner = sorted(inner)
+
+    def _scan(self, keys, prefix, found, limit):
+        position = bisect_left(keys, (prefix,))
+        while position < len(keys) and len(found) < limit:
+            key, rank = keys[position]
+            if not key.startswith(prefix):
+                break
+            found.setdefault(rank)
+            position += 1
+
+    def suggest(self, query, limit=DEFAULT_AUTOCOMPLETE_LIMIT):
+        """Подсказки для начала запроса"""
+        prefixes = [prefix for prefix in dict.fromkeys([normalize_prefix(query), *query_variants(query)]) if prefix]
+        found = {}
+        for keys in (self.starts, self.inner):
+            for prefix in prefixes:
+                self._scan(keys, prefix, found, limit)
+        return [self.suggestions[rank] for rank in found]
+
+
+def build_autocomplete_index(categories, services, synonyms):
+    """Индекс подсказок по категориям и услугам каталога"""
+    list_url = reverse("services:list")
+    entries = [
+        (
+            synonyms.expand(category.name),
+            {"type": "category", "name": category.name, "slug": category.slug, "url": f"{list_url}?category={category.pk}"},
+        )
+        for category in categories
+    ]
+    entries.extend(
+        (
+            synonyms.expand(service.name),
+            {
+                "type": "service",
+                "name": service.name,
+                "slug": service.slug,
+                "category": service.category.name,
+                "url": reverse("services:detail", args=[service.slug]),
+            },
+        )
+        for service in services
+    )
+    return PrefixIndex(entries)
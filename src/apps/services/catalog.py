@@ -0,0 +1,122 @@
+"""
+Снимок каталога услуг в памяти процесса.
+
+Каталог небольшой и меняется редко, поэтому категории, активные услуги и словарь
+синонимов поиска загружаются
+одним набором запросов и хранятся в памяти воркера. Актуальность снимка определяется
+версией тега "catalog" в общем кэше (Redis в production): сигналы Service и ServiceCategory
+меняют версию, и каждый воркер при следующем обращении перестраивает свой снимок.
+Тот же тег помечает кэш страниц и результатов поиска, построенных по каталогу.
+Страница услуги зависит только от услуг своей категории и помечается тегом category:<id>.
+"""
+import threading
+from functools import cached_property
+
+from django.http import Http404
+
+from apps.common.cache_tags import get_tag_versions, invalidate_tags
+
+from .autocomplete import build_autocomplete_index
+from .models import SearchSynonym, Service, ServiceCategory
+from .synonyms import SynonymTable
+from .trigrams import TrigramIndex
+
+CATALOG_TAG = "catalog"
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+class CatalogSnapshot:
+    """Неизменяемый снимок категорий, активных услуг и словаря синонимов"""
+
+    def __init__(self, version, categories, services, synonyms=None):
+        self.version = version
+        self.categories = tuple(categories)
+        self.services = tuple(services)
+        self.synonyms = synonyms if synonyms is not None else SynonymTable()
+        self._by_slug = {service.slug: service for service in self.services}
+        self._by_pk = {service.pk: service for service in self.services}
+        self._by_category = {}
+        for service in self.services:
+            self._by_category.setdefault(service.category_id, []).append(service)
+
+    def get_service(self, slug):
+        """Активная услуга по slug или None"""
+        return self._by_slug.get(slug)
+
+    def get_services(self, category_id=None):
+        """Активные услуги, при необходимости только одной категории"""
+        if category_id is None:
+            return list(self.services)
+        return list(self._by_category.get(category_id, ()))
+
+    @cached_property
+    def trigram_index(self):
+        """Триграммный индекс нормализованных названий для нечеткого поиска"""
+        return TrigramIndex((service.pk, service.search_translit) for service in self.services)
+
+    @cached_property
+    def autocomplete_index(self):
+        """Префиксный индекс названий услуг и категорий для подсказок"""
+        return build_autocomplete_index(self.categories, self.services, self.synonyms)
+
+    def get_services_by_ids(self, ids):
+        """Активные услуги в порядке переданных id; неактивные и удаленные пропускаются"""
+        return [self._by_pk[pk] for pk in ids if pk in self._by_pk]
+
+
+def category_tag(pk):
+    return f"category:{pk}"
+
+
+def get_catalog_version():
+    """Текущая версия каталога - версия тега catalog"""
+    return get_tag_versions([CATALOG_TAG])[CATALOG_TAG]
+
+
+def build_catalog(version):
+    """Загружает каталог из БД"""
+    categories = list(ServiceCategory.objects.all())
+    services = list(Service.objects.filter(is_active=True).select_related("category"))
+    synonyms = SynonymTable(synonym.get_phrases() for synonym in SearchSynonym.objects.filter(is_active=True))
+    return CatalogSnapshot(version, categories, services, synonyms)
+
+
+def get_catalog():
+    """Актуальный снимок каталога; стоит одного обращения к кэшу, если каталог не менялся"""
+    global _snapshot
+
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = build_catalog(version)
+        return _snapshot
+
+
+def get_service_or_404(slug):
+    """Активная услуга из снимка или Http404"""
+    service = get_catalog().get_service(slug)
+    if service is None:
+        raise Http404("Услуга не найдена")
+    return service
+
+
+def invalidate_catalog(category_ids=()):
+    """
+    Помечает снимки всех воркеров и все записи с тегом catalog устаревшими,
+    вместе с записями переданных категорий.
+    """
+    invalidate_tags(CATALOG_TAG, *(category_tag(pk) for pk in category_ids))
+
+
+def clear_catalog_snapshot():
+    """Сбрасывает снимок текущего процесса"""
+    global _snapshot
+
+    with _lock:
+        _snapshot = None
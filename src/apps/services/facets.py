@@ -0,0 +1,110 @@
+"""
+Фасетная фильтрация каталога услуг.
+
+Фильтры передаются параметрами запроса и комбинируются: несколько значений одного
+фасета объединяются через ИЛИ (?category=1&category=2), разные фасеты - через И
+(?category=1&price=1000-3000). Счетчики каждого фасета считаются с учетом фильтров
+остальных фасетов, чтобы было видно, сколько услуг добавит выбор значения.
+
+Все счетчики и отфильтрованный список считаются за один проход по услугам
+из снимка каталога, без запросов к БД.
+"""
+from collections import Counter
+from decimal import Decimal
+
+# Ценовые диапазоны: ключ параметра, подпись, нижняя граница (включительно), верхняя
+PRICE_BUCKETS = [
+    ("0-1000", "до 1 000 ₽", None, Decimal("1000")),
+    ("1000-3000", "1 000 – 3 000 ₽", Decimal("1000"), Decimal("3000")),
+    ("3000-5000", "3 000 – 5 000 ₽", Decimal("3000"), Decimal("5000")),
+    ("5000-", "от 5 000 ₽", Decimal("5000"), None),
+]
+
+
+def parse_category_id(value):
+    """Id категории из параметра запроса или None"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def price_bucket(price):
+    """Ключ ценового диапазона"""
+    for key, _label, low, high in PRICE_BUCKETS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return key
+    return None
+
+
+def toggle_url(params, name, value):
+    """Строка запроса, в которой значение фасета включено или выключено; страница сбрасывается"""
+    params = params.copy()
+    values = params.getlist(name)
+    if value in values:
+        values.remove(value)
+    else:
+        values.append(value)
+    params.setlist(name, values)
+    params.pop("page", None)
+    return f"?{params.urlencode()}"
+
+
+class FacetOption:
+    """Значение фасета со счетчиком и ссылкой на включение или выключение"""
+
+    def __init__(self, label, count, selected, url, value=None):
+        self.label = label
+        self.count = count
+        self.selected = selected
+        self.url = url
+        self.value = value
+
+
+class Facets:
+    """Отфильтрованные услуги и фасеты по категориям и цене"""
+
+    def __init__(self, services, categories, params):
+        category_ids = {parse_category_id(value) for value in params.getlist("category")} - {None}
+        bucket_keys = {key for key, *_rest in PRICE_BUCKETS} & set(params.getlist("price"))
+
+        category_counts = Counter()
+        price_counts = Counter()
+        self.services = []
+        for service in services:
+            bucket = price_bucket(service.price)
+            in_category = not category_ids or service.category_id in category_ids
+            in_price = not bucket_keys or bucket in bucket_keys
+            if in_price:
+                category_counts[service.category_id] += 1
+            if in_category:
+                price_counts[bucket] += 1
+            if in_category and in_price:
+                self.services.append(service)
+
+        # Пустые категории не показываются, если только не выбраны
+        self.categories = [
+            FacetOption(
+                category.name,
+                category_counts[category.pk],
+                category.pk in category_ids,
+                toggle_url(params, "category", str(category.pk)),
+                value=category,
+            )
+            for category in categories
+            if category_counts[category.pk] or category.pk in category_ids
+        ]
+        self.prices = [
+            FacetOption(label, price_counts[key], key in bucket_keys, toggle_url(params, "price", key), value=key)
+            for key, label, _low, _high in PRICE_BUCKETS
+        ]
+        self.selected = [option for option in self.categories + self.prices if option.selected]
+
+        reset = params.copy()
+        for name in ("category", "price", "page"):
+            reset.pop(name, None)
+        self.reset_url = f"?{reset.urlencode()}"
+
+    @property
+    def selected_categories(self):
+        return [option.value for option in self.categories if option.selected]
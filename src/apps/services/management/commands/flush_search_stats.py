@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.services.search_cache import flush_search_stats
+
+
+class Command(BaseCommand):
+    help = "Переносит в БД счетчики поисковых запросов, накопленные в кэше"
+
+    def handle(self, *args, **options):
+        flushed = flush_search_stats()
+        self.stdout.write(self.style.SUCCESS(f"Обновлена статистика запросов: {flushed}"))
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.services.sync import DEFAULT_CHUNK_SIZE, SyncError, read_rows, sync_services
+
+FORMATS = {".csv": "csv", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+class Command(BaseCommand):
+    help = "Синхронизирует каталог услуг с прайс-листом (CSV, JSON или JSON Lines)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл прайс-листа или - для чтения из stdin")
+        parser.add_argument("--format", choices=sorted(set(FORMATS.values())), help="Формат входных данных")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Размер пачки строк")
+        parser.add_argument(
+            "--keep-missing", action="store_true", help="Не деактивировать услуги, отсутствующие в прайс-листе"
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Показать итоги без сохранения изменений")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or FORMATS.get(Path(path).suffix.lower())
+        if fmt is None:
+            raise CommandError("Не удалось определить формат по расширению файла, укажите --format")
+
+        stream = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+        try:
+            with transaction.atomic():
+                report = sync_services(
+                    read_rows(stream, fmt),
+                    chunk_size=options["chunk_size"],
+                    deactivate_missing=not options["keep_missing"],
+                )
+                if options["dry_run"]:
+                    transaction.set_rollback(True)
+        except SyncError as error:
+            raise CommandError(str(error)) from error
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(
+            f"Добавлено: {report.inserted}, обновлено: {report.updated}, без изменений: {report.unchanged}, "
+            f"деактивировано: {report.deactivated}, новых категорий: {report.categories_created}"
+        )
+        self.stdout.write(
+            f"Обработано строк: {report.processed} за {report.elapsed:.2f} с ({report.rows_per_second:.0f} строк/с)"
+        )
+        if options["dry_run"]:
+            self.stdout.write(self.style.WARNING("Пробный запуск: изменения не сохранены"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Каталог синхронизирован"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0003_populate_slugs"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="external_code",
+            field=models.CharField(
+                blank=True, max_length=64, null=True, unique=True, verbose_name="Код в прайс-листе лаборатории"
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# SQL скопирован на момент создания миграции и не зависит от apps.services.search.
+# На SQLite FTS5-индекс создается сигналом post_migrate.
+
+INSTALL_SQL = [
+    "ALTER TABLE services_service ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION services_service_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(
+                (SELECT name FROM services_servicecategory WHERE id = NEW.category_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION services_category_search_vector() RETURNS trigger AS $$
+    BEGIN
+        UPDATE services_service SET name = name WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+    """
+    CREATE TRIGGER services_service_search_vector
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON services_service
+    FOR EACH ROW EXECUTE FUNCTION services_service_search_vector()
+    """,
+    "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+    """
+    CREATE TRIGGER services_category_search_vector
+    AFTER UPDATE OF name ON services_servicecategory
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION services_category_search_vector()
+    """,
+    "CREATE INDEX IF NOT EXISTS services_service_search_idx ON services_service USING gin (search_vector)",
+    # Заполнение вектора для существующих строк через триггер
+    "UPDATE services_service SET name = name",
+]
+
+UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+    "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+    "DROP FUNCTION IF EXISTS services_category_search_vector()",
+    "DROP FUNCTION IF EXISTS services_service_search_vector()",
+    "DROP INDEX IF EXISTS services_service_search_idx",
+    "ALTER TABLE services_service DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def run_postgresql(*statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0004_service_external_code"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_postgresql(*INSTALL_SQL), run_postgresql(*UNINSTALL_SQL)),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# SQL скопирован на момент создания миграции и не зависит от apps.services.search.
+# На SQLite FTS5-индекс создается сигналом post_migrate.
+
+FUZZY_INSTALL_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS services_service_name_trgm_idx ON services_service USING gin (lower(name) gin_trgm_ops)",
+]
+
+FUZZY_UNINSTALL_SQL = [
+    "DROP INDEX IF EXISTS services_service_name_trgm_idx",
+]
+
+
+def run_postgresql(*statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0005_service_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(run_postgresql(*FUZZY_INSTALL_SQL), run_postgresql(*FUZZY_UNINSTALL_SQL)),
+    ]
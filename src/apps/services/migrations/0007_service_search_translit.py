@@ -0,0 +1,199 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:29
+
+import re
+
+from django.db import migrations, models
+
+# Нормализация названий скопирована на момент создания миграции (apps.services.normalization)
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+TRANSLIT_TABLE = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "g",
+        "д": "d",
+        "е": "e",
+        "ё": "e",
+        "ж": "zh",
+        "з": "z",
+        "и": "i",
+        "й": "y",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "c",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ъ": "",
+        "ы": "y",
+        "ь": "",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+        "_": "",
+    }
+)
+
+
+def normalize_for_search(text):
+    return " ".join(WORD_RE.findall(text.lower().translate(TRANSLIT_TABLE)))
+
+
+# SQL скопирован на момент создания миграции и не зависит от apps.services.search.
+# На SQLite FTS5-индекс создается сигналом post_migrate.
+
+INSTALL_SQL = [
+    "ALTER TABLE services_service ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION services_service_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.search_translit, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(
+                (SELECT name FROM services_servicecategory WHERE id = NEW.category_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION services_category_search_vector() RETURNS trigger AS $$
+    BEGIN
+        UPDATE services_service SET name = name WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+    """
+    CREATE TRIGGER services_service_search_vector
+    BEFORE INSERT OR UPDATE OF name, description, category_id, search_translit ON services_service
+    FOR EACH ROW EXECUTE FUNCTION services_service_search_vector()
+    """,
+    "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+    """
+    CREATE TRIGGER services_category_search_vector
+    AFTER UPDATE OF name ON services_servicecategory
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION services_category_search_vector()
+    """,
+    "CREATE INDEX IF NOT EXISTS services_service_search_idx ON services_service USING gin (search_vector)",
+    # Заполнение вектора для существующих строк через триггер
+    "UPDATE services_service SET name = name",
+]
+
+INSTALL_SQL_WITHOUT_TRANSLIT = [
+    "ALTER TABLE services_service ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    """
+    CREATE OR REPLACE FUNCTION services_service_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('russian', coalesce(
+                (SELECT name FROM services_servicecategory WHERE id = NEW.category_id), ''
+            )), 'B') ||
+            setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION services_category_search_vector() RETURNS trigger AS $$
+    BEGIN
+        UPDATE services_service SET name = name WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+    """
+    CREATE TRIGGER services_service_search_vector
+    BEFORE INSERT OR UPDATE OF name, description, category_id ON services_service
+    FOR EACH ROW EXECUTE FUNCTION services_service_search_vector()
+    """,
+    "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+    """
+    CREATE TRIGGER services_category_search_vector
+    AFTER UPDATE OF name ON services_servicecategory
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE FUNCTION services_category_search_vector()
+    """,
+    "CREATE INDEX IF NOT EXISTS services_service_search_idx ON services_service USING gin (search_vector)",
+    # Заполнение вектора для существующих строк через триггер
+    "UPDATE services_service SET name = name",
+]
+
+UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+    "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+    "DROP FUNCTION IF EXISTS services_category_search_vector()",
+    "DROP FUNCTION IF EXISTS services_service_search_vector()",
+    "DROP INDEX IF EXISTS services_service_search_idx",
+    "ALTER TABLE services_service DROP COLUMN IF EXISTS search_vector",
+]
+
+FUZZY_INSTALL_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS services_service_name_trgm_idx ON services_service USING gin ((lower(name || ' ' || search_translit)) gin_trgm_ops)",
+]
+
+FUZZY_INSTALL_SQL_WITHOUT_TRANSLIT = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS services_service_name_trgm_idx ON services_service USING gin (lower(name) gin_trgm_ops)",
+]
+
+FUZZY_UNINSTALL_SQL = [
+    "DROP INDEX IF EXISTS services_service_name_trgm_idx",
+]
+
+
+def populate_search_translit(apps, schema_editor):
+    Service = apps.get_model("services", "Service")
+    services = list(Service.objects.only("pk", "name"))
+    for service in services:
+        service.search_translit = normalize_for_search(service.name)
+    Service.objects.bulk_update(services, ["search_translit"], batch_size=500)
+
+
+def run_postgresql(*statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return run
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0006_service_name_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="service",
+            name="search_translit",
+            field=models.TextField(blank=True, editable=False, verbose_name="Название для поиска (транслитерация)"),
+        ),
+        migrations.RunPython(populate_search_translit, migrations.RunPython.noop),
+        migrations.RunPython(
+            run_postgresql(*FUZZY_UNINSTALL_SQL, *UNINSTALL_SQL, *INSTALL_SQL, *FUZZY_INSTALL_SQL),
+            run_postgresql(
+                *FUZZY_UNINSTALL_SQL, *UNINSTALL_SQL, *INSTALL_SQL_WITHOUT_TRANSLIT, *FUZZY_INSTALL_SQL_WITHOUT_TRANSLIT
+            ),
+        ),
+    ]
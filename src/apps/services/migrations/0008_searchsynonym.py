@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0007_service_search_translit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchSynonym",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(max_length=200, unique=True, verbose_name="Термин или сокращение")),
+                ("synonyms", models.TextField(help_text="По одному на строку или через запятую", verbose_name="Синонимы")),
+                ("is_active", models.BooleanField(default=True, verbose_name="Активен")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")),
+                ("updated_at", models.DateTimeField(auto_now=True, verbose_name="Дата обновления")),
+            ],
+            options={
+                "verbose_name": "Синоним для поиска",
+                "verbose_name_plural": "Синонимы для поиска",
+                "ordering": ["term"],
+            },
+        ),
+    ]
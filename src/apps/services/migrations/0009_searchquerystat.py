@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("services", "0008_searchsynonym"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchQueryStat",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("query", models.CharField(max_length=200, unique=True, verbose_name="Запрос")),
+                ("search_count", models.PositiveIntegerField(default=0, verbose_name="Поисков")),
+                ("cache_hits", models.PositiveIntegerField(default=0, verbose_name="Ответов из кэша")),
+                ("zero_results", models.PositiveIntegerField(default=0, verbose_name="Поисков без результатов")),
+                ("last_searched_at", models.DateTimeField(verbose_name="Последний поиск")),
+            ],
+            options={
+                "verbose_name": "Статистика поискового запроса",
+                "verbose_name_plural": "Статистика поисковых запросов",
+                "ordering": ["-search_count"],
+            },
+        ),
+    ]
@@ -1,9 +1,14 @@
 from django.db import models
-from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 
+from apps.common.models import FieldTrackerMixin
 
-class ServiceCategory(models.Model):
+from .normalization import normalize_for_search
+from .slugs import allocate_slug
+from .synonyms import split_phrases
+
+
+class ServiceCategory(FieldTrackerMixin, models.Model):
     name = models.CharField(max_length=200, verbose_name="Название категории")
     slug = models.SlugField(max_length=200, unique=True, blank=True, verbose_name="URL")
     description = models.TextField(blank=True, verbose_name="Описание")
@@ -20,87 +25,18 @@ class ServiceCategory(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        # Для нового объекта или если slug пустой
-        if not self.slug or self._state.adding:
+        # Для нового объекта, пустого slug или при смене названия генерируем slug
+        if not self.slug or self._state.adding or self.has_changed("name"):
             self.slug = self._generate_slug(self.name)
-        else:
-            # Для существующего объекта проверяем, изменилось ли имя
-            try:
-                old_obj = ServiceCategory.objects.get(pk=self.pk)
-                if old_obj.name != self.name:
-                    self.slug = self._generate_slug(self.name)
-            except ServiceCategory.DoesNotExist:
-                # Если объекта нет в базе (маловероятно), генерируем slug
-                self.slug = self._generate_slug(self.name)
 
         super().save(*args, **kwargs)
 
     def _generate_slug(self, text):
-        """Генерирует slug из текста с поддержкой кириллицы"""
-        # Упрощенная транслитерация для кириллицы (более стандартная)
-        translit_map = {
-            "а": "a",
-            "б": "b",
-            "в": "v",
-            "г": "g",
-            "д": "d",
-            "е": "e",
-            "ё": "e",
-            "ж": "zh",
-            "з": "z",
-            "и": "i",
-            "й": "y",
-            "к": "k",
-            "л": "l",
-            "м": "m",
-            "н": "n",
-            "о": "o",
-            "п": "p",
-            "р": "r",
-            "с": "s",
-            "т": "t",
-            "у": "u",
-            "ф": "f",
-            "х": "kh",
-            "ц": "c",  # 'ц' -> 'c'
-            "ч": "ch",
-            "ш": "sh",
-            "щ": "shch",
-            "ъ": "",
-            "ы": "y",
-            "ь": "",
-            "э": "e",
-            "ю": "yu",
-            "я": "ya",
-            " ": "-",
-            "-": "-",
-        }
-
-        # Транслитерируем текст
-        base_slug = ""
-        for c in text:
-            if c.lower() in translit_map:
-                base_slug += translit_map[c.lower()]
-            elif c.isalnum():
-                base_slug += c.lower()
-            elif c == " " or c == "-":
-                base_slug += "-"
-
-        base_slug = slugify(base_slug)
-
-        # Проверяем уникальность slug
-        original_slug = base_slug
-        counter = 1
-        model_class = self.__class__
-
-        while model_class.objects.filter(slug=base_slug).exclude(pk=getattr(self, "pk", None)).exists():
-            base_slug = f"{original_slug}-{counter}"
-            counter += 1
-
-        return base_slug
-
-
-class Service(models.Model):
+        """Генерирует уникальный slug из текста с поддержкой кириллицы"""
+        return allocate_slug(self, text)
+
+
+class Service(FieldTrackerMixin, models.Model):
     category = models.ForeignKey(
         ServiceCategory,
         on_delete=models.CASCADE,
@@ -109,7 +45,15 @@ class Service(models.Model):
     )
     name = models.CharField(max_length=200, verbose_name="Название услуги")
     slug = models.SlugField(max_length=200, unique=True, blank=True, verbose_name="URL")
+    external_code = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        verbose_name="Код в прайс-листе лаборатории",
+    )
     description = models.TextField(verbose_name="Описание")
+    search_translit = models.TextField(blank=True, editable=False, verbose_name="Название для поиска (транслитерация)")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Цена")
     image = models.ImageField(upload_to="services/", blank=True, null=True, verbose_name="Изображение")
     is_active = models.BooleanField(default=True, verbose_name="Активна")
@@ -125,81 +69,63 @@ class Service(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        # Для нового объекта или если slug пустой
-        if not self.slug or self._state.adding:
+        # Для нового объекта, пустого slug или при смене названия генерируем slug
+        if not self.slug or self._state.adding or self.has_changed("name"):
             self.slug = self._generate_slug(self.name)
-        else:
-            # Для существующего объекта проверяем, изменилось ли имя
-            try:
-                old_obj = Service.objects.get(pk=self.pk)
-                if old_obj.name != self.name:
-                    self.slug = self._generate_slug(self.name)
-            except Service.DoesNotExist:
-                # Если объекта нет в базе (маловероятно), генерируем slug
-                self.slug = self._generate_slug(self.name)
+        # Нормализованная форма названия хранится рядом с поисковым индексом
+        self.search_translit = normalize_for_search(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            # Поля, вычисляемые из названия, сохраняются вместе с ним
+            kwargs["update_fields"] = {*update_fields, "slug", "search_translit"}
 
         super().save(*args, **kwargs)
 
     def _generate_slug(self, text):
-        """Генерирует slug из текста с поддержкой кириллицы"""
-        # Упрощенная транслитерация для кириллицы (более стандартная)
-        translit_map = {
-            "а": "a",
-            "б": "b",
-            "в": "v",
-            "г": "g",
-            "д": "d",
-            "е": "e",
-            "ё": "e",
-            "ж": "zh",
-            "з": "z",
-            "и": "i",
-            "й": "y",
-            "к": "k",
-            "л": "l",
-            "м": "m",
-            "н": "n",
-            "о": "o",
-            "п": "p",
-            "р": "r",
-            "с": "s",
-            "т": "t",
-            "у": "u",
-            "ф": "f",
-            "х": "kh",
-            "ц": "c",  # 'ц' -> 'c'
-            "ч": "ch",
-            "ш": "sh",
-            "щ": "shch",
-            "ъ": "",
-            "ы": "y",
-            "ь": "",
-            "э": "e",
-            "ю": "yu",
-            "я": "ya",
-            " ": "-",
-            "-": "-",
-        }
-
-        # Транслитерируем текст
-        base_slug = ""
-        for c in text:
-            if c.lower() in translit_map:
-                base_slug += translit_map[c.lower()]
-            elif c.isalnum():
-                base_slug += c.lower()
-            elif c == " " or c == "-":
-                base_slug += "-"
-
-        base_slug = slugify(base_slug)
-
-        # Проверяем уникальность slug
-        original_slug = base_slug
-        counter = 1
-        model_class = self.__class__
-
-        while model_class.objects.filter(slug=base_slug).exclude(pk=getattr(self, "pk", None)).exists():
-            base_slug = f"{original_slug}-{counter}"
-            counter += 1
-
-        return base_slug
+        """Генерирует уникальный slug из текста с поддержкой кириллицы"""
+        return allocate_slug(self, text)
+
+
+class SearchSynonym(models.Model):
+    """Группа равнозначных для поиска терминов: сокращение и полные названия"""
+
+    term = models.CharField(max_length=200, unique=True, verbose_name="Термин или сокращение")
+    synonyms = models.TextField(verbose_name="Синонимы", help_text="По одному на строку или через запятую")
+    is_active = models.BooleanField(default=True, verbose_name="Активен")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
+
+    class Meta:
+        verbose_name = "Синоним для поиска"
+        verbose_name_plural = "Синонимы для поиска"
+        ordering = ["term"]
+
+    def __str__(self):
+        return self.term
+
+    def get_phrases(self):
+        """Термин и все его синонимы"""
+        return [self.term, *split_phrases(self.synonyms)]
+
+
+class SearchQueryStat(models.Model):
+    """Статистика поискового запроса для аналитики"""
+
+    query = models.CharField(max_length=200, unique=True, verbose_name="Запрос")
+    search_count = models.PositiveIntegerField(default=0, verbose_name="Поисков")
+    cache_hits = models.PositiveIntegerField(default=0, verbose_name="Ответов из кэша")
+    zero_results = models.PositiveIntegerField(default=0, verbose_name="Поисков без результатов")
+    last_searched_at = models.DateTimeField(verbose_name="Последний поиск")
+
+    class Meta:
+        verbose_name = "Статистика поискового запроса"
+        verbose_name_plural = "Статистика поисковых запросов"
+        ordering = ["-search_count"]
+
+    def __str__(self):
+        return self.query
+
+    @property
+    def cache_hit_rate(self):
+        """Доля поисков, обслуженных из кэша"""
+        return self.cache_hits / self.search_count if self.search_count else 0.0
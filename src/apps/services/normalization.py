@@ -0,0 +1,35 @@
+"""
+Нормализация текста для поиска.
+
+Название услуги и поисковый запрос приводятся к одной форме: нижний регистр
+и латиница по той же таблице транслитерации, что и slug. Поэтому "mrt", "uzi"
+и "МРТ", "УЗИ" совпадают. Запрос, набранный в другой раскладке клавиатуры ("vhn"
+вместо "мрт"), дополнительно исправляется заменой символов по раскладке.
+"""
+import re
+
+from .slugs import transliterate
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Клавиши раскладок QWERTY и ЙЦУКЕН в одном порядке
+LATIN_KEYS = "`qwertyuiop[]asdfghjkl;'zxcvbnm,."
+CYRILLIC_KEYS = "ёйцукенгшщзхъфывапролджэячсмитьбю"
+
+LAYOUT_TABLE = str.maketrans(LATIN_KEYS + CYRILLIC_KEYS, CYRILLIC_KEYS + LATIN_KEYS)
+
+
+def swap_layout(text):
+    """Текст, как если бы его набрали в другой раскладке"""
+    return text.lower().translate(LAYOUT_TABLE)
+
+
+def normalize_for_search(text):
+    """Транслитерированная форма текста: слова латиницей в нижнем регистре"""
+    return " ".join(WORD_RE.findall(transliterate(text)))
+
+
+def query_variants(query):
+    """Нормализованные формы запроса: как набран и с исправленной раскладкой"""
+    variants = [normalize_for_search(query), normalize_for_search(swap_layout(query))]
+    return [variant for variant in dict.fromkeys(variants) if variant]
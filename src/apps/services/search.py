@@ -0,0 +1,381 @@
+"""
+Полнотекстовый поиск по услугам.
+
+На PostgreSQL у каждой услуги хранится взвешенный tsvector (название > категория > описание)
+с GIN-индексом; вектор поддерживается триггерами, поэтому актуален и после bulk-операций.
+Результаты ранжируются ts_rank по запросу websearch_to_tsquery с русской морфологией.
+Для запросов с опечатками есть нечеткий поиск по названиям через pg_trgm (GIN-индекс
+gin_trgm_ops, оператор <% и сортировка по word_similarity).
+
+На SQLite (локальная разработка и тесты) тот же интерфейс работает через виртуальную
+таблицу FTS5, которую также обновляют триггеры. Ее создают сигналы pre_migrate/post_migrate,
+а не миграции: SQLite пересоздает таблицы при изменении схемы, и триггеры мешают этому.
+Вместо морфологии окончания слов запроса отбрасываются, а слова ищутся по префиксу;
+ранжирование - bm25 с теми же весами полей. Нечеткий поиск на других СУБД использует
+триграммный индекс снимка каталога в памяти.
+
+Перед поиском запрос раскрывается по словарю синонимов из снимка каталога: бэкенды
+получают список вариантов запроса и ищут по любому из них.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection
+
+from .catalog import get_catalog
+from .normalization import query_variants
+
+DEFAULT_LIMIT = 200
+DEFAULT_TRIGRAM_THRESHOLD = 0.3
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Окончания, отбрасываемые у слов запроса для FTS5 (от длинных к коротким)
+RUSSIAN_ENDINGS = sorted(
+    [
+        "ами",
+        "ями",
+        "ого",
+        "его",
+        "ому",
+        "ему",
+        "ыми",
+        "ими",
+        "ов",
+        "ев",
+        "ей",
+        "ой",
+        "ий",
+        "ый",
+        "ая",
+        "яя",
+        "ое",
+        "ее",
+        "ые",
+        "ие",
+        "ом",
+        "ем",
+        "ах",
+        "ях",
+        "ам",
+        "ям",
+        "ы",
+        "и",
+        "а",
+        "я",
+        "о",
+        "е",
+        "у",
+        "ю",
+        "ь",
+    ],
+    key=len,
+    reverse=True,
+)
+MIN_STEM_LENGTH = 3
+
+
+def get_trigram_threshold():
+    """Минимальное сходство для нечеткого поиска"""
+    search_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("SEARCH_SETTINGS", {})
+    return search_settings.get("TRIGRAM_THRESHOLD", DEFAULT_TRIGRAM_THRESHOLD)
+
+
+def tokenize(query):
+    return [token.lower() for token in TOKEN_RE.findall(query)]
+
+
+def normalized_variants(queries):
+    """Нормализованные формы всех вариантов запроса без повторов"""
+    return list(dict.fromkeys(variant for query in queries for variant in query_variants(query)))
+
+
+def strip_ending(word):
+    """Грубое отсечение окончания для префиксного поиска"""
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[: -len(ending)]
+    return word
+
+
+class SearchBackend:
+    """
+    Интерфейс поискового бэкенда.
+
+    with_translit=False строит индекс без транслитерированных форм - для схемы
+    до появления поля Service.search_translit.
+    """
+
+    vendor = None
+
+    def install(self, schema_editor, with_translit=True):
+        """Создает структуры поиска и заполняет индекс"""
+        raise NotImplementedError
+
+    def uninstall(self, schema_editor):
+        raise NotImplementedError
+
+    def install_fuzzy(self, schema_editor, with_translit=True):
+        """Создает структуры нечеткого поиска, если они хранятся в БД"""
+
+    def uninstall_fuzzy(self, schema_editor):
+        pass
+
+    def search(self, queries, limit=DEFAULT_LIMIT):
+        """Id услуг, подходящих под любой из вариантов запроса, по релевантности"""
+        raise NotImplementedError
+
+    def fuzzy_search(self, queries, threshold, limit=DEFAULT_LIMIT):
+        """Id активных услуг, похожих по названию на любой из вариантов запроса, по убыванию сходства"""
+        return get_catalog().trigram_index.search(normalized_variants(queries), threshold, limit)
+
+    def execute(self, sql, params=()):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(SearchBackend):
+    vendor = "postgresql"
+
+    uninstall_sql = [
+        "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+        "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+        "DROP FUNCTION IF EXISTS services_category_search_vector()",
+        "DROP FUNCTION IF EXISTS services_service_search_vector()",
+        "DROP INDEX IF EXISTS services_service_search_idx",
+        "ALTER TABLE services_service DROP COLUMN IF EXISTS search_vector",
+    ]
+
+    fuzzy_uninstall_sql = [
+        "DROP INDEX IF EXISTS services_service_name_trgm_idx",
+    ]
+
+    def get_install_sql(self, with_translit):
+        translit_vector = (
+            "setweight(to_tsvector('simple', coalesce(NEW.search_translit, '')), 'A') ||" if with_translit else ""
+        )
+        columns = "name, description, category_id, search_translit" if with_translit else "name, description, category_id"
+        return [
+            "ALTER TABLE services_service ADD COLUMN IF NOT EXISTS search_vector tsvector",
+            f"""
+            CREATE OR REPLACE FUNCTION services_service_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('russian', coalesce(NEW.name, '')), 'A') ||
+                    {translit_vector}
+                    setweight(to_tsvector('russian', coalesce(
+                        (SELECT name FROM services_servicecategory WHERE id = NEW.category_id), ''
+                    )), 'B') ||
+                    setweight(to_tsvector('russian', coalesce(NEW.description, '')), 'C');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            """
+            CREATE OR REPLACE FUNCTION services_category_search_vector() RETURNS trigger AS $$
+            BEGIN
+                UPDATE services_service SET name = name WHERE category_id = NEW.id;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """,
+            "DROP TRIGGER IF EXISTS services_service_search_vector ON services_service",
+            f"""
+            CREATE TRIGGER services_service_search_vector
+            BEFORE INSERT OR UPDATE OF {columns} ON services_service
+            FOR EACH ROW EXECUTE FUNCTION services_service_search_vector()
+            """,
+            "DROP TRIGGER IF EXISTS services_category_search_vector ON services_servicecategory",
+            """
+            CREATE TRIGGER services_category_search_vector
+            AFTER UPDATE OF name ON services_servicecategory
+            FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+            EXECUTE FUNCTION services_category_search_vector()
+            """,
+            "CREATE INDEX IF NOT EXISTS services_service_search_idx ON services_service USING gin (search_vector)",
+            # Заполнение вектора для существующих строк через триггер
+            "UPDATE services_service SET name = name",
+        ]
+
+    def get_fuzzy_expression(self, with_translit):
+        if with_translit:
+            return "lower(name || ' ' || search_translit)"
+        return "lower(name)"
+
+    def install(self, schema_editor, with_translit=True):
+        for sql in self.get_install_sql(with_translit):
+            schema_editor.execute(sql)
+
+    def uninstall(self, schema_editor):
+        for sql in self.uninstall_sql:
+            schema_editor.execute(sql)
+
+    def install_fuzzy(self, schema_editor, with_translit=True):
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS services_service_name_trgm_idx "
+            f"ON services_service USING gin (({self.get_fuzzy_expression(with_translit)}) gin_trgm_ops)"
+        )
+
+    def uninstall_fuzzy(self, schema_editor):
+        for sql in self.fuzzy_uninstall_sql:
+            schema_editor.execute(sql)
+
+    def fuzzy_search(self, queries, threshold, limit=DEFAULT_LIMIT):
+        variants = normalized_variants(queries)
+        if not variants:
+            return []
+        expression = self.get_fuzzy_expression(with_translit=True)
+        matches = " OR ".join(f"lower(%s) <%% {expression}" for _variant in variants)
+        scores = ", ".join(f"word_similarity(lower(%s), {expression})" for _variant in variants)
+        with connection.cursor() as cursor:
+            # Порог оператора <% задается настройкой сеанса
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)", [str(threshold)])
+            cursor.execute(
+                f"""
+                SELECT id FROM services_service
+                WHERE is_active AND ({matches})
+                ORDER BY GREATEST({scores}) DESC, id
+                LIMIT %s
+                """,
+                [*variants, *variants, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def search(self, queries, limit=DEFAULT_LIMIT):
+        queries = [query for query in queries if tokenize(query)]
+        if not queries:
+            return []
+        # Варианты запроса с русской морфологией или их нормализованные формы по транслитерации
+        variants = normalized_variants(queries)
+        russian_queries = " || ".join("websearch_to_tsquery('russian', %s)" for _query in queries)
+        translit_queries = " || ".join("websearch_to_tsquery('simple', %s)" for _variant in variants)
+        return self.execute(
+            f"""
+            SELECT id FROM services_service,
+                ({russian_queries} || {translit_queries}) query
+            WHERE search_vector @@ query
+            ORDER BY ts_rank(search_vector, query) DESC, id
+            LIMIT %s
+            """,
+            [*queries, *variants, limit],
+        )
+
+
+class SQLiteSearchBackend(SearchBackend):
+    vendor = "sqlite"
+
+    table = "services_service_fts"
+
+    # Веса столбцов name, category, description, translit для bm25
+    weights = (10.0, 5.0, 1.0, 8.0)
+
+    trigger_names = [
+        "services_service_fts_insert",
+        "services_service_fts_update",
+        "services_service_fts_delete",
+        "services_category_fts_update",
+    ]
+
+    def get_install_sql(self, with_translit):
+        columns = "name, category, description, translit" if with_translit else "name, category, description"
+        values = (
+            "new.name, c.name, new.description, new.search_translit" if with_translit else "new.name, c.name, new.description"
+        )
+        watched = "name, description, category_id, search_translit" if with_translit else "name, description, category_id"
+        return [
+            f"CREATE VIRTUAL TABLE {self.table} " f"USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')",
+            f"""
+            CREATE TRIGGER services_service_fts_insert AFTER INSERT ON services_service BEGIN
+                INSERT INTO {self.table} (rowid, {columns})
+                SELECT new.id, {values}
+                FROM services_servicecategory c WHERE c.id = new.category_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER services_service_fts_update
+            AFTER UPDATE OF {watched} ON services_service BEGIN
+                DELETE FROM {self.table} WHERE rowid = old.id;
+                INSERT INTO {self.table} (rowid, {columns})
+                SELECT new.id, {values}
+                FROM services_servicecategory c WHERE c.id = new.category_id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER services_service_fts_delete AFTER DELETE ON services_service BEGIN
+                DELETE FROM {self.table} WHERE rowid = old.id;
+            END
+            """,
+            f"""
+            CREATE TRIGGER services_category_fts_update
+            AFTER UPDATE OF name ON services_servicecategory BEGIN
+                UPDATE {self.table} SET category = new.name
+                WHERE rowid IN (SELECT id FROM services_service WHERE category_id = new.id);
+            END
+            """,
+            f"INSERT INTO {self.table} (rowid, {columns}) "
+            f"SELECT s.id, {values.replace('new.', 's.')} "
+            "FROM services_service s JOIN services_servicecategory c ON c.id = s.category_id",
+        ]
+
+    def install(self, schema_editor, with_translit=True):
+        self.uninstall(schema_editor)
+        for sql in self.get_install_sql(with_translit):
+            schema_editor.execute(sql)
+
+    def uninstall(self, schema_editor):
+        for name in self.trigger_names:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def build_terms(self, query):
+        # Каждое слово экранируется кавычками, чтобы исключить синтаксис FTS5 из пользовательского ввода
+        return " ".join(f'"{strip_ending(token)}"*' for token in tokenize(query))
+
+    def build_match(self, queries):
+        terms = [f"({terms})" for terms in map(self.build_terms, queries) if terms]
+        if not terms:
+            return ""
+        # Варианты запроса ищутся по всем столбцам, их нормализованные формы - по транслитерации
+        translit = [f"translit : ({self.build_terms(variant)})" for variant in normalized_variants(queries)]
+        return " OR ".join([*terms, *translit])
+
+    def search(self, queries, limit=DEFAULT_LIMIT):
+        match = self.build_match(queries)
+        if not match:
+            return []
+        return self.execute(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+            f"ORDER BY bm25({self.table}, %s, %s, %s, %s), rowid LIMIT %s",
+            [match, *self.weights, limit],
+        )
+
+
+BACKENDS = {backend.vendor: backend for backend in (PostgresSearchBackend(), SQLiteSearchBackend())}
+
+
+def get_search_backend(vendor=None):
+    """Поисковый бэкенд для СУБД текущего подключения"""
+    vendor = vendor or connection.vendor
+    try:
+        return BACKENDS[vendor]
+    except KeyError:
+        raise NotImplementedError(f"Полнотекстовый поиск не поддерживается для {vendor}") from None
+
+
+def expand_query(query):
+    """Варианты запроса по словарю синонимов из снимка каталога"""
+    return get_catalog().synonyms.expand(query)
+
+
+def search_service_ids(query, limit=DEFAULT_LIMIT):
+    """Id услуг по запросу в порядке релевантности"""
+    return get_search_backend().search(expand_query(query), limit=limit)
+
+
+def fuzzy_search_service_ids(query, threshold=None, limit=DEFAULT_LIMIT):
+    """Id услуг с похожими названиями (с учетом опечаток) в порядке сходства"""
+    if threshold is None:
+        threshold = get_trigram_threshold()
+    return get_search_backend().fuzzy_search(expand_query(query), threshold, limit=limit)
@@ -0,0 +1,184 @@
+"""
+Кэш результатов поиска услуг и статистика запросов.
+
+Большая часть поискового трафика - несколько популярных запросов, поэтому результат
+поиска (упорядоченные id услуг, а не HTML) кэшируется по нормализованному запросу.
+Записи помечены тегом catalog: любое изменение услуг, категорий или синонимов меняет
+версию тега, и старые записи просто перестают читаться до истечения срока.
+Страницы выдачи нарезаются из списка id в памяти, поэтому ключ от страницы не зависит.
+
+Для аналитики по каждому запросу считаются поиски, ответы из кэша и пустые выдачи.
+Чтобы поиск из кэша не писал в БД, счетчики копятся в кэше по интервалам
+STATS_FLUSH_INTERVAL и переносятся в SearchQueryStat пачкой: при первом поиске
+в новом интервале, при открытии статистики в админке или командой flush_search_stats
+(по cron, если поиск долго простаивает). Счетчики, не перенесенные за STATS_KEEP_INTERVALS
+интервалов, истекают.
+"""
+import datetime
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.common.cache_tags import MISSING, fetch_tagged, store_tagged
+from apps.common.single_flight import coalesce
+
+from .catalog import CATALOG_TAG
+from .models import SearchQueryStat
+from .search import fuzzy_search_service_ids, search_service_ids
+
+DEFAULT_RESULT_CACHE_TIMEOUT = 600
+MAX_QUERY_LENGTH = SearchQueryStat._meta.get_field("query").max_length
+
+DEFAULT_STATS_FLUSH_INTERVAL = 60
+# Сколько интервалов счетчики ждут переноса в кэше
+STATS_KEEP_INTERVALS = 60
+STATS_KEY_PREFIX = "services:search-stats"
+STATS_LAST_FLUSHED_KEY = f"{STATS_KEY_PREFIX}:last-flushed"
+STATS_FIELDS = ("search_count", "cache_hits", "zero_results")
+
+
+def get_result_cache_timeout():
+    """Время жизни закэшированной выдачи в секундах"""
+    search_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("SEARCH_SETTINGS", {})
+    return search_settings.get("RESULT_CACHE_TIMEOUT", DEFAULT_RESULT_CACHE_TIMEOUT)
+
+
+def normalize_query(query):
+    """Запрос в нижнем регистре с одинарными пробелами"""
+    return " ".join(query.lower().split())[:MAX_QUERY_LENGTH]
+
+
+def _result_key(query):
+    digest = hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+    return f"services:search:{digest}"
+
+
+def get_search_results(query, record=True):
+    """
+    Упорядоченные id услуг по запросу. Если полнотекстовый поиск ничего не нашел,
+    используется нечеткий - запрос мог быть с опечаткой.
+    record=False не учитывает запрос в статистике (например, при переходе по страницам).
+    """
+    query = normalize_query(query)
+    if not query:
+        return []
+
+    key = _result_key(query)
+    ids, versions = fetch_tagged(key, [CATALOG_TAG])
+    hit = ids is not MISSING
+    if not hit:
+        # Одновременные промахи по одному запросу в процессе выполняют один поиск
+        ids = coalesce(key, lambda: search_service_ids(query) or fuzzy_search_service_ids(query))
+        store_tagged(key, ids, versions, get_result_cache_timeout())
+
+    if record:
+        record_search(query, hit=hit, found=bool(ids))
+    return ids
+
+
+def get_stats_flush_interval():
+    """Длительность интервала, за который счетчики запросов копятся в кэше, в секундах"""
+    search_settings = getattr(settings, "MEDICAL_CENTER_SETTINGS", {}).get("SEARCH_SETTINGS", {})
+    return search_settings.get("STATS_FLUSH_INTERVAL", DEFAULT_STATS_FLUSH_INTERVAL)
+
+
+def _stats_key(bucket, suffix):
+    return f"{STATS_KEY_PREFIX}:{bucket}:{suffix}"
+
+
+def _query_digest(query):
+    return hashlib.md5(query.encode(), usedforsecurity=False).hexdigest()
+
+
+def _increment(key, timeout):
+    """Увеличивает счетчик в кэше; True, если счетчик только что создан"""
+    if cache.add(key, 1, timeout):
+        return True
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Счетчик истек между add и incr - запрос теряется из статистики
+        pass
+    return False
+
+
+def record_search(query, hit, found):
+    """
+    Учитывает запрос в счетчиках текущего интервала в кэше, без записи в БД.
+    Первый поиск запроса в интервале переносит в БД счетчики закрытых интервалов.
+    """
+    interval = get_stats_flush_interval()
+    bucket = int(time.time() // interval)
+    timeout = interval * STATS_KEEP_INTERVALS
+    digest = _query_digest(query)
+
+    first = _increment(_stats_key(bucket, f"{digest}:search_count"), timeout)
+    if hit:
+        _increment(_stats_key(bucket, f"{digest}:cache_hits"), timeout)
+    if not found:
+        _increment(_stats_key(bucket, f"{digest}:zero_results"), timeout)
+
+    if first:
+        # Список запросов интервала: номер выдает счетчик, запрос хранится под своим номером
+        index = 1 if cache.add(_stats_key(bucket, "size"), 1, timeout) else cache.incr(_stats_key(bucket, "size"))
+        cache.set(_stats_key(bucket, f"query:{index}"), query, timeout)
+        flush_search_stats()
+
+
+def flush_search_stats(now=None):
+    """
+    Переносит в БД счетчики закрытых интервалов и возвращает число обновленных запросов.
+    Закрытым считается интервал старше предыдущего: в предыдущий еще могут писать
+    серверы с отстающими часами. Каждый интервал переносит один вызов - тот, кто первым
+    занял его через cache.add.
+    """
+    interval = get_stats_flush_interval()
+    current = int((time.time() if now is None else now) // interval)
+    last = cache.get(STATS_LAST_FLUSHED_KEY)
+    first = current - 2 if last is None else max(last + 1, current - STATS_KEEP_INTERVALS + 1)
+
+    flushed = 0
+    for bucket in range(first, current - 1):
+        if cache.add(_stats_key(bucket, "flushed"), 1, interval * STATS_KEEP_INTERVALS):
+            cache.set(STATS_LAST_FLUSHED_KEY, bucket, None)
+            flushed += _flush_bucket(bucket, interval)
+    return flushed
+
+
+def _flush_bucket(bucket, interval):
+    size = cache.get(_stats_key(bucket, "size"), 0)
+    slot_keys = [_stats_key(bucket, f"query:{index}") for index in range(1, size + 1)]
+    queries = list(cache.get_many(slot_keys).values())
+    counter_keys = {
+        (query, field): _stats_key(bucket, f"{_query_digest(query)}:{field}") for query in queries for field in STATS_FIELDS
+    }
+    counters = cache.get_many(list(counter_keys.values()))
+    # Время поиска известно с точностью до интервала
+    searched_at = min(datetime.datetime.fromtimestamp((bucket + 1) * interval, tz=datetime.timezone.utc), timezone.now())
+
+    for query in queries:
+        counts = {field: counters.get(counter_keys[query, field], 0) for field in STATS_FIELDS}
+        if counts["search_count"]:
+            save_search_counts(query, counts, searched_at)
+    cache.delete_many([_stats_key(bucket, "size"), *slot_keys, *counter_keys.values()])
+    return len(queries)
+
+
+def save_search_counts(query, counts, searched_at):
+    """Атомарно прибавляет счетчики к статистике запроса"""
+    counters = {field: F(field) + value for field, value in counts.items()}
+    counters["last_searched_at"] = searched_at
+
+    if SearchQueryStat.objects.filter(query=query).update(**counters):
+        return
+    try:
+        with transaction.atomic():
+            SearchQueryStat.objects.create(query=query, last_searched_at=searched_at, **counts)
+    except IntegrityError:
+        # Статистику запроса успели создать параллельно
+        SearchQueryStat.objects.filter(query=query).update(**counters)
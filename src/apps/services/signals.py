@@ -0,0 +1,57 @@
+"""
+Сигналы приложения services: инвалидация тегов кэша каталога и FTS5-индекс на SQLite.
+"""
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import invalidate_catalog
+from .models import SearchSynonym, Service, ServiceCategory
+from .search import SQLiteSearchBackend
+
+
+@receiver(post_save, sender=Service, dispatch_uid="services_catalog_service_save")
+@receiver(post_delete, sender=Service, dispatch_uid="services_catalog_service_delete")
+def invalidate_service_tags(sender, instance, **kwargs):
+    """Изменение услуги делает устаревшими каталог и страницы услуг ее категории (и прежней при переносе)"""
+    # post_save отправляется до того, как FieldTrackerMixin запоминает новые значения
+    loaded = getattr(instance, "_loaded_values", None) or {}
+    invalidate_catalog(category_ids={instance.category_id, loaded.get("category_id", instance.category_id)})
+
+
+@receiver(post_save, sender=ServiceCategory, dispatch_uid="services_catalog_category_save")
+@receiver(post_delete, sender=ServiceCategory, dispatch_uid="services_catalog_category_delete")
+def invalidate_category_tags(sender, instance, **kwargs):
+    """Изменение категории делает устаревшими каталог и записи с тегом category:<id>"""
+    invalidate_catalog(category_ids=[instance.pk])
+
+
+@receiver(post_save, sender=SearchSynonym, dispatch_uid="services_catalog_synonym_save")
+@receiver(post_delete, sender=SearchSynonym, dispatch_uid="services_catalog_synonym_delete")
+def invalidate_catalog_on_change(sender, **kwargs):
+    """Синонимы входят в снимок каталога"""
+    invalidate_catalog()
+
+
+def drop_sqlite_search_index(sender, using="default", **kwargs):
+    """
+    Перед миграциями на SQLite FTS5-индекс удаляется: при изменении схемы SQLite пересоздает
+    таблицы услуг и категорий, а триггеры, ссылающиеся на них, ломают переименование таблиц.
+    """
+    connection = connections[using]
+    if connection.vendor == "sqlite":
+        with connection.schema_editor() as schema_editor:
+            SQLiteSearchBackend().uninstall(schema_editor)
+
+
+def install_sqlite_search_index(sender, using="default", **kwargs):
+    """После миграций на SQLite FTS5-индекс создается заново и заполняется"""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        if "services_service" not in connection.introspection.table_names(cursor):
+            return
+        columns = {column.name for column in connection.introspection.get_table_description(cursor, "services_service")}
+    with connection.schema_editor() as schema_editor:
+        SQLiteSearchBackend().install(schema_editor, with_translit="search_translit" in columns)
@@ -0,0 +1,119 @@
+"""
+Генерация уникальных slug для услуг и категорий.
+
+Транслитерация выполняется по заранее собранной таблице str.translate.
+Коллизии разрешаются одним запросом slug__startswith: все занятые варианты
+загружаются сразу, а свободный суффикс подбирается в памяти.
+"""
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Упрощенная транслитерация для кириллицы
+TRANSLIT_TABLE = str.maketrans(
+    {
+        "а": "a",
+        "б": "b",
+        "в": "v",
+        "г": "g",
+        "д": "d",
+        "е": "e",
+        "ё": "e",
+        "ж": "zh",
+        "з": "z",
+        "и": "i",
+        "й": "y",
+        "к": "k",
+        "л": "l",
+        "м": "m",
+        "н": "n",
+        "о": "o",
+        "п": "p",
+        "р": "r",
+        "с": "s",
+        "т": "t",
+        "у": "u",
+        "ф": "f",
+        "х": "kh",
+        "ц": "c",
+        "ч": "ch",
+        "ш": "sh",
+        "щ": "shch",
+        "ъ": "",
+        "ы": "y",
+        "ь": "",
+        "э": "e",
+        "ю": "yu",
+        "я": "ya",
+        "_": "",
+    }
+)
+
+# Ограничение числа условий startswith в одном запросе (глубина выражений в SQLite)
+BULK_QUERY_CHUNK = 200
+
+
+def transliterate(text):
+    """Транслитерирует кириллицу в латиницу"""
+    return text.lower().translate(TRANSLIT_TABLE)
+
+
+def make_base_slug(text, fallback=""):
+    """Slug из текста без проверки уникальности"""
+    return slugify(transliterate(text)) or fallback
+
+
+def _pick_free(base, taken):
+    if base not in taken:
+        return base
+    counter = 1
+    while f"{base}-{counter}" in taken:
+        counter += 1
+    return f"{base}-{counter}"
+
+
+def allocate_slug(instance, text, field="slug"):
+    """Уникальный slug для объекта модели; выполняет один запрос к БД"""
+    model = instance.__class__
+    base = make_base_slug(text, fallback=model._meta.model_name)
+    taken = set(
+        model._default_manager.filter(**{f"{field}__startswith": base})
+        .exclude(pk=instance.pk)
+        .order_by()
+        .values_list(field, flat=True)
+    )
+    return _pick_free(base, taken)
+
+
+def assign_slugs(objects, source="name", field="slug"):
+    """
+    Назначает уникальные slug пачке несохраненных объектов одной модели перед bulk_create.
+    Объекты с уже заданным slug не меняются, но их slug считается занятым.
+    """
+    objects = list(objects)
+    if not objects:
+        return objects
+
+    model = objects[0].__class__
+    fallback = model._meta.model_name
+    taken = {getattr(obj, field) for obj in objects if getattr(obj, field)}
+    pending = [obj for obj in objects if not getattr(obj, field)]
+    # Несохраненные объекты модели нехешируемы, поэтому базовые slug хранятся списком
+    bases = [make_base_slug(getattr(obj, source), fallback=fallback) for obj in pending]
+
+    # Базы, которые начинаются с другой базы пачки, уже покрыты ее условием startswith
+    prefixes = []
+    for base in sorted(set(bases)):
+        if not prefixes or not base.startswith(prefixes[-1]):
+            prefixes.append(base)
+
+    for start in range(0, len(prefixes), BULK_QUERY_CHUNK):
+        condition = Q()
+        for prefix in prefixes[start : start + BULK_QUERY_CHUNK]:
+            condition |= Q(**{f"{field}__startswith": prefix})
+        taken.update(model._default_manager.filter(condition).order_by().values_list(field, flat=True))
+
+    for obj, base in zip(pending, bases):
+        slug = _pick_free(base, taken)
+        setattr(obj, field, slug)
+        taken.add(slug)
+    return objects
@@ -0,0 +1,204 @@
+"""
+Синхронизация каталога услуг с прайс-листом лаборатории.
+
+Строки прайс-листа читаются потоком и обрабатываются пачками: каждая пачка
+сравнивается с текущим каталогом в памяти и применяется через bulk_create/bulk_update.
+Вся синхронизация выполняется в одной транзакции. Услуги, отсутствующие
+во входных данных, деактивируются.
+
+Поля строки: code (код лаборатории), slug, name, category, description, price.
+Услуга сопоставляется по коду, затем по slug, затем по slug, построенному из названия.
+Slug существующих услуг при синхронизации не меняется, чтобы не ломать ссылки.
+"""
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .catalog import invalidate_catalog
+from .models import Service, ServiceCategory
+from .normalization import normalize_for_search
+from .slugs import assign_slugs, make_base_slug
+
+DEFAULT_CHUNK_SIZE = 500
+
+SYNC_FIELDS = ["name", "search_translit", "category_id", "description", "price", "external_code", "is_active"]
+
+
+class SyncError(Exception):
+    """Ошибка во входных данных"""
+
+
+class SyncReport:
+    """Итоги синхронизации"""
+
+    def __init__(self):
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.deactivated = 0
+        self.categories_created = 0
+        self.elapsed = 0.0
+
+    @property
+    def processed(self):
+        return self.inserted + self.updated + self.unchanged
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(stream, fmt):
+    """Итератор строк прайс-листа: csv, jsonl (построчно) или json (массив объектов)"""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    elif fmt == "jsonl":
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == "json":
+        # Стандартный json не умеет читать массив потоком; для больших файлов используйте jsonl
+        yield from json.load(stream)
+    else:
+        raise SyncError(f"Неизвестный формат: {fmt}")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _clean(value):
+    return str(value).strip() if value is not None else ""
+
+
+def parse_row(row, line):
+    """Проверяет и нормализует строку прайс-листа"""
+    name = _clean(row.get("name"))
+    category = _clean(row.get("category"))
+    if not name or not category:
+        raise SyncError(f"Строка {line}: не указано название услуги или категория")
+    try:
+        price = Decimal(_clean(row.get("price")).replace(",", ".").replace(" ", ""))
+    except InvalidOperation:
+        raise SyncError(f"Строка {line}: некорректная цена {row.get('price')!r}") from None
+    if price < 0:
+        raise SyncError(f"Строка {line}: отрицательная цена")
+    return {
+        "external_code": _clean(row.get("code")) or None,
+        "slug": _clean(row.get("slug")),
+        "name": name,
+        "category": category,
+        "description": _clean(row.get("description")),
+        "price": price.quantize(Decimal("0.01")),
+    }
+
+
+class CatalogSync:
+    """Сравнение входных строк с каталогом и применение изменений"""
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, deactivate_missing=True):
+        self.chunk_size = chunk_size
+        self.deactivate_missing = deactivate_missing
+        self.report = SyncReport()
+        self.services = list(Service.objects.order_by())
+        self.by_code = {service.external_code: service for service in self.services if service.external_code}
+        self.by_slug = {service.slug: service for service in self.services}
+        self.categories = {category.name: category for category in ServiceCategory.objects.order_by()}
+        self.seen = set()
+        self.seen_keys = set()
+
+    def run(self, rows):
+        started = time.monotonic()
+        with transaction.atomic():
+            line = 1
+            for chunk in chunked(rows, self.chunk_size):
+                parsed = []
+                for row in chunk:
+                    line += 1
+                    parsed.append(parse_row(row, line))
+                self.apply_chunk(parsed)
+            if self.deactivate_missing:
+                self.deactivate()
+            # bulk-операции не отправляют сигналы; теги всех категорий, а не каждой услуги - их немного
+            invalidate_catalog(category_ids=[category.pk for category in self.categories.values()])
+        self.report.elapsed = time.monotonic() - started
+        return self.report
+
+    def match(self, data):
+        key = data["external_code"] or data["slug"] or make_base_slug(data["name"])
+        if key in self.seen_keys:
+            raise SyncError(f"Повторяющаяся услуга во входных данных: {key}")
+        self.seen_keys.add(key)
+
+        if data["external_code"] and data["external_code"] in self.by_code:
+            return self.by_code[data["external_code"]]
+        return self.by_slug.get(data["slug"] or make_base_slug(data["name"]))
+
+    def ensure_categories(self, names):
+        missing = [ServiceCategory(name=name) for name in dict.fromkeys(names) if name not in self.categories]
+        if missing:
+            ServiceCategory.objects.bulk_create(assign_slugs(missing))
+            self.categories.update((category.name, category) for category in missing)
+            self.report.categories_created += len(missing)
+
+    def apply_chunk(self, parsed):
+        self.ensure_categories(data["category"] for data in parsed)
+        now = timezone.now()
+        to_create = []
+        to_update = []
+
+        for data in parsed:
+            values = {
+                "name": data["name"],
+                "search_translit": normalize_for_search(data["name"]),
+                "category_id": self.categories[data["category"]].pk,
+                "description": data["description"],
+                "price": data["price"],
+                "external_code": data["external_code"],
+                "is_active": True,
+            }
+            service = self.match(data)
+            if service is None:
+                to_create.append(Service(slug=data["slug"], **values))
+                continue
+
+            self.seen.add(service.pk)
+            if not data["external_code"]:
+                # Без кода в строке сохраняем уже известный код услуги
+                values["external_code"] = service.external_code
+            if all(getattr(service, field) == value for field, value in values.items()):
+                self.report.unchanged += 1
+                continue
+            for field, value in values.items():
+                setattr(service, field, value)
+            service.updated_at = now
+            to_update.append(service)
+
+        if to_create:
+            Service.objects.bulk_create(assign_slugs(to_create))
+            for service in to_create:
+                self.seen.add(service.pk)
+                self.by_slug[service.slug] = service
+                if service.external_code:
+                    self.by_code[service.external_code] = service
+            self.report.inserted += len(to_create)
+        if to_update:
+            Service.objects.bulk_update(to_update, SYNC_FIELDS + ["updated_at"])
+            self.report.updated += len(to_update)
+
+    def deactivate(self):
+        missing = [service.pk for service in self.services if service.is_active and service.pk not in self.seen]
+        for chunk in chunked(missing, self.chunk_size):
+            self.report.deactivated += Service.objects.filter(pk__in=chunk).update(is_active=False, updated_at=timezone.now())
+
+
+def sync_services(rows, chunk_size=DEFAULT_CHUNK_SIZE, deactivate_missing=True):
+    """Синхронизирует каталог с итератором строк прайс-листа"""
+    return CatalogSync(chunk_size=chunk_size, deactivate_missing=deactivate_missing).run(rows)
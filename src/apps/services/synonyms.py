@@ -0,0 +1,64 @@
+"""
+Синонимы и сокращения для поиска услуг.
+
+Словарь редактируется в админке (модель SearchSynonym) и при построении снимка каталога
+компилируется в таблицу замен: фраза -> равнозначные фразы. Запрос "МРТ головы"
+превращается в несколько вариантов ("МРТ головы", "магнитно-резонансная томография головы"),
+которые поиск объединяет через OR. Таблица живет в снимке каталога, поэтому
+разбор запроса не обращается к БД, а изменения словаря обновляют ее во всех воркерах.
+Фразы словаря находятся и в транслитерации: "mrt" раскрывается так же, как "МРТ".
+"""
+import re
+from itertools import islice, product
+
+from .normalization import normalize_for_search
+from .trigrams import split_words
+
+# Сколько вариантов запроса (вместе с исходным) передается в поиск
+MAX_EXPANSIONS = 8
+
+SEPARATOR_RE = re.compile(r"[\n,;]")
+
+
+def split_phrases(text):
+    """Фразы из текстового поля: по одной на строку или через запятую"""
+    return [phrase.strip() for phrase in SEPARATOR_RE.split(text) if phrase.strip()]
+
+
+class SynonymTable:
+    """Скомпилированный словарь: кортеж слов фразы -> кортежи слов ее синонимов"""
+
+    def __init__(self, groups=()):
+        self.table = {}
+        for group in groups:
+            phrases = list(dict.fromkeys(phrase for phrase in (tuple(split_words(text)) for text in group) if phrase))
+            for phrase in phrases:
+                for key in dict.fromkeys([phrase, tuple(normalize_for_search(" ".join(phrase)).split())]):
+                    alternatives = self.table.setdefault(key, [])
+                    alternatives.extend(other for other in phrases if other != key and other not in alternatives)
+        self.max_length = max(map(len, self.table), default=0)
+
+    def segments(self, words):
+        """Разбивает слова на фразы словаря (самые длинные совпадения) и одиночные слова"""
+        position = 0
+        while position < len(words):
+            for length in range(min(self.max_length, len(words) - position), 0, -1):
+                phrase = tuple(words[position : position + length])
+                if phrase in self.table:
+                    yield [phrase, *self.table[phrase]]
+                    position += length
+                    break
+            else:
+                yield [(words[position],)]
+                position += 1
+
+    def expand(self, text, limit=MAX_EXPANSIONS):
+        """Текст и его варианты с заменой терминов на синонимы; исходный текст первый"""
+        if not self.table:
+            return [text]
+        combinations = product(*self.segments(split_words(text)))
+        # Первая комбинация - исходные слова, вместо нее оставляем текст как есть
+        variants = [
+            " ".join(word for phrase in combination for word in phrase) for combination in islice(combinations, 1, limit)
+        ]
+        return [text, *variants]
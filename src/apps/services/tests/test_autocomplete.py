@@ -0,0 +1,141 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.services import catalog
+from apps.services.autocomplete import PrefixIndex
+from apps.services.catalog import CatalogSnapshot, get_catalog_version
+from apps.services.models import SearchSynonym, Service, ServiceCategory
+from apps.services.views import ServiceAutocompleteView
+
+# Wall-clock latency depends on the machine: the 5 ms target is checked only in performance
+# runs (RUN_BENCHMARKS=1), the regular suite keeps a loose bound
+LATENCY_BOUND = 0.005 if os.environ.get("RUN_BENCHMARKS") else 0.1
+
+
+class PrefixIndexTest(SimpleTestCase):
+    def setUp(self):
+        self.index = PrefixIndex(
+            [
+                (["Диагностика"], "diagnostics"),
+                (["МРТ головного мозга"], "mri-brain"),
+                (["МРТ коленного сустава"], "mri-knee"),
+                (["УЗИ брюшной полости"], "ultrasound"),
+                (["Маммография"], "mammography"),
+                (["Допплерография мочевого пузыря"], "doppler"),
+            ]
+        )
+
+    def test_prefix(self):
+        self.assertEqual(self.index.suggest("мрт"), ["mri-brain", "mri-knee"])
+        self.assertEqual(self.index.suggest("МРТ  кол"), ["mri-knee"])
+        self.assertEqual(self.index.suggest("кт"), [])
+
+    def test_start_of_name_goes_first(self):
+        """Test that a match at the start of the name outranks a match in the middle"""
+        self.assertEqual(self.index.suggest("м", limit=3), ["mammography", "mri-brain", "mri-knee"])
+        self.assertEqual(self.index.suggest("м", limit=4), ["mammography", "mri-brain", "mri-knee", "doppler"])
+
+    def test_translit_and_layout(self):
+        self.assertEqual(self.index.suggest("uzi"), ["ultrasound"])
+        self.assertEqual(self.index.suggest("lbfu"), ["diagnostics"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.suggest("м", limit=2)), 2)
+
+
+class ServiceAutocompleteViewTest(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        self.mri = Service.objects.create(category=self.category, name="МРТ головного мозга", price=5000)
+        Service.objects.create(category=self.category, name="МРТ позвоночника", price=5000, is_active=False)
+
+    def test_suggestions(self):
+        response = self.client.get(reverse("services:autocomplete"), {"q": "мрт"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["suggestions"],
+            [
+                {
+                    "type": "service",
+                    "name": "МРТ головного мозга",
+                    "slug": self.mri.slug,
+                    "category": "Диагностика",
+                    "url": reverse("services:detail", args=[self.mri.slug]),
+                }
+            ],
+        )
+
+    def test_category_suggestion(self):
+        suggestions = self.client.get(reverse("services:autocomplete"), {"q": "диаг"}).json()["suggestions"]
+        self.assertEqual([(item["type"], item["slug"]) for item in suggestions], [("category", self.category.slug)])
+
+    def test_synonyms(self):
+        """Test that a service is suggested by an abbreviation of its name"""
+        service = Service.objects.create(category=self.category, name="Электрокардиография в покое", price=1000)
+        SearchSynonym.objects.create(term="ЭКГ", synonyms="электрокардиография")
+        suggestions = self.client.get(reverse("services:autocomplete"), {"q": "экг в"}).json()["suggestions"]
+        self.assertEqual([item["slug"] for item in suggestions], [service.slug])
+
+    def test_index_follows_changes(self):
+        """Test that a renamed service is suggested by its new name"""
+        self.mri.name = "КТ головного мозга"
+        self.mri.save()
+        self.assertEqual(self.client.get(reverse("services:autocomplete"), {"q": "мрт"}).json()["suggestions"], [])
+        suggestions = self.client.get(reverse("services:autocomplete"), {"q": "кт"}).json()["suggestions"]
+        self.assertEqual([item["slug"] for item in suggestions], [self.mri.slug])
+
+    def test_no_queries(self):
+        """Test that suggestions are served from the catalog snapshot"""
+        self.client.get(reverse("services:autocomplete"), {"q": "мрт"})
+        with self.assertNumQueries(0):
+            self.client.get(reverse("services:autocomplete"), {"q": "мозг"})
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.client.get(reverse("services:autocomplete")).json()["suggestions"], [])
+        self.assertEqual(self.client.get(reverse("services:autocomplete"), {"q": "мрт", "limit": "x"}).status_code, 400)
+
+
+class AutocompleteBenchmarkTest(SimpleTestCase):
+    def test_large_catalog_latency(self):
+        """
+        Test p99 wall-clock latency of the endpoint on a 10k catalog under concurrent requests.
+        Requests come from 4 threads, as a gthread worker with 4 threads serves them;
+        the 5 ms target is checked with RUN_BENCHMARKS=1.
+        """
+        stems = ["Анализ", "Исследование", "Консультация", "Рентген", "Томография", "Биопсия", "Кардиограмма"]
+        organs = ["крови", "печени", "почек", "сердца", "легких", "щитовидной", "желудка", "суставов"]
+        categories = [ServiceCategory(pk=i + 1, name=stem, slug=f"category-{i}") for i, stem in enumerate(stems)]
+        services = [
+            Service(
+                pk=i + 1,
+                category=categories[i % len(stems)],
+                name=f"{stems[i % len(stems)]} {organs[i // len(stems) % len(organs)]} вариант {i}",
+                slug=f"service-{i}",
+                price=Decimal("1000.00"),
+            )
+            for i in range(10000)
+        ]
+        snapshot = CatalogSnapshot(get_catalog_version(), categories, services)
+        snapshot.autocomplete_index
+        catalog._snapshot = snapshot
+
+        view = ServiceAutocompleteView.as_view()
+        factory = RequestFactory()
+        queries = ["а", "ан", "анализ кр", "рентген", "kons", "ctplwf", "вариант 99", "печ", "томография сердца в"]
+
+        def request(query):
+            started = time.perf_counter()
+            response = view(factory.get("/services/autocomplete/", {"q": query}))
+            elapsed = time.perf_counter() - started
+            self.assertEqual(response.status_code, 200)
+            return elapsed
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            latencies = sorted(executor.map(request, queries * 200))
+
+        self.assertLess(latencies[int(len(latencies) * 0.99)], LATENCY_BOUND)
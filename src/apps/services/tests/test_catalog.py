@@ -0,0 +1,60 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.services.catalog import get_catalog
+from apps.services.models import Service, ServiceCategory
+
+
+class CatalogSnapshotTests(TestCase):
+    """Тесты снимка каталога"""
+
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Диагностика", description="Диагностические услуги", order=1)
+        self.service = Service.objects.create(
+            category=self.category,
+            name="УЗИ брюшной полости",
+            description="Ультразвуковое исследование органов брюшной полости",
+            price=2500.00,
+        )
+        self.other = Service.objects.create(
+            category=self.category, name="МРТ", description="Магнитно-резонансная томография", price=5000.00
+        )
+
+    def test_catalog_pages_without_queries(self):
+        """Тест: прогретые страницы каталога не выполняют SQL-запросов"""
+        urls = [
+            reverse("services:list"),
+            reverse("services:list") + f"?category={self.category.pk}",
+            reverse("services:search"),
+            reverse("services:detail", args=[self.service.slug]),
+        ]
+        self.client.get(urls[0])
+
+        for url in urls:
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_detail_other_services(self):
+        """Тест списка других услуг категории на странице услуги"""
+        response = self.client.get(reverse("services:detail", args=[self.service.slug]))
+        self.assertEqual(response.context["other_services"], [self.other])
+
+    def test_save_invalidates_snapshot(self):
+        """Тест: изменение услуги перестраивает снимок"""
+        snapshot = get_catalog()
+        self.other.is_active = False
+        self.other.save()
+
+        self.assertIsNot(get_catalog(), snapshot)
+        self.assertEqual(get_catalog().get_services(), [self.service])
+        response = self.client.get(reverse("services:detail", args=[self.other.slug]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_category_delete_invalidates_snapshot(self):
+        """Тест: удаление категории убирает ее услуги из снимка"""
+        get_catalog()
+        self.category.delete()
+
+        self.assertEqual(get_catalog().categories, ())
+        self.assertEqual(get_catalog().get_services(), [])
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.services.facets import Facets, price_bucket, toggle_url
+from apps.services.models import Service, ServiceCategory
+
+
+class FacetHelpersTest(SimpleTestCase):
+    def test_price_bucket(self):
+        self.assertEqual(price_bucket(Decimal("500")), "0-1000")
+        self.assertEqual(price_bucket(Decimal("1000")), "1000-3000")
+        self.assertEqual(price_bucket(Decimal("12000")), "5000-")
+
+    def test_toggle_url(self):
+        params = QueryDict("q=мрт&category=1&page=3")
+        self.assertEqual(QueryDict(toggle_url(params, "category", "2")[1:]).getlist("category"), ["1", "2"])
+        self.assertEqual(QueryDict(toggle_url(params, "category", "1")[1:]).getlist("category"), [])
+        self.assertNotIn("page", QueryDict(toggle_url(params, "price", "5000-")[1:]))
+
+
+class FacetsTest(TestCase):
+    def setUp(self):
+        self.analyses = ServiceCategory.objects.create(name="Анализы", order=1)
+        self.diagnostics = ServiceCategory.objects.create(name="Диагностика", order=2)
+        self.empty = ServiceCategory.objects.create(name="Консультации", order=3)
+        self.blood = Service.objects.create(category=self.analyses, name="Анализ крови", price=500)
+        self.hormones = Service.objects.create(category=self.analyses, name="Гормоны", price=2500)
+        self.ultrasound = Service.objects.create(category=self.diagnostics, name="УЗИ", price=2500)
+        self.mri = Service.objects.create(category=self.diagnostics, name="МРТ", price=6000)
+
+    def get(self, **params):
+        query = QueryDict(mutable=True)
+        for name, values in params.items():
+            query.setlist(name, values)
+        return self.client.get(reverse("services:list"), query)
+
+    def counts(self, options):
+        return {option.label: option.count for option in options}
+
+    def test_counts_without_filters(self):
+        facets = self.get().context["facets"]
+        self.assertEqual(self.counts(facets.categories), {"Анализы": 2, "Диагностика": 2})
+        self.assertEqual(
+            self.counts(facets.prices), {"до 1 000 ₽": 1, "1 000 – 3 000 ₽": 2, "3 000 – 5 000 ₽": 0, "от 5 000 ₽": 1}
+        )
+
+    def test_combined_filters(self):
+        """Test that values of one facet are ORed and different facets are ANDed"""
+        response = self.get(category=[str(self.analyses.pk), str(self.diagnostics.pk)], price=["1000-3000"])
+        self.assertEqual(list(response.context["services"]), [self.hormones, self.ultrasound])
+
+        response = self.get(category=[str(self.diagnostics.pk)], price=["1000-3000", "5000-"])
+        self.assertEqual(list(response.context["services"]), [self.mri, self.ultrasound])
+
+    def test_counts_ignore_own_facet(self):
+        """Test that each facet is counted with the filters of the other facets only"""
+        facets = self.get(category=[str(self.analyses.pk)], price=["0-1000"]).context["facets"]
+        self.assertEqual(self.counts(facets.categories), {"Анализы": 1})
+        self.assertEqual(self.counts(facets.prices)["1 000 – 3 000 ₽"], 1)
+        self.assertEqual([option.label for option in facets.selected], ["Анализы", "до 1 000 ₽"])
+        self.assertEqual(facets.selected_categories, [self.analyses])
+
+    def test_no_queries(self):
+        self.get()
+        with self.assertNumQueries(0):
+            self.get(category=[str(self.analyses.pk)], price=["0-1000"])
+
+    def test_invalid_values_are_ignored(self):
+        self.assertEqual(len(self.get(category=["x"], price=["cheap"]).context["services"]), 4)
+
+    def test_search_results_are_faceted(self):
+        response = self.client.get(reverse("services:search"), {"q": "узи", "price": "1000-3000"})
+        self.assertEqual(list(response.context["services"]), [self.ultrasound])
+        self.assertEqual(self.counts(response.context["facets"].categories), {"Диагностика": 1})
+
+    def test_pagination_keeps_filters(self):
+        Service.objects.bulk_create(
+            [Service(category=self.analyses, name=f"Анализ {i}", slug=f"analiz-{i}", price=100) for i in range(10)]
+        )
+        response = self.get(category=[str(self.analyses.pk)])
+        self.assertContains(response, f"?page=2&category={self.analyses.pk}")
+
+    def test_page_numbers_are_elided(self):
+        Service.objects.bulk_create(
+            [Service(category=self.analyses, name=f"Анализ {i}", slug=f"analiz-{i}", price=100) for i in range(200)]
+        )
+        response = self.get()
+        self.assertContains(response, "…")
+        self.assertContains(response, "?page=23")
+        self.assertNotContains(response, "?page=12&")
+
+    def test_facets_built_in_python(self):
+        facets = Facets([self.blood, self.mri], [self.analyses, self.diagnostics], QueryDict("price=5000-"))
+        self.assertEqual(facets.services, [self.mri])
+        self.assertEqual(facets.prices[3].url, "?")
+        self.assertEqual(QueryDict(facets.prices[0].url[1:]).getlist("price"), ["5000-", "0-1000"])
+        self.assertEqual(facets.reset_url, "?")
@@ -182,3 +182,79 @@ class ServiceModelTest(TestCase):
 
         # Slug должен остаться прежним
         self.assertEqual(service.slug, original_slug)
+
+
+class ServiceChangeTrackingTest(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Диагностика")
+        Service.objects.create(category=self.category, name="УЗИ", description="Test", price=1000)
+
+    def test_update_without_name_change(self):
+        """Test that saving a loaded service writes only changed columns without a SELECT"""
+        service = Service.objects.get(name="УЗИ")
+        service.price = 1500
+
+        with self.assertNumQueries(1) as context:
+            service.save()
+
+        sql = context.captured_queries[0]["sql"]
+        self.assertTrue(sql.startswith("UPDATE"))
+        self.assertIn('"price"', sql)
+        self.assertIn('"updated_at"', sql)
+        self.assertNotIn('"description"', sql)
+        self.assertEqual(Service.objects.get(pk=service.pk).price, 1500)
+
+    def test_name_change_regenerates_slug(self):
+        """Test that a name change is detected without re-reading the row"""
+        service = Service.objects.get(name="УЗИ")
+        service.name = "МРТ"
+
+        with self.assertNumQueries(2):  # подбор slug и UPDATE
+            service.save()
+
+        self.assertEqual(Service.objects.get(pk=service.pk).slug, "mrt")
+        self.assertEqual(service.get_dirty_fields(), [])
+
+    def test_name_update_fields_save_derived_fields(self):
+        """Test that save(update_fields=["name"]) also stores the slug and the search form"""
+        service = Service.objects.get(name="УЗИ")
+        service.name = "МРТ"
+        service.save(update_fields=["name"])
+
+        stored = Service.objects.get(pk=service.pk)
+        self.assertEqual((stored.slug, stored.search_translit), ("mrt", "mrt"))
+
+    def test_instance_without_loaded_values(self):
+        """Test that an instance saved by bulk_create is compared with the stored row"""
+        service = Service(category=self.category, name="МРТ", slug="mrt", description="Test", price=1000)
+        Service.objects.bulk_create([service])
+        service.description = "Новое"
+
+        self.assertFalse(service.has_changed("name"))
+        self.assertTrue(service.has_changed("description"))
+        service.save()
+        self.assertEqual(Service.objects.get(pk=service.pk).slug, "mrt")
+        self.assertEqual(Service.objects.get(pk=service.pk).description, "Новое")
+
+    def test_clone_is_inserted(self):
+        """Test that a loaded instance with a cleared pk is saved as a new row"""
+        service = Service.objects.get(name="УЗИ")
+        service.pk = None
+        service.name = "УЗИ щитовидной железы"
+        service.save()
+
+        self.assertEqual(Service.objects.filter(name__startswith="УЗИ").count(), 2)
+        category = ServiceCategory.objects.get(pk=self.category.pk)
+        category.pk = None
+        category.name = "Копия"
+        category.save()
+        self.assertEqual(ServiceCategory.objects.count(), 2)
+
+    def test_deleted_row_is_recreated(self):
+        """Test that saving an instance whose row was deleted inserts it again"""
+        service = Service.objects.get(name="УЗИ")
+        Service.objects.filter(pk=service.pk).delete()
+        service.price = 1500
+        service.save()
+
+        self.assertEqual(Service.objects.get(pk=service.pk).price, 1500)
@@ -0,0 +1,237 @@
+import time
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from apps.services.catalog import get_catalog
+from apps.services.models import SearchSynonym, Service, ServiceCategory
+from apps.services.normalization import normalize_for_search, query_variants, swap_layout
+from apps.services.search import fuzzy_search_service_ids, search_service_ids, strip_ending
+from apps.services.synonyms import SynonymTable
+from apps.services.trigrams import TrigramIndex, similarity
+
+
+class ServiceSearchTest(TestCase):
+    def setUp(self):
+        self.analyses = ServiceCategory.objects.create(name="Анализы")
+        self.diagnostics = ServiceCategory.objects.create(name="Диагностика")
+        self.blood = Service.objects.create(
+            category=self.analyses, name="Общий анализ крови", description="Забор крови из вены", price=500
+        )
+        self.ultrasound = Service.objects.create(
+            category=self.diagnostics,
+            name="УЗИ брюшной полости",
+            description="Исследование органов брюшной полости, анализ размеров печени",
+            price=2500,
+        )
+        self.mri = Service.objects.create(
+            category=self.diagnostics, name="МРТ головного мозга", description="Томография", price=5000
+        )
+
+    def test_word_forms(self):
+        """Test that inflected forms of a word are found"""
+        self.assertEqual(strip_ending("анализы"), "анализ")
+        self.assertIn(self.blood.pk, search_service_ids("анализы"))
+        self.assertEqual(search_service_ids("кровь"), [self.blood.pk])
+
+    def test_multiple_terms(self):
+        """Test that all terms of the query must match"""
+        self.assertEqual(search_service_ids("мрт мозга"), [self.mri.pk])
+        self.assertEqual(search_service_ids("мрт крови"), [])
+
+    def test_ranking_by_field_weight(self):
+        """Test that a match in the name outranks a match in the description"""
+        self.assertEqual(search_service_ids("анализ"), [self.blood.pk, self.ultrasound.pk])
+
+    def test_category_match(self):
+        """Test that the category name is searchable and kept current"""
+        self.assertEqual(sorted(search_service_ids("диагностика")), sorted([self.ultrasound.pk, self.mri.pk]))
+
+        self.diagnostics.name = "Лучевая диагностика"
+        self.diagnostics.save()
+        self.assertEqual(sorted(search_service_ids("лучевая")), sorted([self.ultrasound.pk, self.mri.pk]))
+
+    def test_index_follows_bulk_changes(self):
+        """Test that bulk updates and deletes are reflected in the index"""
+        name = "КТ головного мозга"
+        Service.objects.filter(pk=self.mri.pk).update(name=name, search_translit=normalize_for_search(name))
+        self.assertEqual(search_service_ids("мрт"), [])
+        self.assertEqual(search_service_ids("кт"), [self.mri.pk])
+
+        self.blood.delete()
+        self.assertEqual(search_service_ids("крови"), [])
+
+    def test_query_syntax_is_escaped(self):
+        """Test that FTS operators in user input are treated as text"""
+        self.assertEqual(search_service_ids('"OR* NEAR('), [])
+        self.assertEqual(search_service_ids("   "), [])
+
+    def test_search_view(self):
+        """Test that the search view lists active services by relevance"""
+        self.ultrasound.is_active = False
+        self.ultrasound.save()
+
+        response = self.client.get(reverse("services:search"), {"q": "анализ"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["services"]), [self.blood])
+
+
+class TranslitSearchTest(TestCase):
+    def setUp(self):
+        category = ServiceCategory.objects.create(name="Диагностика")
+        self.mri = Service.objects.create(category=category, name="МРТ головного мозга", price=5000)
+        self.ultrasound = Service.objects.create(category=category, name="УЗИ брюшной полости", price=2500)
+
+    def test_normalization(self):
+        self.assertEqual(normalize_for_search("МРТ (головного) мозга!"), "mrt golovnogo mozga")
+        self.assertEqual(swap_layout("vhn"), "мрт")
+        self.assertEqual(swap_layout("ьке"), "mrt")
+        self.assertEqual(query_variants("мрт"), ["mrt", "vhn"])
+
+    def test_translit_is_stored_on_save(self):
+        self.mri.name = "МРТ позвоночника"
+        self.mri.save()
+        self.mri.refresh_from_db()
+        self.assertEqual(self.mri.search_translit, "mrt pozvonochnika")
+
+    def test_latin_query(self):
+        """Test that a transliterated query finds a Cyrillic name"""
+        self.assertEqual(search_service_ids("mrt"), [self.mri.pk])
+        self.assertEqual(search_service_ids("uzi bryushnoy"), [self.ultrasound.pk])
+
+    def test_wrong_keyboard_layout(self):
+        """Test that a query typed in the wrong keyboard layout is found"""
+        self.assertEqual(search_service_ids("vhn"), [self.mri.pk])
+        self.assertEqual(search_service_ids("epb"), [self.ultrasound.pk])
+
+    def test_fuzzy_translit(self):
+        """Test that typos are tolerated in a transliterated query"""
+        self.assertEqual(search_service_ids("golovnovo"), [])
+        self.assertEqual(fuzzy_search_service_ids("golovnovo mozga"), [self.mri.pk])
+
+
+class SynonymSearchTest(TestCase):
+    def setUp(self):
+        category = ServiceCategory.objects.create(name="Диагностика")
+        self.mri = Service.objects.create(
+            category=category, name="Магнитно-резонансная томография головного мозга", price=5000
+        )
+        self.ecg = Service.objects.create(category=category, name="Электрокардиография", price=1000)
+        SearchSynonym.objects.create(term="МРТ", synonyms="Магнитно-резонансная томография")
+        SearchSynonym.objects.create(term="ЭКГ", synonyms="электрокардиограмма, электрокардиография")
+        SearchSynonym.objects.create(term="головы", synonyms="головного мозга")
+
+    def test_abbreviation(self):
+        self.assertEqual(search_service_ids("мрт"), [self.mri.pk])
+        self.assertEqual(search_service_ids("экг"), [self.ecg.pk])
+        self.assertEqual(search_service_ids("МРТ головы"), [self.mri.pk])
+
+    def test_translit_abbreviation(self):
+        self.assertEqual(search_service_ids("mrt"), [self.mri.pk])
+
+    def test_fuzzy_abbreviation(self):
+        self.assertEqual(fuzzy_search_service_ids("мрт галовы"), [self.mri.pk])
+
+    def test_no_queries_for_expansion(self):
+        """Test that the compiled table is taken from the catalog snapshot"""
+        get_catalog()
+        with self.assertNumQueries(1):
+            search_service_ids("мрт головы")
+
+    def test_dictionary_changes(self):
+        """Test that editing the dictionary rebuilds the compiled table"""
+        self.assertEqual(search_service_ids("кардиограмма"), [])
+        synonym = SearchSynonym.objects.get(term="ЭКГ")
+        synonym.synonyms += "\nкардиограмма"
+        synonym.save()
+        self.assertEqual(search_service_ids("кардиограмма"), [self.ecg.pk])
+
+        synonym.is_active = False
+        synonym.save()
+        self.assertEqual(search_service_ids("экг"), [])
+
+    def test_search_view(self):
+        response = self.client.get(reverse("services:search"), {"q": "ЭКГ"})
+        self.assertEqual(list(response.context["services"]), [self.ecg])
+
+
+class SynonymTableTest(SimpleTestCase):
+    def setUp(self):
+        self.table = SynonymTable(
+            [
+                ["МРТ", "магнитно-резонансная томография"],
+                ["КТ", "компьютерная томография"],
+                ["головы", "головного мозга"],
+            ]
+        )
+
+    def test_expand(self):
+        self.assertEqual(self.table.expand("узи почек"), ["узи почек"])
+        self.assertEqual(
+            self.table.expand("МРТ головы"),
+            [
+                "МРТ головы",
+                "мрт головного мозга",
+                "магнитно резонансная томография головы",
+                "магнитно резонансная томография головного мозга",
+            ],
+        )
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual(self.table.expand("магнитно-резонансная томография"), ["магнитно-резонансная томография", "мрт"])
+
+    def test_limit(self):
+        self.assertEqual(len(self.table.expand("мрт кт головы", limit=3)), 3)
+
+    def test_empty_table(self):
+        self.assertEqual(SynonymTable().expand("мрт"), ["мрт"])
+
+
+class FuzzySearchTest(TestCase):
+    def setUp(self):
+        category = ServiceCategory.objects.create(name="Диагностика")
+        self.ultrasound = Service.objects.create(
+            category=category, name="УЗИ брюшной полости", description="Ультразвук", price=2500
+        )
+        self.xray = Service.objects.create(category=category, name="Рентген грудной клетки", description="Снимок", price=1200)
+        self.ecg = Service.objects.create(category=category, name="ЭКГ", description="Кардиограмма", price=900)
+
+    def test_typos(self):
+        """Test that names with typos are found and ordered by similarity"""
+        self.assertEqual(fuzzy_search_service_ids("узи брюшнй"), [self.ultrasound.pk])
+        self.assertEqual(fuzzy_search_service_ids("ренген"), [self.xray.pk])
+        self.assertEqual(fuzzy_search_service_ids("гастроскопия"), [])
+
+    def test_threshold(self):
+        """Test the configurable similarity threshold"""
+        self.assertEqual(fuzzy_search_service_ids("ренген", threshold=0.9), [])
+        with self.settings(MEDICAL_CENTER_SETTINGS={"SEARCH_SETTINGS": {"TRIGRAM_THRESHOLD": 0.9}}):
+            self.assertEqual(fuzzy_search_service_ids("ренген"), [])
+
+    def test_search_view_falls_back_to_fuzzy(self):
+        """Test that the search view finds services despite typos"""
+        response = self.client.get(reverse("services:search"), {"q": "ренген"})
+        self.assertEqual(list(response.context["services"]), [self.xray])
+
+
+class TrigramIndexTest(SimpleTestCase):
+    def test_similarity(self):
+        """Test trigram similarity of words"""
+        self.assertEqual(similarity("узи", "узи"), 1.0)
+        self.assertEqual(similarity("ренген", "рентген"), 0.5)
+
+    def test_large_catalog_latency(self):
+        """Test that a lookup on a 10k catalog takes milliseconds"""
+        stems = ["анализ", "исследование", "консультация", "рентген", "томография", "биопсия", "кардиограмма"]
+        organs = ["крови", "печени", "почек", "сердца", "легких", "щитовидной", "желудка", "суставов"]
+        index = TrigramIndex(
+            (i, f"{stems[i % len(stems)]} {organs[i // len(stems) % len(organs)]} вариант{i}") for i in range(10000)
+        )
+
+        started = time.perf_counter()
+        for query in ["ренген легкх", "консультацыя", "анлиз крови", "томогрфия сердца"]:
+            self.assertTrue(index.search(query, threshold=0.3, limit=20))
+        elapsed = (time.perf_counter() - started) / 4
+
+        self.assertLess(elapsed, 0.05)
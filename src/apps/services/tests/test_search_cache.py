@@ -0,0 +1,86 @@
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.services.models import SearchQueryStat, Service, ServiceCategory
+from apps.services.search_cache import flush_search_stats, get_search_results, get_stats_flush_interval, normalize_query
+
+
+def flush_closed_stats():
+    """Переносит счетчики так, будто текущий интервал уже закрыт"""
+    return flush_search_stats(now=time.time() + 2 * get_stats_flush_interval())
+
+
+class SearchResultCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = ServiceCategory.objects.create(name="Анализы")
+        self.blood = Service.objects.create(category=self.category, name="Общий анализ крови", price=500)
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Анализ   КРОВИ "), "анализ крови")
+
+    def test_cached_results(self):
+        """Test that a repeated query with different case and spacing is served without SQL"""
+        self.assertEqual(get_search_results("анализ крови"), [self.blood.pk])
+        with self.assertNumQueries(0):  # статистика копится в кэше
+            self.assertEqual(get_search_results(" Анализ  крови"), [self.blood.pk])
+        with self.assertNumQueries(0):
+            get_search_results("анализ крови", record=False)
+
+    def test_invalidated_by_catalog_changes(self):
+        get_search_results("анализ")
+        urine = Service.objects.create(category=self.category, name="Общий анализ мочи", price=400)
+        self.assertEqual(sorted(get_search_results("анализ")), sorted([self.blood.pk, urine.pk]))
+
+    def test_statistics(self):
+        get_search_results("анализ крови")
+        get_search_results("Анализ крови")
+        get_search_results("анализ крови", record=False)
+        get_search_results("томография")
+        self.assertFalse(SearchQueryStat.objects.exists())
+
+        self.assertEqual(flush_closed_stats(), 2)
+        stat = SearchQueryStat.objects.get(query="анализ крови")
+        self.assertEqual((stat.search_count, stat.cache_hits, stat.zero_results), (2, 1, 0))
+        self.assertEqual(stat.cache_hit_rate, 0.5)
+        stat = SearchQueryStat.objects.get(query="томография")
+        self.assertEqual((stat.search_count, stat.cache_hits, stat.zero_results), (1, 0, 1))
+
+    def test_search_view_records_first_page_only(self):
+        Service.objects.bulk_create(
+            [Service(category=self.category, name=f"Анализ {i}", slug=f"analiz-{i}", price=100) for i in range(12)]
+        )
+        self.client.get(reverse("services:search"), {"q": "анализ"})
+        response = self.client.get(reverse("services:search"), {"q": "анализ", "page": 2})
+        self.assertEqual(len(response.context["services"]), 4)
+        flush_closed_stats()
+        self.assertEqual(SearchQueryStat.objects.get(query="анализ").search_count, 1)
+
+    def test_counts_are_flushed_once(self):
+        """Test that a closed interval is added to the statistics only once"""
+        get_search_results("анализ крови")
+        self.assertEqual(flush_closed_stats(), 1)
+        self.assertEqual(flush_closed_stats(), 0)
+        self.assertEqual(SearchQueryStat.objects.get(query="анализ крови").search_count, 1)
+
+    def test_flush_command_skips_current_interval(self):
+        get_search_results("анализ крови")
+        stdout = StringIO()
+        call_command("flush_search_stats", stdout=stdout)
+        self.assertIn("0", stdout.getvalue())
+        self.assertFalse(SearchQueryStat.objects.exists())
+
+    def test_admin_changelist(self):
+        get_search_results("анализ крови")
+        flush_closed_stats()
+        admin = get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+        self.client.force_login(admin)
+        response = self.client.get(reverse("admin:services_searchquerystat_changelist"))
+        self.assertContains(response, "анализ крови")
+        self.assertContains(response, "0%")
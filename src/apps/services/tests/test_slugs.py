@@ -0,0 +1,50 @@
+from django.test import TestCase
+
+from apps.services.models import Service, ServiceCategory
+from apps.services.slugs import allocate_slug, assign_slugs, make_base_slug
+
+
+class SlugAllocatorTest(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Анализы")
+
+    def make_service(self, name):
+        return Service(category=self.category, name=name, description="Описание", price=500)
+
+    def test_base_slug(self):
+        """Test transliteration and cleanup of the source text"""
+        self.assertEqual(make_base_slug("Щёки и Ёж_2!"), "shcheki-i-ezh2")
+        self.assertEqual(make_base_slug("!!!", fallback="service"), "service")
+
+    def test_collision_resolved_with_one_query(self):
+        """Test that the next free suffix is picked with a single query"""
+        for _ in range(5):
+            Service.objects.create(category=self.category, name="Анализ крови", description="Описание", price=500)
+
+        with self.assertNumQueries(1):
+            slug = allocate_slug(self.make_service("Анализ крови"), "Анализ крови")
+        self.assertEqual(slug, "analiz-krovi-5")
+
+    def test_freed_suffix_is_reused(self):
+        """Test that the lowest free suffix is used"""
+        services = [
+            Service.objects.create(category=self.category, name="Анализ крови", description="Описание", price=500)
+            for _ in range(3)
+        ]
+        services[1].delete()
+
+        self.assertEqual(allocate_slug(self.make_service("Анализ крови"), "Анализ крови"), "analiz-krovi-1")
+
+    def test_bulk_assign(self):
+        """Test unique slugs for a whole batch before bulk_create"""
+        Service.objects.create(category=self.category, name="Анализ крови", description="Описание", price=500)
+        batch = [self.make_service("Анализ крови") for _ in range(300)]
+        batch += [self.make_service(f"Анализ крови {i}") for i in range(300)]
+
+        with self.assertNumQueries(1):
+            assign_slugs(batch)
+        Service.objects.bulk_create(batch)
+
+        slugs = list(Service.objects.values_list("slug", flat=True))
+        self.assertEqual(len(slugs), 601)
+        self.assertEqual(len(set(slugs)), 601)
@@ -0,0 +1,110 @@
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.services.models import Service, ServiceCategory
+from apps.services.sync import SyncError, read_rows, sync_services
+
+
+def csv_stream(rows):
+    lines = ["code,name,category,description,price"]
+    lines += [",".join(str(value) for value in row) for row in rows]
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+class SyncServicesTest(TestCase):
+    def setUp(self):
+        self.category = ServiceCategory.objects.create(name="Анализы")
+        self.manual = Service.objects.create(category=self.category, name="Консультация", description="", price=900)
+
+    def test_insert_update_unchanged_and_deactivate(self):
+        """Test the full diff against the current catalog"""
+        first = [("A-1", "Анализ крови", "Анализы", "Общий", "500"), ("A-2", "Анализ мочи", "Анализы", "", "300")]
+        report = sync_services(read_rows(csv_stream(first), "csv"))
+
+        self.assertEqual((report.inserted, report.updated, report.unchanged, report.deactivated), (2, 0, 0, 1))
+        self.manual.refresh_from_db()
+        self.assertFalse(self.manual.is_active)
+
+        second = [("A-1", "Анализ крови", "Анализы", "Общий", "500"), ("A-2", "Анализ мочи", "Анализы", "", '"350,50"')]
+        report = sync_services(read_rows(csv_stream(second), "csv"))
+
+        self.assertEqual((report.inserted, report.updated, report.unchanged, report.deactivated), (0, 1, 1, 0))
+        self.assertEqual(Service.objects.get(external_code="A-2").price, Decimal("350.50"))
+        self.assertEqual(Service.objects.count(), 3)
+
+    def test_new_categories_and_slugs(self):
+        """Test that missing categories are created and slugs are unique"""
+        rows = [(f"K-{i}", "Анализ крови", "Новая категория", "", "100") for i in range(3)]
+        sync_services(read_rows(csv_stream(rows), "csv"), deactivate_missing=False)
+
+        category = ServiceCategory.objects.get(name="Новая категория")
+        self.assertEqual(category.slug, "novaya-kategoriya")
+        self.assertEqual(
+            sorted(category.services.values_list("slug", flat=True)),
+            ["analiz-krovi", "analiz-krovi-1", "analiz-krovi-2"],
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        """Test that a large price list is applied with a bounded number of queries"""
+        rows = [(f"L-{i}", f"Исследование {i}", "Анализы", "", i) for i in range(1000)]
+
+        with CaptureQueriesContext(connection) as context:
+            sync_services(read_rows(csv_stream(rows), "csv"), chunk_size=500)
+
+        # Несколько запросов на пачку (INSERT разбивается по лимиту параметров СУБД), а не на строку
+        self.assertLess(len(context.captured_queries), 50)
+
+        self.assertEqual(Service.objects.filter(is_active=True).count(), 1000)
+
+    def test_invalid_row_rolls_back(self):
+        """Test that an invalid row aborts the whole sync"""
+        rows = [("A-1", "Анализ крови", "Анализы", "", "500"), ("A-2", "Анализ мочи", "Анализы", "", "дорого")]
+
+        with self.assertRaises(SyncError):
+            sync_services(read_rows(csv_stream(rows), "csv"))
+
+        self.assertFalse(Service.objects.filter(external_code="A-1").exists())
+        self.manual.refresh_from_db()
+        self.assertTrue(self.manual.is_active)
+
+    def test_command_with_jsonl(self):
+        """Test the management command with JSON Lines input"""
+        path = self.make_file(
+            "\n".join(
+                json.dumps({"code": f"J-{i}", "name": f"Исследование {i}", "category": "Анализы", "price": 100})
+                for i in range(5)
+            )
+        )
+        out = StringIO()
+
+        call_command("sync_services", path, "--keep-missing", stdout=out)
+
+        self.assertIn("Добавлено: 5", out.getvalue())
+        self.assertEqual(Service.objects.filter(external_code__startswith="J-").count(), 5)
+        self.assertTrue(Service.objects.get(pk=self.manual.pk).is_active)
+
+    def test_command_dry_run_and_errors(self):
+        """Test --dry-run and error reporting"""
+        path = self.make_file(json.dumps({"code": "J-1", "name": "Исследование", "category": "Анализы", "price": 1}))
+
+        call_command("sync_services", path, "--dry-run", stdout=StringIO())
+        self.assertFalse(Service.objects.filter(external_code="J-1").exists())
+
+        with self.assertRaises(CommandError):
+            call_command("sync_services", path.replace(".jsonl", ".txt"), stdout=StringIO())
+
+    def make_file(self, content):
+        handle, path = tempfile.mkstemp(suffix=".jsonl")
+        with os.fdopen(handle, "w", encoding="utf-8") as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
@@ -0,0 +1,93 @@
+"""
+Нечеткий поиск по триграммам.
+
+Триграммы строятся так же, как в pg_trgm: каждое слово в нижнем регистре дополняется
+двумя пробелами в начале и одним в конце. Сходство слов - отношение общих триграмм
+к объединению (как similarity() в pg_trgm). Оценка услуги - среднее по словам запроса
+лучшего сходства с каким-либо словом ее названия, поэтому опечатка в одном слове
+("ренген", "брюшнй") не обнуляет совпадение остальных.
+
+Индекс строится в памяти процесса по словарю слов названий, а не по услугам:
+словарь каталога намного меньше числа услуг, и поиск занимает миллисекунды
+даже на десятках тысяч услуг.
+"""
+import re
+from collections import Counter, defaultdict
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def split_words(text):
+    return [word.lower() for word in WORD_RE.findall(text)]
+
+
+def word_trigrams(word):
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(left, right):
+    """Сходство двух слов по триграммам от 0 до 1"""
+    left, right = word_trigrams(left), word_trigrams(right)
+    common = len(left & right)
+    return common / (len(left) + len(right) - common)
+
+
+class TrigramIndex:
+    """Инвертированный индекс триграмм по словам названий"""
+
+    def __init__(self, items):
+        self.trigrams = {}
+        self.postings = defaultdict(list)
+        self.word_ids = defaultdict(list)
+        for item_id, text in items:
+            for word in dict.fromkeys(split_words(text)):
+                if word not in self.trigrams:
+                    self.trigrams[word] = word_trigrams(word)
+                    for trigram in self.trigrams[word]:
+                        self.postings[trigram].append(word)
+                self.word_ids[word].append(item_id)
+
+    def _match_word(self, query_word):
+        """Лучшее сходство слова запроса для каждого объекта"""
+        query_trigrams = word_trigrams(query_word)
+        counts = Counter()
+        for trigram in query_trigrams:
+            counts.update(self.postings.get(trigram, ()))
+
+        best = {}
+        for word, common in counts.items():
+            score = common / (len(query_trigrams) + len(self.trigrams[word]) - common)
+            for item_id in self.word_ids[word]:
+                if score > best.get(item_id, 0.0):
+                    best[item_id] = score
+        return best
+
+    def scores(self, query):
+        """Сходство запроса с каждым найденным объектом"""
+        words = split_words(query)
+        totals = defaultdict(float)
+        for word in words:
+            for item_id, score in self._match_word(word).items():
+                totals[item_id] += score
+        return {item_id: total / len(words) for item_id, total in totals.items()}
+
+    def search(self, queries, threshold, limit=None):
+        """
+        Id объектов со сходством не ниже порога, по убыванию сходства.
+        Можно передать несколько вариантов запроса - берется лучший из них.
+        """
+        if isinstance(queries, str):
+            queries = [queries]
+
+        best = {}
+        for query in queries:
+            for item_id, score in self.scores(query).items():
+                if score > best.get(item_id, 0.0):
+                    best[item_id] = score
+
+        ranked = sorted(
+            ((score, item_id) for item_id, score in best.items() if score >= threshold),
+            key=lambda pair: (-pair[0], pair[1]),
+        )
+        return [item_id for _score, item_id in ranked[:limit]]
@@ -7,5 +7,6 @@ app_name = "services"
 urlpatterns = [
     path("", views.ServiceListView.as_view(), name="list"),
     path("search/", views.ServiceSearchView.as_view(), name="search"),
+    path("autocomplete/", views.ServiceAutocompleteView.as_view(), name="autocomplete"),
     path("<slug:service_slug>/", views.ServiceDetailView.as_view(), name="detail"),
 ]
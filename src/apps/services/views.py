@@ -1,66 +1,113 @@
-from django.db.models import Q
-from django.shortcuts import get_object_or_404, render
-from django.views.generic import DetailView, ListView
+from django.http import JsonResponse
+from django.views.generic import DetailView, ListView, View
 
-from .models import Service, ServiceCategory
+from apps.common.page_cache import PublicPageCacheMixin
 
+from .autocomplete import MAX_AUTOCOMPLETE_LIMIT, get_autocomplete_limit
+from .catalog import CATALOG_TAG, category_tag, get_catalog, get_service_or_404
+from .facets import Facets
+from .models import Service
+from .search_cache import get_search_results
 
-class ServiceListView(ListView):
+
+class FacetedServiceListMixin:
+    """Фасетная фильтрация списка услуг по параметрам запроса"""
+
+    def get_services(self):
+        raise NotImplementedError
+
+    def get_queryset(self):
+        self.facets = Facets(self.get_services(), get_catalog().categories, self.request.GET)
+        return self.facets.services
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["facets"] = self.facets
+        # Параметры фильтров и поиска для ссылок пагинации
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        context["page_query"] = params.urlencode()
+        if context["is_paginated"]:
+            # Номера страниц вокруг текущей и по краям, остальные свернуты в многоточие
+            context["page_range"] = context["paginator"].get_elided_page_range(context["page_obj"].number)
+        return context
+
+
+class ServiceListView(PublicPageCacheMixin, FacetedServiceListMixin, ListView):
     model = Service
     template_name = "services/list.html"
     context_object_name = "services"
     paginate_by = 9
 
-    def get_queryset(self):
-        queryset = Service.objects.filter(is_active=True).select_related("category")
-        category_id = self.request.GET.get("category")
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-        return queryset
+    def get_services(self):
+        # Услуги берутся из снимка каталога: страница не выполняет SQL-запросов
+        return get_catalog().get_services()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["categories"] = ServiceCategory.objects.all()
         context["page_title"] = "Услуги - Медицинский Диагностический Центр"
-        context["selected_category"] = self.request.GET.get("category")
         return context
 
 
-class ServiceDetailView(DetailView):
+class ServiceDetailView(PublicPageCacheMixin, DetailView):
     model = Service
     template_name = "services/detail.html"
     context_object_name = "service"
     slug_field = "slug"
     slug_url_kwarg = "service_slug"
 
-    def get_queryset(self):
-        return Service.objects.filter(is_active=True).select_related("category")
+    def get_page_cache_tags(self):
+        # Страница показывает услугу и другие услуги ее категории, остальной каталог на нее не влияет
+        service = get_catalog().get_service(self.kwargs.get(self.slug_url_kwarg))
+        return [category_tag(service.category_id)] if service is not None else [CATALOG_TAG]
+
+    def get_object(self, queryset=None):
+        return get_service_or_404(self.kwargs.get(self.slug_url_kwarg))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context["other_services"] = [
+            service for service in get_catalog().get_services(self.object.category_id) if service.pk != self.object.pk
+        ]
         context["page_title"] = f"{self.object.name} - Медицинский Диагностический Центр"
         return context
 
 
 # Дополнительный view для поиска услуг
-class ServiceSearchView(ListView):
+class ServiceSearchView(FacetedServiceListMixin, ListView):
     model = Service
     template_name = "services/list.html"
     context_object_name = "services"
     paginate_by = 9
 
-    def get_queryset(self):
-        queryset = Service.objects.filter(is_active=True)
+    def get_services(self):
         query = self.request.GET.get("q")
         if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) | Q(description__icontains=query) | Q(category__name__icontains=query)
-            )
-        return queryset
+            # Id ранжируются поиском (и кэшируются), сами услуги берутся из снимка каталога.
+            # Переходы по страницам и фильтрам выдачи не учитываются в статистике
+            record = not any(name in self.request.GET for name in ("page", "category", "price"))
+            ids = get_search_results(query, record=record)
+            return get_catalog().get_services_by_ids(ids)
+        return get_catalog().get_services()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["categories"] = ServiceCategory.objects.all()
         context["page_title"] = "Поиск услуг - Медицинский Диагностический Центр"
         context["search_query"] = self.request.GET.get("q", "")
         return context
+
+
+class ServiceAutocompleteView(View):
+    """JSON suggestions for the service search box."""
+
+    def get(self, request):
+        """Handle GET request for suggestions matching the beginning of the query."""
+        query = request.GET.get("q", "").strip()
+        try:
+            limit = int(request.GET.get("limit", get_autocomplete_limit()))
+        except ValueError:
+            return JsonResponse({"error": "Invalid limit"}, status=400)
+        limit = min(max(limit, 1), MAX_AUTOCOMPLETE_LIMIT)
+
+        suggestions = get_catalog().autocomplete_index.suggest(query, limit) if query else []
+        return JsonResponse({"query": query, "suggestions": suggestions})
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-18 13:10
+
+from django.db import migrations, models
+
+from apps.common.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся CONCURRENTLY на PostgreSQL, что невозможно внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="user",
+            index=models.Index(fields=["date_joined"], name="user_date_joined_idx"),
+        ),
+    ]
@@ -29,6 +29,10 @@ class User(AbstractUser):
         verbose_name = _("Пользователь")
         verbose_name_plural = _("Пользователи")
         ordering = ["-created_at"]
+        indexes = [
+            # Регистрации за период: выборки идут диапазоном по date_joined, а не через __date
+            models.Index(fields=["date_joined"], name="user_date_joined_idx"),
+        ]
 
     def __str__(self):
         return self.username
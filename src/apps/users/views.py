@@ -10,6 +10,8 @@ from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.views.generic import CreateView, TemplateView, UpdateView
 
+from apps.appointments.statistics import get_appointment_statistics
+
 from .forms import UserLoginForm, UserProfileForm, UserRegisterForm
 from .models import User
 
@@ -102,6 +104,10 @@ class UserProfileView(LoginRequiredMixin, UpdateView):
         """Get context data for template."""
         context = super().get_context_data(**kwargs)
         context["page_title"] = _("Личный кабинет - Медицинский Диагностический Центр")
+        statistics = get_appointment_statistics(self.request.user)
+        context["total_appointments"] = statistics["total"]
+        context["upcoming_appointments"] = statistics["upcoming"]
+        context["completed_appointments"] = statistics["completed"]
         return context
 
 
@@ -114,4 +120,8 @@ class ProfileDashboardView(LoginRequiredMixin, TemplateView):
         """Get context data for template."""
         context = super().get_context_data(**kwargs)
         context["page_title"] = _("Личный кабинет - Медицинский Диагностический Центр")
+        statistics = get_appointment_statistics(self.request.user)
+        context["total_appointments"] = statistics["total"]
+        context["upcoming_appointments"] = statistics["upcoming"]
+        context["completed_appointments"] = statistics["completed"]
         return context
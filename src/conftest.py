@@ -65,3 +65,23 @@ def appointment(user, service):
         patient_phone="+1234567890",
         patient_email="john@example.com",
     )
+
+
+@pytest.fixture(autouse=True)
+def catalog_snapshot():
+    """Снимок каталога живет в памяти процесса и не откатывается вместе с транзакцией теста"""
+    from apps.services.catalog import clear_catalog_snapshot
+
+    clear_catalog_snapshot()
+    yield
+    clear_catalog_snapshot()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Общий кэш (locmem в тестах) хранит закэшированные страницы и выдачи между тестами"""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
@@ -91,13 +91,24 @@ LOGGING = {
     },
 }
 
-# Cache configuration
+# Cache configuration: LRU в памяти воркера перед общим Redis, инвалидация через pub/sub
 CACHES = {
     "default": {
+        "BACKEND": "apps.common.cache_backends.TwoTierCache",
+        "LOCATION": "default",
+        "OPTIONS": {
+            "SHARED_CACHE": "shared",
+            "MAX_ENTRIES": int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", 1000)),
+            "LOCAL_TIMEOUT": int(os.getenv("LOCAL_CACHE_TIMEOUT", 30)),
+        },
+    },
+    "shared": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
         "LOCATION": f"redis://{os.getenv('REDIS_HOST', 'redis')}:{os.getenv('REDIS_PORT', 6379)}/1",
-    }
+    },
 }
 
 # Performance optimizations
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+# Сессии читаются один раз за запрос и в L1 только занимали бы место
+SESSION_CACHE_ALIAS = "shared"
@@ -235,6 +235,35 @@ MEDICAL_CENTER_SETTINGS = {
         "MIN_DAYS_AHEAD": 1,
         "MAX_DAYS_AHEAD": 90,
         "TIME_SLOT_DURATION": 30,
+        "SLOT_HOLD_MINUTES": 10,
+    },
+    "SEARCH_SETTINGS": {
+        # Минимальное сходство по триграммам для поиска с опечатками (0..1)
+        "TRIGRAM_THRESHOLD": 0.3,
+        # Число подсказок автодополнения по умолчанию
+        "AUTOCOMPLETE_LIMIT": 10,
+        # Время жизни закэшированной выдачи поиска (секунды)
+        "RESULT_CACHE_TIMEOUT": 600,
+        # Интервал, за который счетчики поисковых запросов копятся в кэше перед записью в БД (секунды)
+        "STATS_FLUSH_INTERVAL": 60,
+    },
+    "CACHE_SETTINGS": {
+        # Время жизни закэшированных публичных страниц для анонимных посетителей (секунды)
+        "PAGE_CACHE_TIMEOUT": 300,
+        # Время жизни статистики записей пользователя (секунды); изменения записей сбрасывают ее сразу
+        "STATISTICS_CACHE_TIMEOUT": 60,
+        # Счетчики главной страницы и панели управления админки (секунды)
+        "ADMIN_STATS_TIMEOUT": 60,
+        # Маски свободных слотов для календаря записи; бронирование сбрасывает их сразу
+        "AVAILABILITY_CACHE_TIMEOUT": 30,
+        # Сколько секунд один воркер может пересчитывать значение, пока остальные ждут
+        "RECOMPUTE_LOCK_TIMEOUT": 10,
+        # Сколько секунд воркер без блокировки ждет чужого результата, прежде чем посчитать сам
+        "RECOMPUTE_MAX_WAIT": 1,
+        # Результат объединенных одинаковых запросов разделяется между воркерами (секунды)
+        "COALESCE_TIMEOUT": 2,
+        # Время жизни версий тегов кэша (секунды); должно быть больше времени жизни записей с тегами
+        "TAG_VERSION_TIMEOUT": 24 * 60 * 60,
     },
 }
 